@@ -17,8 +17,8 @@ __author__ = "Addis Ababa AI School Development Team"
 
 # Import main components
 from .ai_ml_service import AIServiceManager, AIServiceAPI, AIServiceConfig
-from .neural_networks import ModelFactory, EducationalTransformer
-from .pipelines.training_pipeline import AdvancedTrainer, ModelEvaluator
+from .models.neural_networks.educational_neural_networks import ModelFactory, EducationalTransformer
+from .training.model_training.advanced_training_pipeline import AdvancedTrainer, ModelEvaluator
 from .analytics.predictive_analytics import StudentPerformancePredictor, RiskAssessmentEngine
 from .adaptive_learning.adaptive_learning_engine import AdaptiveLearningEngine
 from .emotional_intelligence.emotion_recognition import EmotionalIntelligenceEngine
@@ -16,19 +16,25 @@ import torch
 import logging
 import json
 import os
-from typing import Dict, List, Tuple, Optional, Any, Union
-from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Tuple, Optional, Any, Union
+from dataclasses import dataclass, asdict, field
 from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import AI/ML components
-from .neural_networks import ModelFactory, EducationalTransformer, StudentPerformancePredictor as NeuralPredictor
-from .pipelines.training_pipeline import TrainingConfig, AdvancedTrainer, ModelEvaluator
+from .models.neural_networks.educational_neural_networks import (
+    ModelFactory, EducationalTransformer, StudentPerformancePredictor as NeuralPredictor
+)
+from .models.neural_networks.model_export import DEFAULT_VARIANT_ORDER, load_optimized_model
+from .models.model_registry import ModelCache, ModelRegistry, estimate_model_bytes
+from .training.model_training.advanced_training_pipeline import TrainingConfig, AdvancedTrainer, ModelEvaluator
+from .training.model_training.data_extraction import TrainingDataExtractor
 from .analytics.predictive_analytics import (
     PredictionConfig, StudentPerformancePredictor, RiskAssessmentEngine, 
     InterventionRecommendationEngine
 )
+from .analytics.prediction_cache import create_prediction_cache
 from .adaptive_learning.adaptive_learning_engine import (
     AdaptiveLearningConfig, AdaptiveLearningEngine
 )
@@ -40,6 +46,9 @@ from .emotional_intelligence.emotion_recognition import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Column that keys each student's rows in the concatenated batch_predict frame
+BATCH_KEY_COLUMN = '_batch_position'
+
 @dataclass
 class AIServiceConfig:
     """Configuration for the AI/ML service."""
@@ -50,14 +59,27 @@ class AIServiceConfig:
     enable_real_time_inference: bool = True
     
     # Model management
-    model_storage_path: str = "models/"
-    model_cache_size: int = 10
+    model_storage_path: str = "models/"  # root of the versioned ModelRegistry
+    model_cache_size: int = 10  # most models kept loaded at once
+    model_cache_memory_mb: Optional[float] = 1024  # estimated memory bound of loaded models; None for no bound
+    performance_model_name: str = "student_performance"  # registry name of the served StudentPerformancePredictor
+    
+    # Prediction result cache
+    enable_prediction_cache: bool = True
+    prediction_cache_path: Optional[str] = None  # SQLite file shared by all workers; None keeps the cache in memory
+    prediction_cache_size: int = 10000
+    prediction_cache_ttl: int = 3600  # seconds
+    exported_model_path: str = "models/exported/"  # TorchScript/ONNX artifacts written by ModelExporter
+    preferred_model_variants: List[str] = field(default_factory=lambda: list(DEFAULT_VARIANT_ORDER))
     auto_model_update: bool = True
+    emotion_history_path: Optional[str] = None  # SQLite file shared by all workers; None keeps history in memory
+    intervention_catalog_path: Optional[str] = None  # JSON intervention catalog, reloaded on change; None uses the built-in one
     
     # Performance parameters
     batch_size: int = 32
     max_concurrent_requests: int = 100
     request_timeout: int = 30
+    concurrent_emotion_modalities: bool = False  # run facial/voice/behavioral recognition in parallel
     
     # Monitoring parameters
     enable_performance_monitoring: bool = True
@@ -70,7 +92,15 @@ class AIServiceManager:
     def __init__(self, config: AIServiceConfig):
         self.config = config
         self.services = {}
-        self.model_cache = {}
+        self.model_cache = ModelCache(config.model_cache_size, config.model_cache_memory_mb)
+        self.model_registry = ModelRegistry(config.model_storage_path, self.model_cache)
+        self.prediction_cache = None
+        if config.enable_prediction_cache:
+            self.prediction_cache = create_prediction_cache(
+                config.prediction_cache_path, max_entries=config.prediction_cache_size,
+                ttl_seconds=config.prediction_cache_ttl
+            )
+        self._served_model_version = None
         self.request_queue = []
         self.performance_metrics = {}
         
@@ -91,11 +121,14 @@ class AIServiceManager:
                     risk_threshold=0.7
                 )
                 
+                # Trained predictors are loaded lazily from the model registry;
+                # this untrained one serves until a version is registered
                 self.services['predictive_analytics'] = {
                     'predictor': StudentPerformancePredictor(pred_config),
                     'risk_engine': RiskAssessmentEngine(pred_config),
-                    'intervention_engine': InterventionRecommendationEngine()
+                    'intervention_engine': InterventionRecommendationEngine(self.config.intervention_catalog_path)
                 }
+                self.services['predictive_analytics']['risk_engine'].prediction_cache = self.prediction_cache
                 logger.info("Predictive Analytics service initialized")
             
             # Initialize Adaptive Learning
@@ -114,7 +147,9 @@ class AIServiceManager:
                 emotion_config = EmotionRecognitionConfig(
                     facial_model_type='cnn',
                     voice_model_type='lstm',
-                    behavioral_model_type='lstm'
+                    behavioral_model_type='lstm',
+                    emotion_history_path=self.config.emotion_history_path,
+                    concurrent_modalities=self.config.concurrent_emotion_modalities
                 )
                 
                 self.services['emotional_intelligence'] = EmotionalIntelligenceEngine(emotion_config)
@@ -135,13 +170,12 @@ class AIServiceManager:
             if 'predictive_analytics' not in self.services:
                 raise ValueError("Predictive Analytics service not available")
             
-            predictor = self.services['predictive_analytics']['predictor']
-            
-            # Prepare features
-            features = predictor.prepare_features(student_data)
+            predictor = self.get_performance_predictor()
             
             # Make prediction
             if predictor.is_trained:
+                # Apply the feature pipeline fitted during training
+                features = predictor.prepare_features(student_data)
                 predictions = predictor.predict(features)
                 probabilities = predictor.predict_proba(features)
                 
@@ -157,8 +191,8 @@ class AIServiceManager:
                 # Use basic prediction if model not trained
                 result = {
                     'student_id': student_id,
-                    'predictions': ['average'] * len(features),
-                    'probabilities': [[0.25, 0.25, 0.25, 0.25]] * len(features),
+                    'predictions': ['average'] * len(student_data),
+                    'probabilities': [[0.25, 0.25, 0.25, 0.25]] * len(student_data),
                     'confidence': 0.25,
                     'timestamp': datetime.now().isoformat(),
                     'model_status': 'untrained',
@@ -192,7 +226,7 @@ class AIServiceManager:
                 raise ValueError("Predictive Analytics service not available")
             
             risk_engine = self.services['predictive_analytics']['risk_engine']
-            predictor = self.services['predictive_analytics']['predictor']
+            predictor = self.get_performance_predictor()
             
             # Assess risk
             risk_assessment = risk_engine.assess_student_risk(student_data, predictor)
@@ -312,7 +346,7 @@ class AIServiceManager:
             
             # Analyze emotional state
             analysis_results = emotion_engine.analyze_emotional_state(
-                facial_image, voice_audio, behavior_data
+                facial_image, voice_audio, behavior_data, student_id=student_id
             )
             
             result = {
@@ -336,10 +370,18 @@ class AIServiceManager:
                 'timestamp': datetime.now().isoformat()
             }
     
-    def train_custom_model(self, model_type: str, training_data: pd.DataFrame,
+    def train_custom_model(self, model_type: str, training_data: Union[pd.DataFrame, str],
                           model_config: Dict[str, Any]) -> Dict[str, Any]:
-        """Train a custom AI model for educational purposes."""
+        """
+        Train a custom AI model for educational purposes.
+        
+        ``training_data`` is a DataFrame or the directory of a dataset cached
+        by ``manage.py extract_training_data``.
+        """
         try:
+            if isinstance(training_data, str):
+                training_data = TrainingDataExtractor(training_data).load()
+            
             # Create training configuration
             training_config = TrainingConfig(
                 model_type=model_type,
@@ -400,7 +442,7 @@ class AIServiceManager:
             # Get emotional trends if service available
             if 'emotional_intelligence' in self.services:
                 emotion_engine = self.services['emotional_intelligence']
-                emotion_trends = emotion_engine.get_emotion_trends(time_window)
+                emotion_trends = emotion_engine.get_emotion_trends(time_window, student_id=student_id)
                 insights['emotional_insights'] = emotion_trends
             
             # Get performance trends (placeholder - would integrate with actual data)
@@ -443,38 +485,22 @@ class AIServiceManager:
             }
     
     def batch_predict(self, student_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Perform batch predictions for multiple students."""
+        """
+        Perform batch predictions for multiple students.
+        
+        All students are concatenated into one frame keyed by their position
+        in the batch, features are prepared once, the model is called once
+        over the whole matrix and risk is scored for the cohort in one pass;
+        results are then split back per student. Falls back to per-student
+        predictions if the batch path fails.
+        """
         try:
-            results = []
-            
-            for student_data in student_data_list:
-                student_id = student_data.get('student_id')
-                data_df = pd.DataFrame(student_data.get('data', []))
-                
-                if not data_df.empty:
-                    # Perform performance prediction
-                    performance_result = self.predict_student_performance(data_df, student_id)
-                    
-                    # Perform risk assessment
-                    risk_result = self.assess_student_risk(data_df, student_id)
-                    
-                    # Combine results
-                    combined_result = {
-                        'student_id': student_id,
-                        'performance_prediction': performance_result,
-                        'risk_assessment': risk_result,
-                        'timestamp': datetime.now().isoformat()
-                    }
-                    
-                    results.append(combined_result)
-                else:
-                    results.append({
-                        'student_id': student_id,
-                        'error': 'No data provided',
-                        'timestamp': datetime.now().isoformat()
-                    })
-            
-            return results
+            return self._batch_predict_vectorized(student_data_list)
+        except Exception as e:
+            logger.error(f"Vectorized batch prediction failed, predicting per student: {e}")
+        
+        try:
+            return self._batch_predict_per_student(student_data_list)
             
         except Exception as e:
             error_msg = f"Error in batch prediction: {e}"
@@ -485,15 +511,231 @@ class AIServiceManager:
             
             return [{'error': error_msg, 'timestamp': datetime.now().isoformat()}]
     
+    def _batch_predict_vectorized(self, student_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Batch predictions with one feature preparation, model call and risk pass for all students."""
+        if 'predictive_analytics' not in self.services:
+            raise ValueError("Predictive Analytics service not available")
+        
+        predictor = self.get_performance_predictor()
+        risk_engine = self.services['predictive_analytics']['risk_engine']
+        
+        # One long-format frame; the batch position keys each student's rows
+        frames = {}
+        for position, student_data in enumerate(student_data_list):
+            data_df = pd.DataFrame(student_data.get('data', []))
+            if not data_df.empty:
+                frames[position] = data_df
+        
+        row_ranges = {}
+        predictions = probabilities = row_confidence = None
+        risk_assessments = {}
+        if frames:
+            batch_df = pd.concat(frames.values(), keys=list(frames.keys()), names=[BATCH_KEY_COLUMN, None])
+            batch_df = batch_df.reset_index(level=0).reset_index(drop=True)
+            
+            offset = 0
+            for position, frame in frames.items():
+                row_ranges[position] = slice(offset, offset + len(frame))
+                offset += len(frame)
+            
+            if predictor.is_trained:
+                features = predictor.prepare_features(batch_df, group_column=BATCH_KEY_COLUMN)
+                predictions = predictor.predict(features)
+                probabilities = predictor.predict_proba(features)
+                row_confidence = probabilities.max(axis=1)
+            
+            risk_assessments = risk_engine.cohort_risk_assessments(
+                risk_engine.assess_cohort_risk(batch_df, student_column=BATCH_KEY_COLUMN)
+            )
+        
+        results = []
+        for position, student_data in enumerate(student_data_list):
+            student_id = student_data.get('student_id')
+            timestamp = datetime.now().isoformat()
+            
+            if position not in frames:
+                results.append({
+                    'student_id': student_id,
+                    'error': 'No data provided',
+                    'timestamp': timestamp
+                })
+                continue
+            
+            rows = row_ranges[position]
+            if predictions is not None:
+                performance_result = {
+                    'student_id': student_id,
+                    'predictions': predictions[rows].tolist(),
+                    'probabilities': probabilities[rows].tolist(),
+                    'confidence': row_confidence[rows].max(),
+                    'timestamp': timestamp,
+                    'model_status': 'trained'
+                }
+            else:
+                num_rows = rows.stop - rows.start
+                performance_result = {
+                    'student_id': student_id,
+                    'predictions': ['average'] * num_rows,
+                    'probabilities': [[0.25, 0.25, 0.25, 0.25]] * num_rows,
+                    'confidence': 0.25,
+                    'timestamp': timestamp,
+                    'model_status': 'untrained',
+                    'message': 'Model not trained, using basic predictions'
+                }
+            
+            risk_assessment = risk_assessments[position]
+            risk_result = {
+                'student_id': student_id,
+                'risk_assessment': risk_assessment,
+                'timestamp': timestamp,
+                'overall_risk': risk_assessment['overall_risk'],
+                'risk_category': risk_assessment['risk_category'],
+                'interventions': risk_assessment['intervention_recommendations']
+            }
+            
+            if self.config.log_predictions:
+                self._log_prediction('performance_prediction', performance_result)
+                self._log_prediction('risk_assessment', risk_result)
+            
+            results.append({
+                'student_id': student_id,
+                'performance_prediction': performance_result,
+                'risk_assessment': risk_result,
+                'timestamp': timestamp
+            })
+        
+        return results
+    
+    def _batch_predict_per_student(self, student_data_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Batch predictions by calling the single-student predictions for each entry."""
+        results = []
+        
+        for student_data in student_data_list:
+            student_id = student_data.get('student_id')
+            data_df = pd.DataFrame(student_data.get('data', []))
+            
+            if not data_df.empty:
+                # Perform performance prediction
+                performance_result = self.predict_student_performance(data_df, student_id)
+                
+                # Perform risk assessment
+                risk_result = self.assess_student_risk(data_df, student_id)
+                
+                # Combine results
+                combined_result = {
+                    'student_id': student_id,
+                    'performance_prediction': performance_result,
+                    'risk_assessment': risk_result,
+                    'timestamp': datetime.now().isoformat()
+                }
+                
+                results.append(combined_result)
+            else:
+                results.append({
+                    'student_id': student_id,
+                    'error': 'No data provided',
+                    'timestamp': datetime.now().isoformat()
+                })
+        
+        return results
+    
+    def get_performance_predictor(self) -> StudentPerformancePredictor:
+        """
+        The performance predictor to serve.
+        
+        The current registry version is loaded on first use and re-resolved
+        on every call, so promoting a new version takes effect without a
+        restart. Falls back to the service's untrained predictor when no
+        version is registered or loading fails. Cached predictions of the
+        previously served version are invalidated when the version changes.
+        """
+        if 'predictive_analytics' not in self.services:
+            raise ValueError("Predictive Analytics service not available")
+        
+        name = self.config.performance_model_name
+        try:
+            predictor = self.model_registry.get_model(name)
+        except Exception as e:
+            logger.error(f"Falling back to untrained performance predictor: {e}")
+            predictor = None
+        
+        if predictor is None:
+            return self.services['predictive_analytics']['predictor']
+        
+        if predictor.model_version is None:
+            # Saved before models carried a version; the registry version identifies it
+            predictor.model_version = f"{name}:{self.model_registry.current_version(name)}"
+        predictor.prediction_cache = self.prediction_cache
+        
+        if predictor.model_version != self._served_model_version:
+            if self.prediction_cache is not None and self._served_model_version is not None:
+                self.prediction_cache.invalidate(self._served_model_version)
+            self._served_model_version = predictor.model_version
+        
+        return predictor
+    
+    def register_model(self, model_name: str, model: Any, metadata: Optional[Dict[str, Any]] = None,
+                       promote: bool = True) -> Dict[str, Any]:
+        """Store a trained model as a new registry version, promoting it by default."""
+        return self.model_registry.register(model_name, model, metadata=metadata, promote=promote)
+    
+    def promote_model(self, model_name: str, version: str):
+        """Hot-swap ``model_name`` to ``version``; the next request loads it."""
+        self.model_registry.promote(model_name, version)
+    
+    def load_model(self, model_name: str,
+                   eager_builder: Optional[Callable[[], torch.nn.Module]] = None):
+        """
+        Load a neural network for inference.
+        
+        Prefers an exported TorchScript/ONNX artifact that passed its parity
+        check; falls back to the eager model from ``eager_builder``.
+        """
+        cache_key = ('exported', model_name)
+        cached = self.model_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        model = None
+        try:
+            model = load_optimized_model(self.config.exported_model_path, model_name,
+                                         self.config.preferred_model_variants)
+        except Exception as e:
+            logger.error(f"Error loading optimized model {model_name}: {e}")
+        
+        if model is None and eager_builder is not None:
+            model = eager_builder()
+            model.eval()
+            logger.info(f"Using eager model for {model_name}")
+        
+        if model is not None:
+            artifact_path = getattr(model, 'path', None)
+            artifact_bytes = os.path.getsize(artifact_path) if artifact_path and os.path.exists(artifact_path) else 0
+            self.model_cache.put(cache_key, model, estimate_model_bytes(model, artifact_bytes))
+        
+        return model
+    
     def get_service_status(self) -> Dict[str, Any]:
         """Get the status of all AI/ML services."""
         status = {
             'timestamp': datetime.now().isoformat(),
             'services': {},
             'overall_status': 'healthy',
-            'performance_metrics': self.performance_metrics
+            'performance_metrics': self.performance_metrics,
+            'models': {},
+            'model_cache': self.model_cache.stats(),
+            'prediction_cache': self.prediction_cache.stats() if self.prediction_cache is not None else None
         }
         
+        # Registered model versions and their load states
+        try:
+            status['models'] = self.model_registry.load_states()
+            if any(model['state'] == 'error' for model in status['models'].values()):
+                status['overall_status'] = 'degraded'
+        except Exception as e:
+            status['models'] = {'error': str(e)}
+            status['overall_status'] = 'degraded'
+        
         # Check each service
         for service_name, service in self.services.items():
             try:
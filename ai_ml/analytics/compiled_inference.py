@@ -0,0 +1,222 @@
+"""
+Compiled Inference for Tree Ensembles
+Addis Ababa AI School Management System
+
+Array-based serving of the sklearn tree ensembles used for performance
+prediction:
+- Every tree's nodes are renumbered breadth-first and concatenated into flat
+  feature/threshold/first-child/value arrays, with leaves pointing at themselves
+- All trees are traversed at once for a whole batch, one vectorized step per
+  tree level, without sklearn's per-call validation and threading overhead
+- A parity check against the sklearn model gates its use
+"""
+
+import logging
+from typing import Any, Dict, Optional
+
+import numpy as np
+from sklearn.ensemble import (
+    GradientBoostingRegressor, RandomForestClassifier, RandomForestRegressor
+)
+
+logger = logging.getLogger(__name__)
+
+# Largest allowed |compiled - sklearn| on the parity features
+DEFAULT_PARITY_TOLERANCE = 1e-9
+
+
+class CompiledTreeEnsemble:
+    """
+    A fitted tree ensemble as flat node arrays.
+
+    ``kind`` is 'forest_classifier' (mean of per-tree class distributions),
+    'forest_regressor' (mean of leaf values) or 'boosting_regressor'
+    (``base + learning_rate * sum`` of leaf values).
+    """
+
+    SUPPORTED = (RandomForestClassifier, RandomForestRegressor, GradientBoostingRegressor)
+
+    def __init__(self, kind: str, roots: np.ndarray, feature: np.ndarray, threshold: np.ndarray,
+                 first_child: np.ndarray, value: np.ndarray, depth: int,
+                 n_features: int, classes: Optional[np.ndarray] = None,
+                 learning_rate: float = 1.0, base: float = 0.0):
+        self.kind = kind
+        self.roots = roots
+        self.feature = feature
+        self.threshold = threshold
+        self.first_child = first_child
+        self.value = value
+        self.depth = depth
+        self.n_features = n_features
+        self.classes_ = classes
+        self.learning_rate = learning_rate
+        self.base = base
+        self.is_leaf = first_child == np.arange(len(first_child))
+        self.parity: Dict[str, Any] = {}
+
+    @classmethod
+    def from_sklearn(cls, model: Any) -> Optional['CompiledTreeEnsemble']:
+        """Compile a fitted sklearn ensemble, or return None if its type is not supported."""
+        if not isinstance(model, cls.SUPPORTED):
+            return None
+
+        if isinstance(model, GradientBoostingRegressor):
+            if model.init_ == 'zero':
+                base = 0.0
+            elif hasattr(model.init_, 'constant_'):
+                base = float(np.ravel(model.init_.constant_)[0])
+            else:
+                return None  # a fitted init estimator is not a constant
+            trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+            kind, learning_rate = 'boosting_regressor', float(model.learning_rate)
+        else:
+            base = 0.0
+            trees = [estimator.tree_ for estimator in model.estimators_]
+            kind = 'forest_classifier' if isinstance(model, RandomForestClassifier) else 'forest_regressor'
+            learning_rate = 1.0
+
+        roots, features, thresholds, children, values = [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            order = cls._breadth_first_order(tree.children_left, tree.children_right)
+            position = np.empty_like(order)
+            position[order] = np.arange(len(order))
+
+            left = tree.children_left[order]
+            is_leaf = left < 0
+            roots.append(offset)
+            # Breadth-first numbering puts each node's children next to each
+            # other, so the next node is first_child + (not go_left). Leaves
+            # point at themselves with threshold +inf (always go "left").
+            features.append(np.where(is_leaf, 0, tree.feature[order]))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+            children.append(offset + np.where(is_leaf, np.arange(len(order)), position[np.maximum(left, 0)]))
+
+            if kind == 'forest_classifier':
+                # Class distribution per leaf (sklearn stores counts or fractions depending on version)
+                counts = tree.value[order, 0, :]
+                totals = counts.sum(axis=1, keepdims=True)
+                values.append(counts / np.where(totals > 0, totals, 1.0))
+            else:
+                values.append(tree.value[order, 0, :1])
+            offset += tree.node_count
+
+        return cls(
+            kind=kind,
+            roots=np.array(roots, dtype=np.intp),
+            feature=np.concatenate(features).astype(np.intp),
+            threshold=np.concatenate(thresholds).astype(np.float64),
+            first_child=np.concatenate(children).astype(np.intp),
+            value=np.concatenate(values).astype(np.float64),
+            depth=max(tree.max_depth for tree in trees),
+            n_features=int(model.n_features_in_),
+            classes=getattr(model, 'classes_', None),
+            learning_rate=learning_rate,
+            base=base
+        )
+
+    @staticmethod
+    def _breadth_first_order(children_left: np.ndarray, children_right: np.ndarray) -> np.ndarray:
+        """Node ids in breadth-first order, left child before right child."""
+        order = [0]
+        for node in order:
+            if children_left[node] >= 0:
+                order.extend((children_left[node], children_right[node]))
+        return np.array(order, dtype=np.intp)
+
+    def leaves(self, features: np.ndarray) -> np.ndarray:
+        """Leaf node of every tree for every row, shape (rows, trees)."""
+        # sklearn compares float32 features against float64 thresholds
+        X = np.ascontiguousarray(features, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got shape {X.shape}")
+
+        num_rows, num_trees = X.shape[0], len(self.roots)
+        nodes = np.tile(self.roots, num_rows)
+        # Only (row, tree) pairs that have not reached a leaf are advanced,
+        # so each level touches fewer pairs than the last
+        active = np.flatnonzero(~self.is_leaf[nodes])
+        row_starts = (active // num_trees) * self.n_features
+        flat_X = X.ravel()
+        for _ in range(self.depth):
+            if active.size == 0:
+                break
+            current = nodes[active]
+            go_left = flat_X[row_starts + self.feature[current]] <= self.threshold[current]
+            following = self.first_child[current] + ~go_left
+            nodes[active] = following
+            internal = ~self.is_leaf[following]
+            active, row_starts = active[internal], row_starts[internal]
+        return nodes.reshape(num_rows, num_trees)
+
+    def _raw(self, features: np.ndarray) -> np.ndarray:
+        leaf_values = self.value[self.leaves(features)]  # (rows, trees, outputs)
+        if self.kind == 'boosting_regressor':
+            return self.base + self.learning_rate * leaf_values.sum(axis=1)
+        return leaf_values.mean(axis=1)
+
+    def predict_proba(self, features: np.ndarray) -> np.ndarray:
+        if self.kind != 'forest_classifier':
+            raise AttributeError(f"predict_proba is not available for {self.kind}")
+        return self._raw(features)
+
+    def predict(self, features: np.ndarray) -> np.ndarray:
+        raw = self._raw(features)
+        if self.kind == 'forest_classifier':
+            return self.classes_.take(np.argmax(raw, axis=1), axis=0)
+        return raw[:, 0]
+
+
+def check_parity(model: Any, compiled: CompiledTreeEnsemble, features: np.ndarray,
+                 tolerance: float = DEFAULT_PARITY_TOLERANCE) -> Dict[str, Any]:
+    """Compare compiled and sklearn outputs on ``features`` and record the result on ``compiled``."""
+    if compiled.kind == 'forest_classifier':
+        reference, candidate = model.predict_proba(features), compiled.predict_proba(features)
+        labels_match = bool(np.array_equal(model.predict(features), compiled.predict(features)))
+    else:
+        reference, candidate = model.predict(features), compiled.predict(features)
+        labels_match = True
+
+    max_abs_diff = float(np.max(np.abs(reference - candidate))) if len(features) else 0.0
+    compiled.parity = {
+        'rows': int(len(features)),
+        'max_abs_diff': max_abs_diff,
+        'tolerance': tolerance,
+        'passed': bool(labels_match and max_abs_diff <= tolerance)
+    }
+    return compiled.parity
+
+
+def compile_model(model: Any, parity_features: Optional[np.ndarray] = None,
+                  tolerance: float = DEFAULT_PARITY_TOLERANCE,
+                  probe_rows: int = 256, seed: int = 0) -> Optional[CompiledTreeEnsemble]:
+    """
+    Compile ``model`` and return it only if it matches sklearn.
+
+    Parity is checked on ``parity_features`` plus standard-normal probe rows
+    (prepared features are standardized, so this covers their usual range).
+    Returns None for unsupported models or failed parity, so callers keep
+    serving through sklearn.
+    """
+    try:
+        compiled = CompiledTreeEnsemble.from_sklearn(model)
+        if compiled is None:
+            return None
+
+        probe = np.random.default_rng(seed).standard_normal((probe_rows, compiled.n_features))
+        if parity_features is not None and len(parity_features):
+            probe = np.vstack([np.asarray(parity_features, dtype=np.float64), probe])
+
+        parity = check_parity(model, compiled, probe, tolerance)
+    except Exception as e:
+        logger.error(f"Compiling {type(model).__name__} failed, serving through sklearn: {e}")
+        return None
+
+    if not parity['passed']:
+        logger.warning(f"Compiled {type(model).__name__} failed parity "
+                       f"(max diff {parity['max_abs_diff']:.3g}); serving through sklearn")
+        return None
+
+    logger.info(f"Compiled {type(model).__name__} for inference "
+                f"({len(compiled.roots)} trees, depth {compiled.depth})")
+    return compiled
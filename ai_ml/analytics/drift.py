@@ -0,0 +1,108 @@
+"""
+Feature Drift Detection
+Addis Ababa AI School Management System
+
+Decides whether new records still look like the data a model was trained on:
+- A compact reference (per-feature quantile bin edges and bin proportions)
+  is fitted on the training features and saved with the model
+- New features are scored with the population stability index (PSI) per
+  feature; PSI above 0.2 is the usual sign of a significant shift
+- PSI of small samples is noisy even without any shift, so the threshold is
+  raised to what sampling noise alone would rarely exceed at the given
+  sample sizes, and batches below ``min_rows`` are never reported as drifted
+- Incremental updates are only safe while few features have drifted; beyond
+  that a full retrain is warranted
+"""
+
+import logging
+from typing import Any, Dict
+
+import numpy as np
+from scipy.stats import chi2
+
+logger = logging.getLogger(__name__)
+
+# Floor for empty bins so the log ratio stays finite
+PSI_EPSILON = 1e-4
+
+# Pseudo-count added to every bin, so a bin left empty by chance in a small
+# batch does not dominate the PSI
+BIN_PSEUDO_COUNT = 0.5
+
+
+def fit_drift_reference(features: np.ndarray, bins: int = 10) -> Dict[str, Any]:
+    """Quantile bin edges and bin proportions of every feature of ``features``."""
+    features = np.asarray(features, dtype=np.float64)
+    quantiles = np.linspace(0, 1, bins + 1)[1:-1]
+    edges = np.quantile(features, quantiles, axis=0).T  # (features, bins - 1)
+    return {
+        'edges': edges,
+        'proportions': _bin_proportions(features, edges),
+        'rows': int(len(features))
+    }
+
+
+def _bin_proportions(features: np.ndarray, edges: np.ndarray) -> np.ndarray:
+    bins = edges.shape[1] + 1
+    proportions = np.empty((features.shape[1], bins))
+    for column in range(features.shape[1]):
+        counts = np.bincount(np.searchsorted(edges[column], features[:, column], side='right'), minlength=bins)
+        proportions[column] = (counts + BIN_PSEUDO_COUNT) / (len(features) + BIN_PSEUDO_COUNT * bins)
+    return proportions
+
+
+def population_stability_index(reference: Dict[str, Any], features: np.ndarray) -> np.ndarray:
+    """PSI of every feature of ``features`` against ``reference``."""
+    features = np.asarray(features, dtype=np.float64)
+    expected = np.maximum(reference['proportions'], PSI_EPSILON)
+    actual = np.maximum(_bin_proportions(features, reference['edges']), PSI_EPSILON)
+    return np.sum((actual - expected) * np.log(actual / expected), axis=1)
+
+
+def noise_psi_threshold(bins: int, rows: int, reference_rows: int, significance: float = 0.001) -> float:
+    """
+    PSI that sampling noise alone exceeds with probability ``significance``.
+
+    Without a shift, PSI scaled by ``rows * reference_rows / (rows +
+    reference_rows)`` is approximately chi-square distributed with
+    ``bins - 1`` degrees of freedom.
+    """
+    if rows <= 0:
+        return np.inf
+    scale = 1 / rows + (1 / reference_rows if reference_rows > 0 else 0.0)
+    return float(chi2.ppf(1 - significance, bins - 1) * scale)
+
+
+def drift_report(reference: Dict[str, Any], features: np.ndarray, psi_threshold: float = 0.2,
+                 max_drifted_share: float = 0.1, min_rows: int = 50,
+                 significance: float = 0.001) -> Dict[str, Any]:
+    """
+    Per-feature PSI of ``features`` and whether they have drifted overall.
+
+    A feature has drifted when its PSI is above ``psi_threshold`` and above
+    the noise level of a sample this size (``noise_psi_threshold``).
+    ``drift`` is True when more than ``max_drifted_share`` of the features
+    have drifted and ``features`` has at least ``min_rows`` rows.
+    """
+    psi = population_stability_index(reference, features)
+    rows = len(features)
+    threshold = max(psi_threshold, noise_psi_threshold(
+        reference['edges'].shape[1] + 1, rows, reference.get('rows', 0), significance
+    ))
+    drifted = np.flatnonzero(psi > threshold)
+    drifted_share = len(drifted) / max(len(psi), 1)
+
+    report = {
+        'psi': psi.tolist(),
+        'max_psi': float(psi.max()) if len(psi) else 0.0,
+        'psi_threshold': threshold,
+        'rows': rows,
+        'drifted_features': drifted.tolist(),
+        'drifted_share': drifted_share,
+        'drift': bool(rows >= min_rows and drifted_share > max_drifted_share)
+    }
+    if report['drift']:
+        logger.info(f"Feature drift detected: {len(drifted)} of {len(psi)} features above PSI {threshold:.3f}")
+    elif rows < min_rows and drifted_share > max_drifted_share:
+        logger.info(f"Ignoring apparent drift in {rows} rows (fewer than {min_rows})")
+    return report
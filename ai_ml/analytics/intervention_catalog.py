@@ -0,0 +1,346 @@
+"""
+Precompiled Intervention Catalog
+Addis Ababa AI School Management System
+
+Intervention data for the recommendation engine, compiled once per process:
+- Candidate interventions as parallel arrays (risk category, subject,
+  trigger and escalation thresholds, priority, expected improvement)
+  indexed by risk category
+- Effectiveness weights as a (program x context) matrix
+- Vectorized scoring and top-k selection for one student or a whole cohort
+- Optional JSON source file, recompiled when its modification time changes
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RISK_CATEGORIES = ['academic', 'behavioral', 'emotional', 'social', 'health']
+PRIORITY_POINTS = {'critical': 100, 'high': 80, 'medium': 60, 'low': 40}
+
+# Interventions are candidates when their category's risk score exceeds
+# ``trigger``; per-subject interventions become one candidate per subject
+# whose performance is below ``subject_threshold``. The priority rises to
+# 'high' above ``escalate_above``. ``effectiveness`` names a row of the
+# effectiveness matrix (and optionally its context column); the
+# per-subject context is the subject itself.
+DEFAULT_CATALOG_SOURCE = {
+    'subjects': ['math', 'science', 'language', 'social_studies'],
+    'interventions': [
+        {
+            'type': 'academic',
+            'intervention': 'Tutoring Program',
+            'per_subject': True,
+            'subject_threshold': 0.7,
+            'trigger': 0.5,
+            'escalate_above': 0.7,
+            'priority': 'medium',
+            'description': 'Subject-specific tutoring for {subject}',
+            'effectiveness': ['tutoring', None],
+            'expected_improvement': 0.15,
+            'duration': '8-12 weeks',
+            'frequency': '2-3 times per week',
+            'resources': ['subject tutor', 'materials', 'practice space']
+        },
+        {
+            'type': 'academic',
+            'subject': 'general',
+            'intervention': 'Study Skills Workshop',
+            'trigger': 0.6,
+            'priority': 'medium',
+            'description': 'Comprehensive study skills improvement',
+            'effectiveness': ['study_skills', 'overall'],
+            'expected_improvement': 0.10,
+            'duration': '4-6 weeks',
+            'frequency': 'Once per week',
+            'resources': ['study skills instructor', 'materials']
+        },
+        {
+            'type': 'behavioral',
+            'intervention': 'Behavior Modification Plan',
+            'trigger': 0.5,
+            'escalate_above': 0.7,
+            'priority': 'medium',
+            'description': 'Structured behavior improvement program',
+            'expected_improvement': 0.20,
+            'duration': '6-12 weeks',
+            'frequency': 'Daily monitoring',
+            'resources': ['behavioral specialist', 'monitoring tools', 'parent involvement']
+        },
+        {
+            'type': 'emotional',
+            'intervention': 'Counseling Services',
+            'trigger': 0.5,
+            'escalate_above': 0.7,
+            'priority': 'medium',
+            'description': 'Professional emotional support and guidance',
+            'effectiveness': ['counseling', 'emotional'],
+            'expected_improvement': 0.25,
+            'duration': 'Ongoing',
+            'frequency': 'Weekly',
+            'resources': ['school counselor', 'private space', 'parent communication']
+        },
+        {
+            'type': 'social',
+            'intervention': 'Social Skills Training',
+            'trigger': 0.5,
+            'priority': 'medium',
+            'description': 'Improve peer interaction and communication skills',
+            'expected_improvement': 0.15,
+            'duration': '6-8 weeks',
+            'frequency': 'Twice per week',
+            'resources': ['social skills instructor', 'group activities', 'peer mentors']
+        },
+        {
+            'type': 'health',
+            'intervention': 'Wellness Program',
+            'trigger': 0.5,
+            'priority': 'medium',
+            'description': 'Improve sleep, nutrition, and physical activity',
+            'expected_improvement': 0.12,
+            'duration': '8-10 weeks',
+            'frequency': 'Weekly sessions',
+            'resources': ['health educator', 'nutritionist', 'fitness instructor']
+        }
+    ],
+    'effectiveness': {
+        'tutoring': {'math': 0.18, 'science': 0.15, 'language': 0.12, 'overall': 0.15},
+        'study_skills': {'all_subjects': 0.10, 'overall': 0.10},
+        'counseling': {'emotional': 0.25, 'behavioral': 0.20, 'overall': 0.22}
+    },
+    'templates': {
+        'academic': [
+            {
+                'name': 'Tutoring Program',
+                'description': 'One-on-one or small group tutoring',
+                'duration': '8-12 weeks',
+                'frequency': '2-3 times per week',
+                'expected_improvement': 0.15,
+                'cost': 'medium',
+                'resources_required': ['tutor', 'materials', 'space']
+            },
+            {
+                'name': 'Study Skills Workshop',
+                'description': 'Comprehensive study skills training',
+                'duration': '4-6 weeks',
+                'frequency': 'Once per week',
+                'expected_improvement': 0.10,
+                'cost': 'low',
+                'resources_required': ['instructor', 'materials']
+            },
+            {
+                'name': 'Homework Support',
+                'description': 'Structured homework assistance program',
+                'duration': 'Ongoing',
+                'frequency': 'Daily',
+                'expected_improvement': 0.08,
+                'cost': 'low',
+                'resources_required': ['supervisor', 'space']
+            }
+        ],
+        'behavioral': [
+            {
+                'name': 'Behavior Modification Plan',
+                'description': 'Structured behavior improvement program',
+                'duration': '6-12 weeks',
+                'frequency': 'Daily monitoring',
+                'expected_improvement': 0.20,
+                'cost': 'medium',
+                'resources_required': ['behavioral specialist', 'monitoring tools']
+            }
+        ],
+        'emotional': [
+            {
+                'name': 'Counseling Services',
+                'description': 'Professional emotional support',
+                'duration': 'Ongoing',
+                'frequency': 'Weekly',
+                'expected_improvement': 0.25,
+                'cost': 'high',
+                'resources_required': ['counselor', 'private space']
+            }
+        ]
+    }
+}
+
+
+class InterventionCatalog:
+    """
+    Candidate interventions compiled into arrays for vectorized scoring.
+
+    Each candidate ("slot") is one intervention, or one intervention for one
+    subject when it is per-subject. Slots keep the catalog order, which is
+    also the tie-break order of the ranking.
+    """
+
+    def __init__(self, source: Dict[str, Any]):
+        self.source = source
+        self.subjects: List[str] = list(source.get('subjects', []))
+        self.templates: Dict[str, List[Dict[str, Any]]] = source.get('templates', {})
+        self.effectiveness: Dict[str, Dict[str, float]] = source.get('effectiveness', {})
+
+        # Effectiveness weights as a (program x context) matrix, NaN where unknown
+        self.programs = list(self.effectiveness)
+        self.contexts = sorted({context for weights in self.effectiveness.values() for context in weights})
+        self.effectiveness_matrix = np.full((len(self.programs), len(self.contexts)), np.nan)
+        for row, program in enumerate(self.programs):
+            for context, weight in self.effectiveness[program].items():
+                self.effectiveness_matrix[row, self.contexts.index(context)] = weight
+
+        slots = []
+        for entry in source.get('interventions', []):
+            subjects = list(enumerate(self.subjects)) if entry.get('per_subject') else [(-1, entry.get('subject'))]
+            for subject_index, subject in subjects:
+                slots.append(self._compile_slot(entry, subject_index, subject))
+
+        self.slot_records: List[Dict[str, Any]] = [record for record, _ in slots]
+        arrays = [values for _, values in slots]
+        self.slot_category = np.array([values[0] for values in arrays], dtype=np.int64)
+        self.slot_subject = np.array([values[1] for values in arrays], dtype=np.int64)
+        self.slot_trigger = np.array([values[2] for values in arrays], dtype=float)
+        self.slot_escalate = np.array([values[3] for values in arrays], dtype=float)
+        self.slot_subject_threshold = np.array([values[4] for values in arrays], dtype=float)
+        self.slot_priority_points = np.array([values[5] for values in arrays], dtype=float)
+        self.slot_improvement = np.array([values[6] for values in arrays], dtype=float)
+
+    def _compile_slot(self, entry: Dict[str, Any], subject_index: int,
+                      subject: Optional[str]) -> Tuple[Dict[str, Any], Tuple]:
+        """Output record and array values for one candidate."""
+        improvement = entry.get('expected_improvement', 0.0)
+        program, context = (entry.get('effectiveness') or [None, None])[:2]
+        context = subject if entry.get('per_subject') else context
+        weight = self.effectiveness_weight(program, context)
+        if weight is not None:
+            improvement = weight
+
+        record = {'type': entry['type']}
+        if subject is not None:
+            record['subject'] = subject
+        record.update({
+            'intervention': entry['intervention'],
+            'priority': entry.get('priority', 'medium'),
+            'description': entry['description'].format(subject=subject),
+            'expected_improvement': improvement,
+            'duration': entry.get('duration'),
+            'frequency': entry.get('frequency'),
+            'resources': list(entry.get('resources', []))
+        })
+
+        values = (
+            RISK_CATEGORIES.index(entry['type']),
+            subject_index,
+            entry.get('trigger', 0.5),
+            entry.get('escalate_above', np.inf),
+            entry.get('subject_threshold', np.inf),
+            PRIORITY_POINTS.get(record['priority'], PRIORITY_POINTS['low']),
+            improvement
+        )
+        return record, values
+
+    def effectiveness_weight(self, program: Optional[str], context: Optional[str]) -> Optional[float]:
+        """Effectiveness of ``program`` in ``context``, or None when unknown."""
+        if program not in self.programs or context not in self.contexts:
+            return None
+        weight = self.effectiveness_matrix[self.programs.index(program), self.contexts.index(context)]
+        return None if np.isnan(weight) else float(weight)
+
+    def __len__(self) -> int:
+        return len(self.slot_records)
+
+    def score(self, risk_scores: np.ndarray, subject_performance: np.ndarray,
+              preferred: np.ndarray, resources_available: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Priority scores of every candidate for every student.
+
+        ``risk_scores`` and ``preferred`` are (students x RISK_CATEGORIES),
+        ``subject_performance`` is (students x subjects) and
+        ``resources_available`` is per slot. Returns (scores, escalated),
+        both (students x slots), with -inf scores for ineligible candidates.
+        """
+        slot_risk = risk_scores[:, self.slot_category]
+        eligible = slot_risk > self.slot_trigger
+
+        has_subject = self.slot_subject >= 0
+        if has_subject.any():
+            slot_performance = subject_performance[:, np.maximum(self.slot_subject, 0)]
+            eligible &= ~has_subject | (slot_performance < self.slot_subject_threshold)
+
+        escalated = slot_risk > self.slot_escalate
+        scores = np.where(escalated, PRIORITY_POINTS['high'], self.slot_priority_points)
+        scores = scores + self.slot_improvement * 100
+        scores = scores + np.where(resources_available, 20, 0)
+        scores = scores + 15 * preferred[:, self.slot_category]
+        return np.where(eligible, scores, -np.inf), escalated
+
+    def top_k(self, scores: np.ndarray, k: Optional[int] = None) -> List[np.ndarray]:
+        """Eligible slot indices per student, best first (ties keep catalog order)."""
+        order = np.argsort(-scores, axis=1, kind='stable')
+        if k is not None:
+            order = order[:, :k]
+        ranked = np.take_along_axis(scores, order, axis=1)
+        return [row[np.isfinite(row_scores)] for row, row_scores in zip(order, ranked)]
+
+    def recommendation(self, slot: int, score: float, escalated: bool) -> Dict[str, Any]:
+        """Recommendation dict for one selected slot."""
+        record = dict(self.slot_records[slot])
+        record['resources'] = list(record['resources'])
+        if escalated:
+            record['priority'] = 'high'
+        record['priority_score'] = float(score)
+        return record
+
+
+_catalogs: Dict[Optional[str], Tuple[Optional[int], InterventionCatalog]] = {}
+_catalogs_lock = threading.Lock()
+
+
+def load_catalog(path: Optional[str] = None) -> InterventionCatalog:
+    """
+    The process-wide catalog for ``path`` (the built-in data when None).
+
+    Compiled once and reused; recompiled when the source file's
+    modification time changes. A source that fails to load keeps the
+    previous catalog.
+    """
+    mtime = None
+    if path:
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            logger.warning(f"Intervention catalog {path} not found; using built-in catalog")
+            path = None
+
+    cached = _catalogs.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    with _catalogs_lock:
+        cached = _catalogs.get(path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            if path:
+                with open(path) as f:
+                    source = json.load(f)
+            else:
+                source = DEFAULT_CATALOG_SOURCE
+            catalog = InterventionCatalog(source)
+        except Exception as e:
+            if cached is None:
+                raise
+            logger.error(f"Error reloading intervention catalog {path}, keeping previous version: {e}")
+            # Do not retry until the file changes again
+            _catalogs[path] = (mtime, cached[1])
+            return cached[1]
+
+        _catalogs[path] = (mtime, catalog)
+        if cached is not None:
+            logger.info(f"Reloaded intervention catalog {path}")
+        return catalog
@@ -0,0 +1,212 @@
+"""
+Prediction Result Cache
+Addis Ababa AI School Management System
+
+Caches prediction and risk results for unchanged inputs:
+- Keys are a stable hash of the prepared feature matrix (or of the raw
+  student frame for risk assessment) plus the model version, so a new
+  model version never serves results from an old one
+- Entries expire after a TTL and the cache is bounded in size (LRU)
+- Optional SQLite persistence so every worker on the host shares the cache
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def feature_hash(features: np.ndarray) -> str:
+    """Stable hash of a feature matrix's dtype, shape and values."""
+    array = np.ascontiguousarray(features)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    digest.update(array.tobytes())
+    return digest.hexdigest()
+
+
+def frame_hash(data: pd.DataFrame) -> str:
+    """Stable hash of a DataFrame's column names and values (the index is ignored)."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('\x1f'.join(map(str, data.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(kind: str, model_version: Optional[str], input_hash: str) -> str:
+    return f"{kind}:{model_version or 'unversioned'}:{input_hash}"
+
+
+class PredictionCache:
+    """In-memory LRU cache of prediction results with a TTL."""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: 'OrderedDict[str, tuple[float, str, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind: str, model_version: Optional[str], input_hash: str, default: Any = None) -> Any:
+        """Cached result, or ``default`` on a miss or an expired entry."""
+        key = cache_key(kind, model_version, input_hash)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            payload = entry[2]
+        return pickle.loads(payload)
+
+    def set(self, kind: str, model_version: Optional[str], input_hash: str, value: Any):
+        """Store a result; stored as a pickle so callers never share mutable results."""
+        key = cache_key(kind, model_version, input_hash)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttl_seconds, model_version or '', payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, model_version: Optional[str] = None):
+        """Drop every entry computed by ``model_version``, or every entry when None."""
+        with self._lock:
+            if model_version is None:
+                self._entries.clear()
+                return
+            for key in [key for key, entry in self._entries.items() if entry[1] == model_version]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+    def close(self):
+        """Release any resources held by the cache."""
+
+
+class SQLitePredictionCache(PredictionCache):
+    """
+    Prediction cache persisted to SQLite.
+
+    Every worker on the host opens the same file (WAL mode), so a result
+    computed by one worker is a hit for the others. Expired rows and rows
+    beyond ``max_entries`` (least recently used first) are pruned
+    periodically.
+    """
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl_seconds: float = 3600):
+        super().__init__(max_entries, ttl_seconds)
+        self.path = path
+        self._writes_since_prune = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS prediction_cache ('
+                'key TEXT PRIMARY KEY, model_version TEXT NOT NULL, '
+                'expires_at REAL NOT NULL, accessed_at REAL NOT NULL, value BLOB NOT NULL)'
+            )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS prediction_cache_accessed '
+                'ON prediction_cache (accessed_at)'
+            )
+
+    def get(self, kind: str, model_version: Optional[str], input_hash: str, default: Any = None) -> Any:
+        """Cached result, or ``default`` on a miss or an expired entry."""
+        key = cache_key(kind, model_version, input_hash)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT value FROM prediction_cache WHERE key = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            with self._connection:
+                self._connection.execute('UPDATE prediction_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, kind: str, model_version: Optional[str], input_hash: str, value: Any):
+        """Store a result for every worker sharing the cache file."""
+        key = cache_key(kind, model_version, input_hash)
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO prediction_cache (key, model_version, expires_at, accessed_at, value) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (key, model_version or '', now + self.ttl_seconds, now, sqlite3.Binary(payload))
+            )
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.PRUNE_EVERY:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        """Drop expired rows and the least recently used rows beyond ``max_entries``."""
+        self._connection.execute('DELETE FROM prediction_cache WHERE expires_at <= ?', (now,))
+        self._connection.execute(
+            'DELETE FROM prediction_cache WHERE key IN ('
+            ' SELECT key FROM prediction_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+            (self.max_entries,)
+        )
+        self._writes_since_prune = 0
+
+    def invalidate(self, model_version: Optional[str] = None):
+        """Drop every entry computed by ``model_version``, or every entry when None."""
+        with self._lock, self._connection:
+            if model_version is None:
+                self._connection.execute('DELETE FROM prediction_cache')
+            else:
+                self._connection.execute('DELETE FROM prediction_cache WHERE model_version = ?',
+                                         (model_version,))
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._lock:
+            stats['entries'] = self._connection.execute('SELECT COUNT(*) FROM prediction_cache').fetchone()[0]
+        stats['path'] = self.path
+        return stats
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def create_prediction_cache(path: Optional[str] = None, max_entries: int = 10000,
+                            ttl_seconds: float = 3600) -> PredictionCache:
+    """Create a cache shared through SQLite when a path is given, otherwise an in-memory one."""
+    if path:
+        return SQLitePredictionCache(path, max_entries=max_entries, ttl_seconds=ttl_seconds)
+    return PredictionCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
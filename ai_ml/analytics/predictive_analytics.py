@@ -29,6 +29,11 @@ from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
+from .prediction_cache import PredictionCache, feature_hash, frame_hash
+from .intervention_catalog import RISK_CATEGORIES, InterventionCatalog, load_catalog
+from .compiled_inference import CompiledTreeEnsemble, compile_model
+from .drift import drift_report, fit_drift_reference
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -52,6 +57,20 @@ class PredictionConfig:
     test_split: float = 0.1
     cross_validation_folds: int = 5
     
+    # Inference
+    use_compiled_inference: bool = True  # serve tree ensembles from compiled arrays when they pass parity
+    compiled_inference_max_rows: int = 256  # larger batches go through sklearn, which wins at scale
+    
+    # Incremental updates
+    replay_buffer_size: int = 5000  # training rows kept to mix into incremental updates
+    replay_ratio: float = 1.0  # replayed rows per new row in an update
+    incremental_estimators: int = 10  # trees added per warm-start update
+    max_estimators: int = 200  # forests drop their oldest trees beyond this; boosting retrains instead
+    drift_psi_threshold: float = 0.2
+    drift_max_share: float = 0.1  # share of drifted features that forces a full retrain
+    drift_min_rows: int = 50  # smaller batches of new records never count as drifted
+    drift_score_drop: float = 0.05  # drop in model score on new records that forces a full retrain
+    
     # Risk assessment
     risk_categories: List[str] = None
     intervention_thresholds: Dict[str, float] = None
@@ -70,12 +89,20 @@ class PredictionConfig:
 class EducationalPredictor:
     """Base class for educational prediction models."""
     
+    # Fitted state saved alongside the model when a subclass has it
+    SAVED_ATTRIBUTES = (
+        'feature_pipeline', 'label_encoder', 'scaler', 'compiled_model',
+        'replay_features', 'replay_targets', 'replay_seen', 'drift_reference', 'validation_score'
+    )
+    
     def __init__(self, config: PredictionConfig):
         self.config = config
         self.model = None
         self.scaler = StandardScaler()
         self.feature_names = []
         self.is_trained = False
+        self.model_version = None  # set on training; keys cached predictions
+        self.prediction_cache: Optional[PredictionCache] = None
         
     def prepare_features(self, data: pd.DataFrame) -> np.ndarray:
         """Prepare features for prediction."""
@@ -95,6 +122,22 @@ class EducationalPredictor:
         """Evaluate model performance."""
         raise NotImplementedError("Subclasses must implement evaluate")
     
+    def _new_model_version(self) -> str:
+        """Version identifier for a freshly trained model."""
+        return f"{self.config.model_type}-{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+    
+    def _cached(self, kind: str, features: np.ndarray, compute) -> Any:
+        """Result of ``compute()``, served from the prediction cache when the features were seen before."""
+        if self.prediction_cache is None:
+            return compute()
+        
+        input_hash = feature_hash(features)
+        result = self.prediction_cache.get(kind, self.model_version, input_hash)
+        if result is None:
+            result = compute()
+            self.prediction_cache.set(kind, self.model_version, input_hash, result)
+        return result
+    
     def save_model(self, filepath: str):
         """Save the trained model."""
         if not self.is_trained:
@@ -103,28 +146,236 @@ class EducationalPredictor:
         model_data = {
             'config': asdict(self.config),
             'feature_names': self.feature_names,
-            'is_trained': self.is_trained
+            'is_trained': self.is_trained,
+            'model_version': self.model_version
         }
         
         # Save model-specific data
         if hasattr(self, 'model'):
             model_data['model'] = self.model
         
+        # Save fitted preprocessing so inference applies exactly what training used
+        for attribute in self.SAVED_ATTRIBUTES:
+            if hasattr(self, attribute):
+                model_data[attribute] = getattr(self, attribute)
+        
         joblib.dump(model_data, filepath)
         logger.info(f"Model saved to {filepath}")
     
     def load_model(self, filepath: str):
         """Load a trained model."""
-        model_data = joblib.load(filepath)
-        
+        self._restore(joblib.load(filepath))
+        logger.info(f"Model loaded from {filepath}")
+    
+    def _restore(self, model_data: Dict[str, Any]):
+        """Restore state from the dictionary written by ``save_model``."""
         self.config = PredictionConfig(**model_data['config'])
         self.feature_names = model_data['feature_names']
         self.is_trained = model_data['is_trained']
+        self.model_version = model_data.get('model_version')
         
         if 'model' in model_data:
             self.model = model_data['model']
         
+        for attribute in self.SAVED_ATTRIBUTES:
+            if attribute in model_data:
+                setattr(self, attribute, model_data[attribute])
+
+    @classmethod
+    def from_file(cls, filepath: str) -> 'EducationalPredictor':
+        """Create a predictor from a file written by ``save_model``."""
+        model_data = joblib.load(filepath)
+        predictor = cls(PredictionConfig(**model_data['config']))
+        predictor._restore(model_data)
         logger.info(f"Model loaded from {filepath}")
+        return predictor
+
+class StudentFeaturePipeline:
+    """
+    Fitted, serializable feature preparation for performance prediction.
+    
+    ``fit`` learns everything that depends on training data (available base
+    columns, categorical codes, imputation values, output column order and
+    scaler statistics). ``transform`` then applies it as a vectorized
+    transform that reads only the columns it needs and never modifies the
+    caller's frame. Rolling/diff features are computed per ``group_column``
+    when one is given, so many students can be transformed in one call.
+    """
+    
+    BASE_FEATURES = [
+        'study_time', 'attendance_rate', 'previous_grades', 'homework_completion',
+        'participation_rate', 'test_scores', 'assignment_scores', 'class_engagement',
+        'peer_interaction', 'teacher_feedback', 'family_support', 'learning_environment',
+        'health_status', 'sleep_hours', 'nutrition_quality', 'stress_level',
+        'motivation_level', 'learning_style', 'cognitive_ability', 'emotional_state'
+    ]
+    TEMPORAL_FEATURES = [
+        'hour_of_day', 'day_of_week', 'month', 'quarter',
+        'is_weekend', 'is_morning', 'is_afternoon', 'is_evening'
+    ]
+    
+    def __init__(self, use_derived_features: bool = True, use_interaction_features: bool = True,
+                 use_temporal_features: bool = True):
+        self.use_derived_features = use_derived_features
+        self.use_interaction_features = use_interaction_features
+        self.use_temporal_features = use_temporal_features
+        
+        self.base_columns = []
+        self.categories = {}  # column -> {category: code}
+        self.fill_values = {}
+        self.output_columns = []
+        self.include_temporal = False
+        self.mean_ = None
+        self.scale_ = None
+        self.is_fitted = False
+    
+    def _base_arrays(self, data: pd.DataFrame, impute: bool = True) -> Dict[str, np.ndarray]:
+        """Read the base columns as float arrays, encoding categoricals and filling gaps."""
+        arrays = {}
+        for col in self.base_columns:
+            if col not in data.columns:
+                values = np.full(len(data), np.nan)
+            elif col in self.categories:
+                values = data[col].astype(str).map(self.categories[col]).to_numpy(dtype=float)
+            else:
+                values = pd.to_numeric(data[col], errors='coerce').to_numpy(dtype=float)
+            
+            if impute:
+                values = np.where(np.isnan(values), self.fill_values[col], values)
+            arrays[col] = values
+        return arrays
+    
+    @staticmethod
+    def _diff(values: np.ndarray, groups: Optional[np.ndarray]) -> np.ndarray:
+        series = pd.Series(values)
+        if groups is None:
+            return series.diff().to_numpy()
+        return series.groupby(groups, sort=False).diff().to_numpy()
+    
+    @staticmethod
+    def _rolling_std(values: np.ndarray, groups: Optional[np.ndarray], window: int) -> np.ndarray:
+        series = pd.Series(values)
+        if groups is None:
+            return series.rolling(window=window).std().to_numpy()
+        rolled = series.groupby(groups, sort=False).rolling(window=window).std()
+        return rolled.reset_index(level=0, drop=True).sort_index().to_numpy()
+    
+    def _engineered_arrays(self, data: pd.DataFrame, base: Dict[str, np.ndarray],
+                           groups: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        """Derived, interaction and temporal features from the imputed base columns."""
+        engineered = {}
+        
+        def has(*columns):
+            return all(col in base for col in columns)
+        
+        # Derived features
+        if self.use_derived_features:
+            if has('previous_grades'):
+                engineered['grade_trend'] = self._diff(base['previous_grades'], groups)
+                engineered['grade_volatility'] = self._rolling_std(base['previous_grades'], groups, 3)
+            if has('test_scores', 'assignment_scores'):
+                engineered['score_consistency'] = np.abs(base['test_scores'] - base['assignment_scores'])
+            if has('study_time', 'previous_grades'):
+                engineered['study_efficiency'] = base['previous_grades'] / (base['study_time'] + 1)
+            if has('study_time'):
+                engineered['study_consistency'] = self._rolling_std(base['study_time'], groups, 7)
+            if has('participation_rate', 'class_engagement'):
+                engineered['overall_engagement'] = (base['participation_rate'] + base['class_engagement']) / 2
+            if has('sleep_hours', 'stress_level'):
+                engineered['wellness_score'] = (base['sleep_hours'] / 8) * (1 - base['stress_level'])
+        
+        # Interaction features
+        if self.use_interaction_features:
+            if has('study_time', 'attendance_rate'):
+                engineered['study_attendance_interaction'] = base['study_time'] * base['attendance_rate']
+            if has('study_time', 'previous_grades'):
+                engineered['study_grade_interaction'] = base['study_time'] * base['previous_grades']
+            if has('participation_rate', 'peer_interaction'):
+                engineered['social_engagement'] = base['participation_rate'] * base['peer_interaction']
+            if has('family_support', 'teacher_feedback'):
+                engineered['support_network'] = base['family_support'] * base['teacher_feedback']
+        
+        # Temporal features
+        if self.include_temporal:
+            if 'timestamp' in data.columns:
+                timestamps = pd.DatetimeIndex(pd.to_datetime(data['timestamp'], errors='coerce'))
+                hour = timestamps.hour.to_numpy(dtype=float)
+                day_of_week = timestamps.dayofweek.to_numpy(dtype=float)
+                engineered['hour_of_day'] = hour
+                engineered['day_of_week'] = day_of_week
+                engineered['month'] = timestamps.month.to_numpy(dtype=float)
+                engineered['quarter'] = timestamps.quarter.to_numpy(dtype=float)
+                engineered['is_weekend'] = np.where(np.isnan(day_of_week), np.nan, day_of_week >= 5)
+                engineered['is_morning'] = np.where(np.isnan(hour), np.nan, (hour >= 6) & (hour <= 12))
+                engineered['is_afternoon'] = np.where(np.isnan(hour), np.nan, (hour >= 12) & (hour <= 18))
+                engineered['is_evening'] = np.where(np.isnan(hour), np.nan, (hour >= 18) & (hour <= 22))
+            else:
+                for col in self.TEMPORAL_FEATURES:
+                    engineered[col] = np.full(len(data), np.nan)
+        
+        return engineered
+    
+    def fit(self, data: pd.DataFrame, group_column: Optional[str] = None) -> 'StudentFeaturePipeline':
+        """Learn columns, categorical codes, imputation values and scaling from training data."""
+        self.base_columns = [col for col in self.BASE_FEATURES if col in data.columns]
+        self.include_temporal = self.use_temporal_features and 'timestamp' in data.columns
+        
+        # Categorical codes and base imputation values (median for numeric, mode for categorical)
+        self.categories = {}
+        self.fill_values = {}
+        for col in self.base_columns:
+            if not pd.api.types.is_numeric_dtype(data[col]):
+                values = data[col].dropna().astype(str)
+                self.categories[col] = {category: code for code, category in enumerate(sorted(values.unique()))}
+                mode = values.mode()
+                self.fill_values[col] = float(self.categories[col][mode.iloc[0]]) if len(mode) else 0.0
+            else:
+                median = data[col].median()
+                self.fill_values[col] = float(median) if pd.notna(median) else 0.0
+        
+        groups = data[group_column].to_numpy() if group_column else None
+        base = self._base_arrays(data)
+        engineered = self._engineered_arrays(data, base, groups)
+        for col, values in engineered.items():
+            median = np.nanmedian(values) if np.isfinite(values).any() else 0.0
+            self.fill_values[col] = float(median)
+        
+        self.output_columns = self.base_columns + list(engineered.keys())
+        matrix = self._assemble(base, engineered, len(data))
+        
+        self.mean_ = matrix.mean(axis=0)
+        scale = matrix.std(axis=0)
+        self.scale_ = np.where(scale > 0, scale, 1.0)
+        self.is_fitted = True
+        return self
+    
+    def _assemble(self, base: Dict[str, np.ndarray], engineered: Dict[str, np.ndarray], num_rows: int) -> np.ndarray:
+        """Stack columns in output order, filling engineered gaps with their fitted values."""
+        matrix = np.empty((num_rows, len(self.output_columns)))
+        for idx, col in enumerate(self.output_columns):
+            values = base[col] if col in base else engineered[col]
+            if col in engineered:
+                values = np.where(np.isfinite(values), values, self.fill_values[col])
+            matrix[:, idx] = values
+        return matrix
+    
+    def transform(self, data: pd.DataFrame, group_column: Optional[str] = None) -> np.ndarray:
+        """Apply the fitted preparation; returns the scaled (rows x output_columns) matrix."""
+        if not self.is_fitted:
+            raise ValueError("Feature pipeline must be fitted before transform")
+        
+        groups = data[group_column].to_numpy() if group_column else None
+        base = self._base_arrays(data)
+        engineered = self._engineered_arrays(data, base, groups)
+        matrix = self._assemble(base, engineered, len(data))
+        
+        matrix -= self.mean_
+        matrix /= self.scale_
+        return matrix
+    
+    def fit_transform(self, data: pd.DataFrame, group_column: Optional[str] = None) -> np.ndarray:
+        """Fit on data and return its transformed matrix."""
+        return self.fit(data, group_column).transform(data, group_column)
 
 class StudentPerformancePredictor(EducationalPredictor):
     """Predictor for student academic performance."""
@@ -132,112 +383,39 @@ class StudentPerformancePredictor(EducationalPredictor):
     def __init__(self, config: PredictionConfig):
         super().__init__(config)
         self.label_encoder = LabelEncoder()
+        self.feature_pipeline = StudentFeaturePipeline(
+            use_derived_features=config.use_derived_features,
+            use_interaction_features=config.use_interaction_features,
+            use_temporal_features=config.use_temporal_features
+        )
+        self.compiled_model: Optional[CompiledTreeEnsemble] = None
+        
+        # State for incremental updates (see ``update``)
+        self.replay_features: Optional[np.ndarray] = None
+        self.replay_targets: Optional[np.ndarray] = None
+        self.replay_seen = 0
+        self.drift_reference: Optional[Dict[str, Any]] = None
+        self.validation_score: Optional[float] = None
+        
+    def prepare_features(self, data: pd.DataFrame, fit: bool = False,
+                         group_column: Optional[str] = None) -> np.ndarray:
+        """
+        Prepare features for performance prediction.
+        
+        The feature pipeline is fitted only when ``fit`` is True, i.e. on
+        training data; otherwise the fitted pipeline is applied.
+        """
+        if fit:
+            logger.info("Fitting feature pipeline for performance prediction...")
+            features = self.feature_pipeline.fit_transform(data, group_column)
+            self.feature_names = list(self.feature_pipeline.output_columns)
+        elif self.is_trained and not self.feature_pipeline.is_fitted:
+            raise ValueError("Model has no fitted feature pipeline (saved before it was introduced); retrain it")
+        else:
+            features = self.feature_pipeline.transform(data, group_column)
         
-    def prepare_features(self, data: pd.DataFrame) -> np.ndarray:
-        """Prepare features for performance prediction."""
-        logger.info("Preparing features for performance prediction...")
-        
-        # Select relevant features
-        feature_columns = [
-            'study_time', 'attendance_rate', 'previous_grades', 'homework_completion',
-            'participation_rate', 'test_scores', 'assignment_scores', 'class_engagement',
-            'peer_interaction', 'teacher_feedback', 'family_support', 'learning_environment',
-            'health_status', 'sleep_hours', 'nutrition_quality', 'stress_level',
-            'motivation_level', 'learning_style', 'cognitive_ability', 'emotional_state'
-        ]
-        
-        # Filter available columns
-        available_features = [col for col in feature_columns if col in data.columns]
-        self.feature_names = available_features
-        
-        # Handle missing values
-        for col in available_features:
-            if data[col].dtype in ['int64', 'float64']:
-                data[col] = data[col].fillna(data[col].median())
-            else:
-                data[col] = data[col].fillna(data[col].mode()[0])
-        
-        # Create derived features
-        if self.config.use_derived_features:
-            data = self._create_derived_features(data, available_features)
-        
-        # Create interaction features
-        if self.config.use_interaction_features:
-            data = self._create_interaction_features(data, available_features)
-        
-        # Create temporal features
-        if self.config.use_temporal_features and 'timestamp' in data.columns:
-            data = self._create_temporal_features(data)
-        
-        # Prepare final feature matrix
-        features = data[available_features].values
-        
-        # Scale features
-        features = self.scaler.fit_transform(features)
-        
-        logger.info(f"Feature preparation complete. Shape: {features.shape}")
         return features
     
-    def _create_derived_features(self, data: pd.DataFrame, base_features: List[str]) -> pd.DataFrame:
-        """Create derived features for performance prediction."""
-        # Academic performance indicators
-        if 'previous_grades' in base_features:
-            data['grade_trend'] = data['previous_grades'].diff()
-            data['grade_volatility'] = data['previous_grades'].rolling(window=3).std()
-        
-        if 'test_scores' in base_features and 'assignment_scores' in base_features:
-            data['score_consistency'] = abs(data['test_scores'] - data['assignment_scores'])
-        
-        # Study behavior indicators
-        if 'study_time' in base_features:
-            data['study_efficiency'] = data['previous_grades'] / (data['study_time'] + 1)
-            data['study_consistency'] = data['study_time'].rolling(window=7).std()
-        
-        # Engagement indicators
-        if 'participation_rate' in base_features and 'class_engagement' in base_features:
-            data['overall_engagement'] = (data['participation_rate'] + data['class_engagement']) / 2
-        
-        # Health and wellness indicators
-        if 'sleep_hours' in base_features and 'stress_level' in base_features:
-            data['wellness_score'] = (data['sleep_hours'] / 8) * (1 - data['stress_level'])
-        
-        return data
-    
-    def _create_interaction_features(self, data: pd.DataFrame, base_features: List[str]) -> pd.DataFrame:
-        """Create interaction features between important variables."""
-        # Study time interactions
-        if 'study_time' in base_features and 'attendance_rate' in base_features:
-            data['study_attendance_interaction'] = data['study_time'] * data['attendance_rate']
-        
-        if 'study_time' in base_features and 'previous_grades' in base_features:
-            data['study_grade_interaction'] = data['study_time'] * data['previous_grades']
-        
-        # Engagement interactions
-        if 'participation_rate' in base_features and 'peer_interaction' in base_features:
-            data['social_engagement'] = data['participation_rate'] * data['peer_interaction']
-        
-        # Support interactions
-        if 'family_support' in base_features and 'teacher_feedback' in base_features:
-            data['support_network'] = data['family_support'] * data['teacher_feedback']
-        
-        return data
-    
-    def _create_temporal_features(self, data: pd.DataFrame) -> pd.DataFrame:
-        """Create temporal features from timestamp data."""
-        data['timestamp'] = pd.to_datetime(data['timestamp'])
-        
-        # Time-based features
-        data['hour_of_day'] = data['timestamp'].dt.hour
-        data['day_of_week'] = data['timestamp'].dt.dayofweek
-        data['month'] = data['timestamp'].dt.month
-        data['quarter'] = data['timestamp'].dt.quarter
-        data['is_weekend'] = data['day_of_week'].isin([5, 6]).astype(int)
-        data['is_morning'] = data['hour_of_day'].between(6, 12).astype(int)
-        data['is_afternoon'] = data['hour_of_day'].between(12, 18).astype(int)
-        data['is_evening'] = data['hour_of_day'].between(18, 22).astype(int)
-        
-        return data
-    
     def train(self, features: np.ndarray, targets: np.ndarray) -> Dict[str, float]:
         """Train the performance prediction model."""
         logger.info("Training performance prediction model...")
@@ -275,6 +453,14 @@ class StudentPerformancePredictor(EducationalPredictor):
         cv_scores = cross_val_score(self.model, features, targets, cv=self.config.cross_validation_folds)
         
         self.is_trained = True
+        self.model_version = self._new_model_version()
+        self.compile_inference(X_val)
+        
+        # Reference data for later incremental updates
+        self.validation_score = float(self.model.score(X_val, y_val))
+        self.drift_reference = fit_drift_reference(features)
+        self.replay_features, self.replay_targets, self.replay_seen = None, None, 0
+        self._update_replay_buffer(features, targets)
         
         metrics = {
             'validation_accuracy': val_accuracy,
@@ -287,19 +473,184 @@ class StudentPerformancePredictor(EducationalPredictor):
         logger.info(f"Training complete. Validation accuracy: {val_accuracy:.4f}")
         return metrics
     
+    def update(self, features: np.ndarray, targets: np.ndarray,
+               full_data: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Update the trained model with new records instead of retraining it.
+        
+        The new rows are mixed with a replay sample of earlier training rows.
+        Models with ``partial_fit`` are updated in place; forests and boosting
+        models grow ``incremental_estimators`` trees fitted on that mix
+        (warm start); logistic regression refits starting from its current
+        coefficients.
+        
+        A full retrain is warranted when the new features have drifted, the
+        model scores noticeably worse on the new records than it did at
+        validation (beyond sampling noise, and only for batches of at least
+        ``drift_min_rows``), or the model cannot absorb them (new classes, boosting
+        at ``max_estimators``). It then trains on ``full_data`` (e.g. the
+        complete history including the new records) when given; otherwise
+        the model is left unchanged and the result says a retrain is required.
+        """
+        if not self.is_trained:
+            return {'mode': 'full_retrain', **self.train(features, targets)}
+        
+        logger.info(f"Updating performance prediction model with {len(features)} new records...")
+        targets = np.asarray(targets)
+        reasons = []
+        
+        if targets.dtype == 'object':
+            if hasattr(self.label_encoder, 'classes_') and set(targets) <= set(self.label_encoder.classes_):
+                targets = self.label_encoder.transform(targets)
+            else:
+                reasons.append('new target classes')
+        
+        drift = None
+        if not reasons and self.drift_reference is not None:
+            drift = drift_report(self.drift_reference, features, self.config.drift_psi_threshold,
+                                 self.config.drift_max_share, self.config.drift_min_rows)
+            if drift['drift']:
+                reasons.append('feature drift')
+        
+        score_before = None
+        if not reasons:
+            score_before = float(self.model.score(features, targets))
+            if self.validation_score is not None and len(features) >= self.config.drift_min_rows:
+                # Accuracy on n new rows is binomial; drops within two standard errors are noise
+                noise = 2 * np.sqrt(self.validation_score * (1 - self.validation_score) / len(features))
+                if self.validation_score - score_before > max(self.config.drift_score_drop, noise):
+                    reasons.append('score drop on new records')
+        
+        if not reasons:
+            X_mix, y_mix = self._replay_mix(features, targets)
+            mode = self._warm_start(X_mix, y_mix)
+            if mode is None:
+                reasons.append('model cannot absorb the new records')
+        
+        if reasons:
+            logger.info(f"Full retrain warranted: {', '.join(reasons)}")
+            if full_data is None:
+                return {'mode': 'full_retrain_required', 'reasons': reasons, 'drift': drift}
+            return {'mode': 'full_retrain', 'reasons': reasons, 'drift': drift, **self.train(*full_data)}
+        
+        self.model_version = self._new_model_version()
+        self.compile_inference(features)
+        self._update_replay_buffer(features, targets)
+        
+        result = {
+            'mode': mode,
+            'new_samples': len(features),
+            'replay_samples': len(X_mix) - len(features),
+            'score_before': score_before,
+            'score_after': float(self.model.score(features, targets)),
+            'drift': drift
+        }
+        logger.info(f"Incremental update complete ({mode}). Score on new records: "
+                    f"{score_before:.4f} -> {result['score_after']:.4f}")
+        return result
+    
+    def _replay_mix(self, features: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """New rows plus up to ``replay_ratio`` times as many rows from the replay buffer."""
+        if self.replay_features is None or not len(self.replay_features):
+            return features, targets
+        
+        count = min(len(self.replay_features), int(round(self.config.replay_ratio * len(features))))
+        rows = np.random.default_rng().choice(len(self.replay_features), count, replace=False)
+        return (np.concatenate([features, self.replay_features[rows]]),
+                np.concatenate([targets, self.replay_targets[rows]]))
+    
+    def _update_replay_buffer(self, features: np.ndarray, targets: np.ndarray):
+        """Reservoir-sample training rows so the buffer stays a uniform sample of everything seen."""
+        size = self.config.replay_buffer_size
+        features, targets = np.asarray(features), np.asarray(targets)
+        if self.replay_features is None:
+            self.replay_features = features[:0].copy()
+            self.replay_targets = targets[:0].copy()
+        
+        # Fill the free slots first
+        free = max(0, size - len(self.replay_features))
+        self.replay_features = np.concatenate([self.replay_features, features[:free]])
+        self.replay_targets = np.concatenate([self.replay_targets, targets[:free]])
+        
+        # Row i of the rest replaces a random slot with probability size / (rows seen so far)
+        remaining = np.arange(free, len(features))
+        if len(remaining):
+            seen = self.replay_seen + remaining + 1
+            slots = np.random.default_rng().integers(0, seen)
+            keep = slots < size
+            self.replay_features[slots[keep]] = features[remaining[keep]]
+            self.replay_targets[slots[keep]] = targets[remaining[keep]]
+        self.replay_seen += len(features)
+    
+    def _warm_start(self, features: np.ndarray, targets: np.ndarray) -> Optional[str]:
+        """Fit the current model further on ``features``; None if it cannot be updated in place."""
+        model = self.model
+        if hasattr(model, 'classes_') and not np.array_equal(np.unique(targets), model.classes_):
+            return None  # warm-started classifiers need the same classes
+        
+        if hasattr(model, 'partial_fit'):
+            model.partial_fit(features, targets)
+            return 'partial_fit'
+        
+        if isinstance(model, (RandomForestClassifier, GradientBoostingRegressor)):
+            total = model.n_estimators + self.config.incremental_estimators
+            if isinstance(model, GradientBoostingRegressor) and total > self.config.max_estimators:
+                return None  # boosting stages cannot be dropped
+            model.set_params(warm_start=True, n_estimators=total)
+            model.fit(features, targets)
+            if isinstance(model, RandomForestClassifier) and total > self.config.max_estimators:
+                # Forest trees are independent, so the oldest ones can go
+                model.estimators_ = model.estimators_[-self.config.max_estimators:]
+                model.set_params(n_estimators=len(model.estimators_))
+            return 'warm_start'
+        
+        if isinstance(model, LogisticRegression):
+            model.set_params(warm_start=True)
+            model.fit(features, targets)
+            return 'warm_start'
+        
+        return None
+    
     def predict(self, features: np.ndarray) -> np.ndarray:
         """Predict student performance."""
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        # Scale features
-        features_scaled = self.scaler.transform(features)
-        
-        # Make predictions
-        predictions = self.model.predict(features_scaled)
+        return self._cached('predict', features, lambda: self._predict(features))
+    
+    def compile_inference(self, parity_features: Optional[np.ndarray] = None) -> bool:
+        """
+        Compile the trained tree ensemble for array-based inference.
+        
+        The compiled model is used only if it matches sklearn on
+        ``parity_features`` (e.g. the validation set) and on probe rows;
+        otherwise predictions keep going through sklearn.
+        """
+        self.compiled_model = None
+        if self.is_trained and self.config.use_compiled_inference:
+            self.compiled_model = compile_model(self.model, parity_features)
+        return self.compiled_model is not None
+    
+    def _restore(self, model_data: Dict[str, Any]):
+        super()._restore(model_data)
+        if 'compiled_model' not in model_data:
+            # Saved before compiled inference; compile against probe rows
+            self.compile_inference()
+    
+    def _inference_model(self, features: np.ndarray):
+        # Compiled arrays avoid sklearn's per-call overhead, which dominates
+        # small batches; sklearn's native traversal is faster on large ones
+        max_rows = getattr(self.config, 'compiled_inference_max_rows', 256)
+        if self.compiled_model is not None and len(features) <= max_rows:
+            return self.compiled_model
+        return self.model
+    
+    def _predict(self, features: np.ndarray) -> np.ndarray:
+        # Features are already scaled by the feature pipeline
+        predictions = self._inference_model(features).predict(features)
         
-        # Decode predictions if using label encoder
-        if hasattr(self, 'label_encoder') and hasattr(self.label_encoder, 'inverse_transform'):
+        # Decode predictions if targets were label encoded
+        if hasattr(self.label_encoder, 'classes_'):
             predictions = self.label_encoder.inverse_transform(predictions)
         
         return predictions
@@ -309,15 +660,15 @@ class StudentPerformancePredictor(EducationalPredictor):
         if not self.is_trained:
             raise ValueError("Model must be trained before making predictions")
         
-        # Scale features
-        features_scaled = self.scaler.transform(features)
-        
-        # Get probabilities
+        return self._cached('predict_proba', features, lambda: self._predict_proba(features))
+    
+    def _predict_proba(self, features: np.ndarray) -> np.ndarray:
+        # Get probabilities (features are already scaled by the feature pipeline)
         if hasattr(self.model, 'predict_proba'):
-            probabilities = self.model.predict_proba(features_scaled)
+            probabilities = self._inference_model(features).predict_proba(features)
         else:
             # For models without predict_proba, create dummy probabilities
-            predictions = self.model.predict(features_scaled)
+            predictions = self._inference_model(features).predict(features)
             probabilities = np.zeros((len(predictions), len(np.unique(predictions))))
             for i, pred in enumerate(predictions):
                 probabilities[i, pred] = 1.0
@@ -407,14 +758,30 @@ class StudentPerformancePredictor(EducationalPredictor):
 class RiskAssessmentEngine:
     """Engine for assessing student risk levels and generating early warnings."""
     
+    # Bump when the risk rules change so cached assessments are not reused
+    MODEL_VERSION = 'risk-rules-v1'
+    
     def __init__(self, config: PredictionConfig):
         self.config = config
         self.risk_models = {}
         self.risk_thresholds = config.intervention_thresholds
+        self.prediction_cache: Optional[PredictionCache] = None
         
     def assess_student_risk(self, student_data: pd.DataFrame, 
                            performance_predictor: StudentPerformancePredictor) -> Dict[str, Any]:
-        """Assess comprehensive risk for a student."""
+        """Assess comprehensive risk for a student (cached by input data when a cache is attached)."""
+        if self.prediction_cache is None:
+            return self._assess_student_risk(student_data, performance_predictor)
+        
+        input_hash = frame_hash(student_data)
+        risk_assessment = self.prediction_cache.get('risk', self.MODEL_VERSION, input_hash)
+        if risk_assessment is None:
+            risk_assessment = self._assess_student_risk(student_data, performance_predictor)
+            self.prediction_cache.set('risk', self.MODEL_VERSION, input_hash, risk_assessment)
+        return risk_assessment
+    
+    def _assess_student_risk(self, student_data: pd.DataFrame,
+                             performance_predictor: StudentPerformancePredictor) -> Dict[str, Any]:
         logger.info("Assessing student risk levels...")
         
         risk_assessment = {
@@ -437,6 +804,215 @@ class RiskAssessmentEngine:
         
         return risk_assessment
     
+    # Indicators of each risk component, in the order of the per-student assessment
+    RISK_COMPONENTS = {
+        'academic_risk': ['grade_decline', 'attendance_issues', 'homework_completion',
+                          'test_performance', 'study_habits'],
+        'behavioral_risk': ['classroom_disruption', 'peer_conflicts', 'rule_violations', 'attention_issues'],
+        'emotional_risk': ['stress_level', 'anxiety_signs', 'mood_instability', 'self_esteem'],
+        'social_risk': ['peer_isolation', 'communication_issues', 'group_participation'],
+        'health_risk': ['sleep_quality', 'nutrition_issues', 'physical_activity'],
+    }
+    RISK_WEIGHTS = {'academic_risk': 0.4, 'behavioral_risk': 0.2, 'emotional_risk': 0.2,
+                    'social_risk': 0.1, 'health_risk': 0.1}
+    
+    def assess_cohort_risk(self, data: pd.DataFrame, student_column: str = 'student_id') -> pd.DataFrame:
+        """
+        Risk indicators for many students from one long-format frame.
+        
+        Every indicator is a grouped aggregation over ``student_column``, so
+        the whole cohort is scored in a handful of columnar passes. Returns
+        one row per student (in order of first appearance) with
+        (component, indicator) columns, each component's ``overall_score``,
+        and ``overall_risk``/``risk_category``; values match
+        ``assess_student_risk`` on each student's rows.
+        """
+        grouped = data.groupby(student_column, sort=False)
+        students = pd.Index(grouped.size().index, name=student_column)
+        zeros = np.zeros(len(students))
+        
+        def mean_of(column):
+            if column not in data.columns:
+                return None
+            return grouped[column].mean().reindex(students).to_numpy(dtype=float)
+        
+        def shortfall(column, target, divisor=1.0):
+            # max(0, target - mean) / divisor, with a missing column or all-NaN mean scoring 0
+            mean = mean_of(column)
+            if mean is None:
+                return zeros
+            return np.nan_to_num(np.maximum(0.0, target - mean)) / divisor
+        
+        indicators = {}
+        
+        # Academic: grade decline is the negated least-squares slope of each
+        # student's non-null grades against their position
+        grade_decline = zeros
+        if 'previous_grades' in data.columns:
+            grades = data[[student_column, 'previous_grades']].dropna(subset=['previous_grades'])
+            grades = grades.assign(position=grades.groupby(student_column, sort=False).cumcount().astype(float))
+            stats = grades.groupby(student_column, sort=False).agg(
+                n=('position', 'size'), x=('position', 'mean'), y=('previous_grades', 'mean')
+            )
+            grades = grades.join(stats, on=student_column)
+            grades['xy'] = (grades['position'] - grades['x']) * (grades['previous_grades'] - grades['y'])
+            covariance = grades.groupby(student_column, sort=False)['xy'].sum().reindex(students)
+            n = stats['n'].reindex(students).fillna(0).to_numpy(dtype=float)
+            # Positions are 0..n-1, so sum((x - mean(x))^2) = n(n^2 - 1)/12
+            variance = np.where(n > 1, n * (n ** 2 - 1) / 12, 1.0)
+            slope = covariance.fillna(0).to_numpy(dtype=float) / variance
+            grade_decline = np.where(n > 1, np.maximum(0.0, -slope) / 10, 0.0)
+        
+        indicators[('academic_risk', 'grade_decline')] = grade_decline
+        indicators[('academic_risk', 'attendance_issues')] = shortfall('attendance_rate', 0.8)
+        indicators[('academic_risk', 'homework_completion')] = shortfall('homework_completion', 0.8)
+        indicators[('academic_risk', 'test_performance')] = shortfall('test_scores', 0.7)
+        indicators[('academic_risk', 'study_habits')] = shortfall('study_time', 2, 5)
+        
+        # Behavioral: placeholders until monitoring data is available
+        for indicator in self.RISK_COMPONENTS['behavioral_risk']:
+            indicators[('behavioral_risk', indicator)] = zeros
+        
+        # Emotional
+        stress = mean_of('stress_level')
+        indicators[('emotional_risk', 'stress_level')] = zeros if stress is None else stress
+        indicators[('emotional_risk', 'anxiety_signs')] = zeros
+        indicators[('emotional_risk', 'mood_instability')] = zeros
+        indicators[('emotional_risk', 'self_esteem')] = shortfall('participation_rate', 0.5)
+        
+        # Social
+        indicators[('social_risk', 'peer_isolation')] = shortfall('peer_interaction', 0.6)
+        indicators[('social_risk', 'communication_issues')] = zeros
+        indicators[('social_risk', 'group_participation')] = shortfall('participation_rate', 0.7)
+        
+        # Health: distance outside 7-9 hours of sleep
+        sleep_quality = zeros
+        sleep_hours = mean_of('sleep_hours')
+        if sleep_hours is not None:
+            sleep_quality = np.select([sleep_hours < 7, sleep_hours > 9],
+                                      [(7 - sleep_hours) / 7, (sleep_hours - 9) / 3], 0.0)
+        indicators[('health_risk', 'sleep_quality')] = sleep_quality
+        indicators[('health_risk', 'nutrition_issues')] = zeros
+        indicators[('health_risk', 'physical_activity')] = zeros
+        
+        # Component scores, then the weighted overall risk in one pass
+        columns = {}
+        overall = np.zeros(len(students))
+        for component, names in self.RISK_COMPONENTS.items():
+            values = [indicators[(component, name)] for name in names]
+            for name, value in zip(names, values):
+                columns[(component, name)] = value
+            score = np.mean(values, axis=0)
+            columns[(component, 'overall_score')] = score
+            overall += self.RISK_WEIGHTS[component] * score
+        overall = np.minimum(1.0, overall / sum(self.RISK_WEIGHTS.values()))
+        
+        columns[('overall_risk', '')] = overall
+        columns[('risk_category', '')] = np.select(
+            [overall < 0.3, overall < 0.5, overall < 0.7], ['low', 'medium', 'high'], 'critical'
+        )
+        return pd.DataFrame(columns, index=students)
+    
+    # Intervention lookup table: type -> (triggering component, or None for the
+    # 'critical' risk category; base priority; whether the priority escalates
+    # to 'high' when overall risk > 0.7; description; actions)
+    INTERVENTIONS = {
+        'academic': ('academic_risk', 'medium', True, 'Implement academic support program', [
+            'Schedule tutoring sessions', 'Provide additional homework support',
+            'Implement study skills training', 'Regular progress monitoring'
+        ]),
+        'behavioral': ('behavioral_risk', 'medium', True, 'Address behavioral concerns', [
+            'Behavior modification plan', 'Positive reinforcement strategies',
+            'Conflict resolution training', 'Parent-teacher communication'
+        ]),
+        'emotional': ('emotional_risk', 'medium', True, 'Provide emotional support', [
+            'Counseling services', 'Stress management techniques',
+            'Emotional regulation training', 'Support group participation'
+        ]),
+        'social': ('social_risk', 'medium', False, 'Improve social skills', [
+            'Social skills training', 'Peer mentoring program',
+            'Group activities', 'Communication workshops'
+        ]),
+        'health': ('health_risk', 'medium', False, 'Address health concerns', [
+            'Sleep hygiene education', 'Nutrition guidance',
+            'Physical activity promotion', 'Health monitoring'
+        ]),
+        'emergency': (None, 'critical', False, 'Immediate intervention required', [
+            'Immediate parent contact', 'School counselor involvement',
+            'External professional referral', 'Safety assessment'
+        ]),
+    }
+    INTERVENTION_TRIGGER = 0.5
+    
+    def _intervention_priorities(self, component_scores: Dict[str, np.ndarray], overall_risk: np.ndarray,
+                                 risk_category: np.ndarray) -> Dict[str, np.ndarray]:
+        """Priority of every intervention type for every student ('' when not recommended)."""
+        escalated = overall_risk > 0.7
+        priorities = {}
+        for kind, (component, base_priority, escalates, _, _) in self.INTERVENTIONS.items():
+            if component is None:
+                triggered = risk_category == 'critical'
+            else:
+                triggered = component_scores[component] > self.INTERVENTION_TRIGGER
+            if escalates:
+                priority = np.where(escalated, 'high', base_priority)
+            else:
+                priority = np.full(len(overall_risk), base_priority)
+            priorities[kind] = np.where(triggered, priority, '')
+        return priorities
+    
+    def _intervention(self, kind: str, priority: str) -> Dict[str, Any]:
+        _, _, _, description, actions = self.INTERVENTIONS[kind]
+        return {'type': kind, 'priority': str(priority), 'description': description, 'actions': list(actions)}
+    
+    def cohort_intervention_priorities(self, cohort_risk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Intervention priorities for every student in an ``assess_cohort_risk`` frame.
+        
+        One column per intervention type holding its priority, or '' when
+        the intervention is not recommended; computed column-wise from the
+        lookup table.
+        """
+        priorities = self._intervention_priorities(
+            {component: cohort_risk[(component, 'overall_score')].to_numpy(dtype=float)
+             for component in self.RISK_COMPONENTS},
+            cohort_risk[('overall_risk', '')].to_numpy(dtype=float),
+            cohort_risk[('risk_category', '')].to_numpy(dtype=str)
+        )
+        return pd.DataFrame(priorities, index=cohort_risk.index)
+    
+    def screen_cohort(self, data: pd.DataFrame, student_column: str = 'student_id') -> pd.DataFrame:
+        """
+        School-wide risk screening in one vectorized call.
+        
+        Returns the ``assess_cohort_risk`` frame with an ('interventions',
+        type) priority column per intervention type.
+        """
+        cohort_risk = self.assess_cohort_risk(data, student_column=student_column)
+        priorities = self.cohort_intervention_priorities(cohort_risk)
+        priorities.columns = pd.MultiIndex.from_product([['interventions'], priorities.columns])
+        return pd.concat([cohort_risk, priorities], axis=1)
+    
+    def cohort_risk_assessments(self, cohort_risk: pd.DataFrame) -> Dict[Any, Dict[str, Any]]:
+        """Expand ``assess_cohort_risk`` rows into per-student assessments with interventions."""
+        assessments = {}
+        components = list(self.RISK_COMPONENTS)
+        priorities = self.cohort_intervention_priorities(cohort_risk)
+        kinds = list(priorities.columns)
+        for student_id, row, student_priorities in zip(cohort_risk.index, cohort_risk.to_dict('records'),
+                                                       priorities.itertuples(index=False, name=None)):
+            risk_assessment = {component: {} for component in components}
+            for (component, indicator), value in row.items():
+                if component in risk_assessment:
+                    risk_assessment[component][indicator] = value
+            risk_assessment['overall_risk'] = row[('overall_risk', '')]
+            risk_assessment['risk_category'] = row[('risk_category', '')]
+            risk_assessment['intervention_recommendations'] = [
+                self._intervention(kind, priority) for kind, priority in zip(kinds, student_priorities) if priority
+            ]
+            assessments[student_id] = risk_assessment
+        return assessments
+    
     def _assess_academic_risk(self, student_data: pd.DataFrame, 
                              performance_predictor: StudentPerformancePredictor) -> Dict[str, Any]:
         """Assess academic risk factors."""
@@ -621,254 +1197,101 @@ class RiskAssessmentEngine:
     
     def _generate_interventions(self, risk_assessment: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Generate intervention recommendations based on risk assessment."""
-        interventions = []
-        
-        risk_category = risk_assessment['risk_category']
-        overall_risk = risk_assessment['overall_risk']
-        
-        # Academic interventions
-        if risk_assessment['academic_risk']['overall_score'] > 0.5:
-            interventions.append({
-                'type': 'academic',
-                'priority': 'high' if overall_risk > 0.7 else 'medium',
-                'description': 'Implement academic support program',
-                'actions': [
-                    'Schedule tutoring sessions',
-                    'Provide additional homework support',
-                    'Implement study skills training',
-                    'Regular progress monitoring'
-                ]
-            })
-        
-        # Behavioral interventions
-        if risk_assessment['behavioral_risk']['overall_score'] > 0.5:
-            interventions.append({
-                'type': 'behavioral',
-                'priority': 'high' if overall_risk > 0.7 else 'medium',
-                'description': 'Address behavioral concerns',
-                'actions': [
-                    'Behavior modification plan',
-                    'Positive reinforcement strategies',
-                    'Conflict resolution training',
-                    'Parent-teacher communication'
-                ]
-            })
-        
-        # Emotional interventions
-        if risk_assessment['emotional_risk']['overall_score'] > 0.5:
-            interventions.append({
-                'type': 'emotional',
-                'priority': 'high' if overall_risk > 0.7 else 'medium',
-                'description': 'Provide emotional support',
-                'actions': [
-                    'Counseling services',
-                    'Stress management techniques',
-                    'Emotional regulation training',
-                    'Support group participation'
-                ]
-            })
-        
-        # Social interventions
-        if risk_assessment['social_risk']['overall_score'] > 0.5:
-            interventions.append({
-                'type': 'social',
-                'priority': 'medium',
-                'description': 'Improve social skills',
-                'actions': [
-                    'Social skills training',
-                    'Peer mentoring program',
-                    'Group activities',
-                    'Communication workshops'
-                ]
-            })
-        
-        # Health interventions
-        if risk_assessment['health_risk']['overall_score'] > 0.5:
-            interventions.append({
-                'type': 'health',
-                'priority': 'medium',
-                'description': 'Address health concerns',
-                'actions': [
-                    'Sleep hygiene education',
-                    'Nutrition guidance',
-                    'Physical activity promotion',
-                    'Health monitoring'
-                ]
-            })
-        
-        # Critical risk interventions
-        if risk_category == 'critical':
-            interventions.append({
-                'type': 'emergency',
-                'priority': 'critical',
-                'description': 'Immediate intervention required',
-                'actions': [
-                    'Immediate parent contact',
-                    'School counselor involvement',
-                    'External professional referral',
-                    'Safety assessment'
-                ]
-            })
-        
-        return interventions
+        component_scores = {component: risk_assessment[component]['overall_score']
+                            for component in self.RISK_COMPONENTS}
+        priorities = self._intervention_priorities(
+            {component: np.array([score]) for component, score in component_scores.items()},
+            np.array([risk_assessment['overall_risk']]),
+            np.array([risk_assessment['risk_category']])
+        )
+        return [self._intervention(kind, priorities[kind][0])
+                for kind in self.INTERVENTIONS if priorities[kind][0]]
 
 class InterventionRecommendationEngine:
     """Engine for generating personalized intervention recommendations."""
     
-    def __init__(self):
-        self.intervention_templates = self._load_intervention_templates()
-        self.effectiveness_data = self._load_effectiveness_data()
+    def __init__(self, catalog_path: Optional[str] = None):
+        # The compiled catalog is shared by every engine in the process
+        self.catalog_path = catalog_path
+    
+    @property
+    def catalog(self) -> InterventionCatalog:
+        """The process-wide compiled catalog, reloaded if its source file changed."""
+        return load_catalog(self.catalog_path)
+    
+    @property
+    def intervention_templates(self) -> Dict[str, List[Dict[str, Any]]]:
+        return self.catalog.templates
+    
+    @property
+    def effectiveness_data(self) -> Dict[str, Dict[str, float]]:
+        return self.catalog.effectiveness
     
     def generate_recommendations(self, student_profile: Dict[str, Any], 
                                risk_assessment: Dict[str, Any],
-                               performance_history: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Generate personalized intervention recommendations."""
+                               performance_history: pd.DataFrame,
+                               top_k: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Generate personalized intervention recommendations, best first."""
         logger.info("Generating personalized intervention recommendations...")
         
-        recommendations = []
-        
-        # Academic interventions
-        academic_recs = self._generate_academic_interventions(student_profile, risk_assessment, performance_history)
-        recommendations.extend(academic_recs)
-        
-        # Behavioral interventions
-        behavioral_recs = self._generate_behavioral_interventions(student_profile, risk_assessment)
-        recommendations.extend(behavioral_recs)
-        
-        # Emotional interventions
-        emotional_recs = self._generate_emotional_interventions(student_profile, risk_assessment)
-        recommendations.extend(emotional_recs)
-        
-        # Social interventions
-        social_recs = self._generate_social_interventions(student_profile, risk_assessment)
-        recommendations.extend(social_recs)
-        
-        # Health interventions
-        health_recs = self._generate_health_interventions(student_profile, risk_assessment)
-        recommendations.extend(health_recs)
+        catalog = self.catalog
+        risk_scores = np.array([[risk_assessment[f'{category}_risk']['overall_score']
+                                 for category in RISK_CATEGORIES]], dtype=float)
+        subject_performance = self._analyze_subject_performance(performance_history)
+        subject_performance = np.array([[subject_performance.get(subject, np.nan)
+                                         for subject in catalog.subjects]], dtype=float)
+        preferences = student_profile.get('student_preferences', [])
+        preferred = np.array([[category in preferences for category in RISK_CATEGORIES]])
         
-        # Sort recommendations by priority and expected effectiveness
-        recommendations = self._prioritize_recommendations(recommendations, student_profile)
-        
-        return recommendations
-    
-    def _load_intervention_templates(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Load intervention templates from configuration."""
-        return {
-            'academic': [
-                {
-                    'name': 'Tutoring Program',
-                    'description': 'One-on-one or small group tutoring',
-                    'duration': '8-12 weeks',
-                    'frequency': '2-3 times per week',
-                    'expected_improvement': 0.15,
-                    'cost': 'medium',
-                    'resources_required': ['tutor', 'materials', 'space']
-                },
-                {
-                    'name': 'Study Skills Workshop',
-                    'description': 'Comprehensive study skills training',
-                    'duration': '4-6 weeks',
-                    'frequency': 'Once per week',
-                    'expected_improvement': 0.10,
-                    'cost': 'low',
-                    'resources_required': ['instructor', 'materials']
-                },
-                {
-                    'name': 'Homework Support',
-                    'description': 'Structured homework assistance program',
-                    'duration': 'Ongoing',
-                    'frequency': 'Daily',
-                    'expected_improvement': 0.08,
-                    'cost': 'low',
-                    'resources_required': ['supervisor', 'space']
-                }
-            ],
-            'behavioral': [
-                {
-                    'name': 'Behavior Modification Plan',
-                    'description': 'Structured behavior improvement program',
-                    'duration': '6-12 weeks',
-                    'frequency': 'Daily monitoring',
-                    'expected_improvement': 0.20,
-                    'cost': 'medium',
-                    'resources_required': ['behavioral specialist', 'monitoring tools']
-                }
-            ],
-            'emotional': [
-                {
-                    'name': 'Counseling Services',
-                    'description': 'Professional emotional support',
-                    'duration': 'Ongoing',
-                    'frequency': 'Weekly',
-                    'expected_improvement': 0.25,
-                    'cost': 'high',
-                    'resources_required': ['counselor', 'private space']
-                }
-            ]
-        }
+        return self._recommend(catalog, risk_scores, subject_performance, preferred, top_k)[0]
     
-    def _load_effectiveness_data(self) -> Dict[str, Dict[str, float]]:
-        """Load intervention effectiveness data."""
-        return {
-            'tutoring': {
-                'math': 0.18,
-                'science': 0.15,
-                'language': 0.12,
-                'overall': 0.15
-            },
-            'study_skills': {
-                'all_subjects': 0.10,
-                'overall': 0.10
-            },
-            'counseling': {
-                'emotional': 0.25,
-                'behavioral': 0.20,
-                'overall': 0.22
-            }
-        }
+    def recommend_cohort(self, risk_scores: pd.DataFrame,
+                         subject_performance: Optional[pd.DataFrame] = None,
+                         student_preferences: Optional[Dict[Any, List[str]]] = None,
+                         top_k: Optional[int] = None) -> Dict[Any, List[Dict[str, Any]]]:
+        """
+        Recommendations for many students with one vectorized scoring pass.
+        
+        ``risk_scores`` has one row per student and either '<category>_risk'
+        score columns or the (component, 'overall_score') columns of
+        ``RiskAssessmentEngine.assess_cohort_risk``. ``subject_performance``
+        has '<subject>_score' columns (missing subjects score 0.75, as for a
+        single student).
+        """
+        catalog = self.catalog
+        students = risk_scores.index
+        if isinstance(risk_scores.columns, pd.MultiIndex):
+            scores = np.column_stack([risk_scores[(f'{category}_risk', 'overall_score')].to_numpy(dtype=float)
+                                      for category in RISK_CATEGORIES])
+        else:
+            scores = np.column_stack([risk_scores[f'{category}_risk'].to_numpy(dtype=float)
+                                      for category in RISK_CATEGORIES])
+        
+        performance = np.full((len(students), len(catalog.subjects)), 0.75)
+        if subject_performance is not None:
+            subject_performance = subject_performance.reindex(students)
+            for column, subject in enumerate(catalog.subjects):
+                if f'{subject}_score' in subject_performance.columns:
+                    performance[:, column] = subject_performance[f'{subject}_score'].to_numpy(dtype=float)
+        
+        student_preferences = student_preferences or {}
+        preferred = np.array([[category in student_preferences.get(student_id, [])
+                               for category in RISK_CATEGORIES] for student_id in students],
+                             dtype=bool).reshape(len(students), len(RISK_CATEGORIES))
+        
+        return dict(zip(students, self._recommend(catalog, scores, performance, preferred, top_k)))
     
-    def _generate_academic_interventions(self, student_profile: Dict[str, Any],
-                                       risk_assessment: Dict[str, Any],
-                                       performance_history: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Generate academic intervention recommendations."""
-        recommendations = []
-        
-        academic_risk = risk_assessment['academic_risk']['overall_score']
-        
-        if academic_risk > 0.5:
-            # Analyze subject-specific performance
-            subject_performance = self._analyze_subject_performance(performance_history)
-            
-            for subject, performance in subject_performance.items():
-                if performance < 0.7:  # Below 70%
-                    recommendations.append({
-                        'type': 'academic',
-                        'subject': subject,
-                        'intervention': 'Tutoring Program',
-                        'priority': 'high' if academic_risk > 0.7 else 'medium',
-                        'description': f'Subject-specific tutoring for {subject}',
-                        'expected_improvement': self.effectiveness_data['tutoring'].get(subject, 0.15),
-                        'duration': '8-12 weeks',
-                        'frequency': '2-3 times per week',
-                        'resources': ['subject tutor', 'materials', 'practice space']
-                    })
-            
-            # General academic support
-            if academic_risk > 0.6:
-                recommendations.append({
-                    'type': 'academic',
-                    'subject': 'general',
-                    'intervention': 'Study Skills Workshop',
-                    'priority': 'medium',
-                    'description': 'Comprehensive study skills improvement',
-                    'expected_improvement': 0.10,
-                    'duration': '4-6 weeks',
-                    'frequency': 'Once per week',
-                    'resources': ['study skills instructor', 'materials']
-                })
-        
-        return recommendations
+    def _recommend(self, catalog: InterventionCatalog, risk_scores: np.ndarray, subject_performance: np.ndarray,
+                   preferred: np.ndarray, top_k: Optional[int]) -> List[List[Dict[str, Any]]]:
+        """Score every catalog candidate for every student and keep the top ``top_k`` eligible ones."""
+        resources_available = np.array([self._check_resource_availability(record['resources'])
+                                        for record in catalog.slot_records], dtype=bool)
+        scores, escalated = catalog.score(risk_scores, subject_performance, preferred, resources_available)
+        
+        return [
+            [catalog.recommendation(slot, scores[student, slot], escalated[student, slot]) for slot in slots]
+            for student, slots in enumerate(catalog.top_k(scores, top_k))
+        ]
     
     def _analyze_subject_performance(self, performance_history: pd.DataFrame) -> Dict[str, float]:
         """Analyze performance by subject."""
@@ -876,8 +1299,7 @@ class InterventionRecommendationEngine:
         
         # This would analyze actual subject-specific data
         # For now, return placeholder data
-        subjects = ['math', 'science', 'language', 'social_studies']
-        for subject in subjects:
+        for subject in self.catalog.subjects:
             if f'{subject}_score' in performance_history.columns:
                 subject_performance[subject] = performance_history[f'{subject}_score'].mean()
             else:
@@ -885,126 +1307,6 @@ class InterventionRecommendationEngine:
         
         return subject_performance
     
-    def _generate_behavioral_interventions(self, student_profile: Dict[str, Any],
-                                         risk_assessment: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate behavioral intervention recommendations."""
-        recommendations = []
-        
-        behavioral_risk = risk_assessment['behavioral_risk']['overall_score']
-        
-        if behavioral_risk > 0.5:
-            recommendations.append({
-                'type': 'behavioral',
-                'intervention': 'Behavior Modification Plan',
-                'priority': 'high' if behavioral_risk > 0.7 else 'medium',
-                'description': 'Structured behavior improvement program',
-                'expected_improvement': 0.20,
-                'duration': '6-12 weeks',
-                'frequency': 'Daily monitoring',
-                'resources': ['behavioral specialist', 'monitoring tools', 'parent involvement']
-            })
-        
-        return recommendations
-    
-    def _generate_emotional_interventions(self, student_profile: Dict[str, Any],
-                                        risk_assessment: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate emotional intervention recommendations."""
-        recommendations = []
-        
-        emotional_risk = risk_assessment['emotional_risk']['overall_score']
-        
-        if emotional_risk > 0.5:
-            recommendations.append({
-                'type': 'emotional',
-                'intervention': 'Counseling Services',
-                'priority': 'high' if emotional_risk > 0.7 else 'medium',
-                'description': 'Professional emotional support and guidance',
-                'expected_improvement': 0.25,
-                'duration': 'Ongoing',
-                'frequency': 'Weekly',
-                'resources': ['school counselor', 'private space', 'parent communication']
-            })
-        
-        return recommendations
-    
-    def _generate_social_interventions(self, student_profile: Dict[str, Any],
-                                      risk_assessment: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate social intervention recommendations."""
-        recommendations = []
-        
-        social_risk = risk_assessment['social_risk']['overall_score']
-        
-        if social_risk > 0.5:
-            recommendations.append({
-                'type': 'social',
-                'intervention': 'Social Skills Training',
-                'priority': 'medium',
-                'description': 'Improve peer interaction and communication skills',
-                'expected_improvement': 0.15,
-                'duration': '6-8 weeks',
-                'frequency': 'Twice per week',
-                'resources': ['social skills instructor', 'group activities', 'peer mentors']
-            })
-        
-        return recommendations
-    
-    def _generate_health_interventions(self, student_profile: Dict[str, Any],
-                                      risk_assessment: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Generate health intervention recommendations."""
-        recommendations = []
-        
-        health_risk = risk_assessment['health_risk']['overall_score']
-        
-        if health_risk > 0.5:
-            recommendations.append({
-                'type': 'health',
-                'intervention': 'Wellness Program',
-                'priority': 'medium',
-                'description': 'Improve sleep, nutrition, and physical activity',
-                'expected_improvement': 0.12,
-                'duration': '8-10 weeks',
-                'frequency': 'Weekly sessions',
-                'resources': ['health educator', 'nutritionist', 'fitness instructor']
-            })
-        
-        return recommendations
-    
-    def _prioritize_recommendations(self, recommendations: List[Dict[str, Any]],
-                                   student_profile: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Prioritize recommendations based on multiple factors."""
-        for rec in recommendations:
-            # Calculate priority score
-            priority_score = 0
-            
-            # Risk level priority
-            if rec['priority'] == 'critical':
-                priority_score += 100
-            elif rec['priority'] == 'high':
-                priority_score += 80
-            elif rec['priority'] == 'medium':
-                priority_score += 60
-            else:
-                priority_score += 40
-            
-            # Expected improvement priority
-            priority_score += rec.get('expected_improvement', 0) * 100
-            
-            # Resource availability priority
-            if self._check_resource_availability(rec['resources']):
-                priority_score += 20
-            
-            # Student preference priority (if available)
-            if 'student_preferences' in student_profile:
-                if rec['type'] in student_profile['student_preferences']:
-                    priority_score += 15
-            
-            rec['priority_score'] = priority_score
-        
-        # Sort by priority score (descending)
-        recommendations.sort(key=lambda x: x['priority_score'], reverse=True)
-        
-        return recommendations
-    
     def _check_resource_availability(self, resources: List[str]) -> bool:
         """Check if required resources are available."""
         # This would check actual resource availability
@@ -0,0 +1,151 @@
+"""
+Cohort Behavioral Feature Extraction
+Addis Ababa AI School Management System
+
+Computes the behavioral emotion features for many students at once from a
+long-format frame of interaction events (one row per event, one column
+identifying the student):
+- A single groupby aggregation per batch of events
+- Per-student running count/mean/M2 statistics, merged with the parallel
+  variance update, so each run only has to aggregate the new events
+- An aligned (students x features) matrix in the same layout as
+  ``BehavioralEmotionRecognizer.extract_behavioral_features``
+"""
+
+import numpy as np
+import pandas as pd
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Interaction signals in feature order
+BEHAVIORAL_SIGNALS = [
+    'typing_speed', 'mouse_speed', 'click_frequency', 'response_time',
+    'session_duration', 'error_count', 'engagement_score'
+]
+
+
+class BehavioralFeatureAggregator:
+    """Running per-student statistics of interaction events."""
+
+    def __init__(self, feature_dim: int = 128, student_column: str = 'student_id',
+                 timestamp_column: Optional[str] = 'timestamp'):
+        self.feature_dim = feature_dim
+        self.student_column = student_column
+        self.timestamp_column = timestamp_column
+        self.last_timestamp = None
+        self.reset()
+
+    def reset(self):
+        """Forget all students and the timestamp watermark."""
+        num_signals = len(BEHAVIORAL_SIGNALS)
+        self.student_index = pd.Index([])
+        self.event_counts = np.zeros(0)
+        self.counts = np.zeros((0, num_signals))
+        self.means = np.zeros((0, num_signals))
+        self.m2 = np.zeros((0, num_signals))
+        self.last_timestamp = None
+
+    @property
+    def num_students(self) -> int:
+        return len(self.student_index)
+
+    def _positions(self, student_ids: pd.Index) -> np.ndarray:
+        """Row positions for student ids, adding rows for students not seen before."""
+        new_students = student_ids.difference(self.student_index, sort=False)
+        if len(new_students):
+            grow = len(new_students)
+            self.student_index = self.student_index.append(new_students)
+            self.event_counts = np.concatenate([self.event_counts, np.zeros(grow)])
+            self.counts = np.vstack([self.counts, np.zeros((grow, self.counts.shape[1]))])
+            self.means = np.vstack([self.means, np.zeros((grow, self.means.shape[1]))])
+            self.m2 = np.vstack([self.m2, np.zeros((grow, self.m2.shape[1]))])
+        return self.student_index.get_indexer(student_ids)
+
+    def update(self, events: pd.DataFrame) -> pd.Index:
+        """
+        Fold a batch of new events into the running statistics.
+
+        With a timestamp column, events at or before the last seen timestamp
+        are skipped, so callers can pass an overlapping window each run.
+        Returns the ids of the students whose features changed.
+        """
+        if self.timestamp_column in events.columns:
+            if self.last_timestamp is not None:
+                events = events[events[self.timestamp_column] > self.last_timestamp]
+            if len(events):
+                self.last_timestamp = events[self.timestamp_column].max()
+
+        if events.empty:
+            return pd.Index([])
+
+        signals = events.reindex(columns=BEHAVIORAL_SIGNALS).astype(float)
+        signals[self.student_column] = events[self.student_column].values
+
+        # One aggregation for every student and signal in the batch
+        grouped = signals.groupby(self.student_column, sort=False)
+        stats = grouped[BEHAVIORAL_SIGNALS].agg(['count', 'mean', 'var'])
+        batch_events = grouped.size().reindex(stats.index).to_numpy(dtype=float)
+
+        batch_counts = stats.xs('count', axis=1, level=1)[BEHAVIORAL_SIGNALS].to_numpy(dtype=float)
+        batch_means = stats.xs('mean', axis=1, level=1)[BEHAVIORAL_SIGNALS].to_numpy(dtype=float)
+        batch_var = stats.xs('var', axis=1, level=1)[BEHAVIORAL_SIGNALS].to_numpy(dtype=float)
+        batch_means = np.nan_to_num(batch_means)
+        batch_m2 = np.nan_to_num(batch_var) * np.maximum(batch_counts - 1, 0)
+
+        positions = self._positions(stats.index)
+
+        # Parallel variance update of (count, mean, M2)
+        counts = self.counts[positions]
+        means = self.means[positions]
+        total = counts + batch_counts
+        safe_total = np.where(total > 0, total, 1)
+        delta = batch_means - means
+
+        self.means[positions] = means + delta * batch_counts / safe_total
+        self.m2[positions] = self.m2[positions] + batch_m2 + delta ** 2 * counts * batch_counts / safe_total
+        self.counts[positions] = total
+        self.event_counts[positions] += batch_events
+
+        return stats.index
+
+    def features(self, student_ids: Optional[List] = None) -> Tuple[pd.Index, np.ndarray]:
+        """
+        Feature matrix aligned with the returned student ids.
+
+        Students without events get zero rows; statistics that are undefined
+        (no values, or a single value for a std) are 0.
+        """
+        if student_ids is None:
+            index = self.student_index
+            positions = np.arange(len(index))
+        else:
+            index = pd.Index(student_ids)
+            positions = self.student_index.get_indexer(index)
+
+        matrix = np.zeros((len(index), self.feature_dim))
+        known = positions >= 0
+        if not known.any():
+            return index, matrix
+        positions = positions[known]
+
+        counts = self.counts[positions]
+        means = self.means[positions]
+        m2 = self.m2[positions]
+        event_counts = self.event_counts[positions]
+
+        stds = np.sqrt(np.maximum(m2, 0) / np.where(counts > 1, counts - 1, 1))
+        stds[counts < 2] = 0.0
+
+        error = BEHAVIORAL_SIGNALS.index('error_count')
+        error_sum = means[:, error] * counts[:, error]
+        error_rate = error_sum / np.where(event_counts > 0, event_counts, 1)
+
+        # Same layout as BehavioralEmotionRecognizer.extract_behavioral_features
+        columns = [means[:, 0], stds[:, 0], means[:, 1], stds[:, 1], means[:, 2], stds[:, 2],
+                   means[:, 3], stds[:, 3], means[:, 4], error_sum, error_rate, means[:, 6], stds[:, 6]]
+
+        width = min(len(columns), self.feature_dim)
+        matrix[known, :width] = np.column_stack(columns)[:, :width]
+        return index, matrix
@@ -0,0 +1,247 @@
+"""
+Compact Emotion History Store
+Addis Ababa AI School Management System
+
+Per-student emotion history for the emotional intelligence engine:
+- Fixed-capacity ring buffers of int64 timestamps (microseconds since the
+  epoch), int8 emotion codes and float32 confidences
+- Time-window queries by binary search over the time-ordered buffer
+- Optional SQLite persistence so trends survive restarts and are shared
+  by every worker on the host
+"""
+
+import numpy as np
+import logging
+import os
+import sqlite3
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN_EMOTION_CODE = -1
+
+EmotionWindow = namedtuple('EmotionWindow', ['timestamps', 'codes', 'confidences'])
+
+
+def to_timestamp_us(moment: datetime) -> int:
+    """Convert a datetime to integer microseconds since the epoch."""
+    return int(round(moment.timestamp() * 1_000_000))
+
+
+def _empty_window() -> EmotionWindow:
+    return EmotionWindow(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int8),
+                         np.zeros(0, dtype=np.float32))
+
+
+class StudentEmotionBuffer:
+    """Time-ordered ring buffer of one student's emotion observations."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+        self.codes = np.zeros(capacity, dtype=np.int8)
+        self.confidences = np.zeros(capacity, dtype=np.float32)
+        self.start = 0
+        self.size = 0
+
+    def append(self, timestamp: int, code: int, confidence: float):
+        """Append an observation, overwriting the oldest one when full."""
+        if self.size:
+            # Keep the buffer sorted so window queries can binary search
+            timestamp = max(timestamp, int(self.timestamps[(self.start + self.size - 1) % self.capacity]))
+
+        position = (self.start + self.size) % self.capacity
+        self.timestamps[position] = timestamp
+        self.codes[position] = code
+        self.confidences[position] = confidence
+
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+
+    def _segments(self):
+        end = self.start + self.size
+        if end <= self.capacity:
+            return [slice(self.start, end)]
+        return [slice(self.start, self.capacity), slice(0, end - self.capacity)]
+
+    def window(self, start_us: int, end_us: int) -> EmotionWindow:
+        """Observations with start_us <= timestamp < end_us, oldest first."""
+        parts = []
+        for segment in self._segments():
+            timestamps = self.timestamps[segment]
+            low = np.searchsorted(timestamps, start_us, side='left')
+            high = np.searchsorted(timestamps, end_us, side='left')
+            if high > low:
+                offset = segment.start
+                parts.append(slice(offset + low, offset + high))
+
+        if not parts:
+            return _empty_window()
+        return EmotionWindow(*(np.concatenate([array[part] for part in parts])
+                               for array in (self.timestamps, self.codes, self.confidences)))
+
+    def recent(self, count: int) -> EmotionWindow:
+        """The last ``count`` observations, oldest first."""
+        count = min(count, self.size)
+        positions = (self.start + self.size - count + np.arange(count)) % self.capacity
+        return EmotionWindow(self.timestamps[positions], self.codes[positions], self.confidences[positions])
+
+
+class EmotionHistoryStore:
+    """In-memory emotion history keyed by student, bounded per student."""
+
+    def __init__(self, emotion_categories: List[str], capacity: int = 1000):
+        self.emotion_categories = list(emotion_categories)
+        self.emotion_codes = {emotion: code for code, emotion in enumerate(self.emotion_categories)}
+        self.capacity = capacity
+        self._buffers: Dict[str, StudentEmotionBuffer] = {}
+        self._lock = threading.Lock()
+
+    def encode(self, emotion: Optional[str]) -> int:
+        """Map an emotion name to its int8 code."""
+        return self.emotion_codes.get(emotion, UNKNOWN_EMOTION_CODE)
+
+    def decode(self, codes: np.ndarray) -> List[str]:
+        """Map int8 codes back to emotion names."""
+        return [self.emotion_categories[code] if code >= 0 else 'unknown' for code in codes.tolist()]
+
+    def append(self, student_id: str, emotion: Optional[str], confidence: float = 0.0,
+               timestamp: Optional[datetime] = None):
+        """Record one observation for a student."""
+        timestamp_us = to_timestamp_us(timestamp or datetime.now())
+        with self._lock:
+            buffer = self._buffers.get(student_id)
+            if buffer is None:
+                buffer = self._buffers[student_id] = StudentEmotionBuffer(self.capacity)
+            buffer.append(timestamp_us, self.encode(emotion), confidence)
+
+    def window(self, student_id: str, start: datetime, end: Optional[datetime] = None) -> EmotionWindow:
+        """Observations for a student in [start, end)."""
+        end_us = to_timestamp_us(end) if end else np.iinfo(np.int64).max
+        with self._lock:
+            buffer = self._buffers.get(student_id)
+            if buffer is None:
+                return _empty_window()
+            return buffer.window(to_timestamp_us(start), end_us)
+
+    def recent(self, student_id: str, count: int) -> EmotionWindow:
+        """The last ``count`` observations for a student."""
+        with self._lock:
+            buffer = self._buffers.get(student_id)
+            if buffer is None:
+                return _empty_window()
+            return buffer.recent(count)
+
+    def close(self):
+        """Release any resources held by the store."""
+
+
+class SQLiteEmotionHistoryStore(EmotionHistoryStore):
+    """
+    Emotion history persisted to SQLite.
+
+    Every worker on the host opens the same file (WAL mode), so trends are
+    shared across processes and survive restarts. Queries are range scans
+    on a (student_id, ts) index. Rows older than the retention period are
+    pruned periodically, and each student keeps at most ``capacity`` rows.
+    """
+
+    PRUNE_EVERY = 500
+
+    def __init__(self, emotion_categories: List[str], path: str, capacity: int = 1000,
+                 retention: timedelta = timedelta(days=90)):
+        super().__init__(emotion_categories, capacity)
+        self.path = path
+        self.retention = retention
+        self._appends_since_prune = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._connection = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS emotion_history ('
+                'student_id TEXT NOT NULL, ts INTEGER NOT NULL, '
+                'code INTEGER NOT NULL, confidence REAL NOT NULL)'
+            )
+            self._connection.execute(
+                'CREATE INDEX IF NOT EXISTS emotion_history_student_ts '
+                'ON emotion_history (student_id, ts)'
+            )
+
+    @staticmethod
+    def _to_window(rows) -> EmotionWindow:
+        if not rows:
+            return _empty_window()
+        timestamps, codes, confidences = zip(*rows)
+        return EmotionWindow(np.array(timestamps, dtype=np.int64), np.array(codes, dtype=np.int8),
+                             np.array(confidences, dtype=np.float32))
+
+    def append(self, student_id: str, emotion: Optional[str], confidence: float = 0.0,
+               timestamp: Optional[datetime] = None):
+        """Record one observation for a student."""
+        timestamp_us = to_timestamp_us(timestamp or datetime.now())
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT INTO emotion_history (student_id, ts, code, confidence) VALUES (?, ?, ?, ?)',
+                (student_id, timestamp_us, self.encode(emotion), float(confidence))
+            )
+            self._appends_since_prune += 1
+            if self._appends_since_prune >= self.PRUNE_EVERY:
+                self._prune()
+
+    def _prune(self):
+        """Drop rows past retention and rows beyond each student's capacity."""
+        cutoff_us = to_timestamp_us(datetime.now() - self.retention)
+        self._connection.execute('DELETE FROM emotion_history WHERE ts < ?', (cutoff_us,))
+        self._connection.execute(
+            'DELETE FROM emotion_history WHERE rowid IN ('
+            ' SELECT rowid FROM (SELECT rowid, ROW_NUMBER() OVER '
+            '  (PARTITION BY student_id ORDER BY ts DESC) AS position FROM emotion_history)'
+            ' WHERE position > ?)',
+            (self.capacity,)
+        )
+        self._appends_since_prune = 0
+
+    def window(self, student_id: str, start: datetime, end: Optional[datetime] = None) -> EmotionWindow:
+        """Observations for a student in [start, end)."""
+        end_us = to_timestamp_us(end) if end else np.iinfo(np.int64).max
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT ts, code, confidence FROM emotion_history '
+                'WHERE student_id = ? AND ts >= ? AND ts < ? ORDER BY ts',
+                (student_id, to_timestamp_us(start), end_us)
+            ).fetchall()
+        return self._to_window(rows)
+
+    def recent(self, student_id: str, count: int) -> EmotionWindow:
+        """The last ``count`` observations for a student."""
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT ts, code, confidence FROM emotion_history '
+                'WHERE student_id = ? ORDER BY ts DESC LIMIT ?',
+                (student_id, count)
+            ).fetchall()
+        return self._to_window(rows[::-1])
+
+    def close(self):
+        """Close the SQLite connection."""
+        with self._lock:
+            self._connection.close()
+
+
+def create_emotion_history_store(emotion_categories: List[str], capacity: int = 1000,
+                                 path: Optional[str] = None,
+                                 retention: timedelta = timedelta(days=90)) -> EmotionHistoryStore:
+    """Create a persistent store when a path is given, otherwise an in-memory one."""
+    if path:
+        return SQLiteEmotionHistoryStore(emotion_categories, path, capacity=capacity, retention=retention)
+    return EmotionHistoryStore(emotion_categories, capacity=capacity)
@@ -18,7 +18,6 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch.utils.data import Dataset, DataLoader
 import cv2
-import librosa
 import face_recognition
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
@@ -26,10 +25,16 @@ import joblib
 import logging
 import json
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, List, Tuple, Optional, Any, Union
 from dataclasses import dataclass, asdict
 from datetime import datetime, timedelta
 import warnings
+
+from .voice_features import VoiceFeatureExtractor, StreamingVoiceFeatureExtractor
+from .emotion_history import create_emotion_history_store
+from .behavioral_features import BehavioralFeatureAggregator
 warnings.filterwarnings('ignore')
 
 # Configure logging
@@ -62,6 +67,21 @@ class EmotionRecognitionConfig:
     audio_sample_rate: int = 16000
     sequence_length: int = 50
     
+    # Voice spectrogram parameters
+    voice_n_fft: int = 2048
+    voice_hop_length: int = 512
+    voice_stream_window_seconds: float = 10.0
+    
+    # Emotion history parameters
+    emotion_history_capacity: int = 1000  # observations kept per student
+    emotion_history_path: Optional[str] = None  # SQLite file to persist and share history
+    emotion_history_retention_days: int = 90
+    
+    # Concurrent multi-modal analysis
+    concurrent_modalities: bool = False  # run facial, voice and behavioral recognition in parallel
+    modality_timeout_seconds: float = 2.0  # modalities not finished by then are left out of fusion
+    modality_workers: int = 6  # threads in the executor shared by all engines in the process
+    
     def __post_init__(self):
         if self.emotion_categories is None:
             self.emotion_categories = ['happy', 'sad', 'angry', 'fearful', 'surprised', 'disgusted', 'neutral']
@@ -71,6 +91,14 @@ class EmotionRecognitionConfig:
 class FacialEmotionRecognizer:
     """Recognizes emotions from facial expressions using computer vision and deep learning."""
     
+    # Landmark layout produced by face_recognition's 68-point model
+    LANDMARK_LAYOUT = {
+        'chin': 17, 'left_eyebrow': 5, 'right_eyebrow': 5,
+        'nose_bridge': 4, 'nose_tip': 5, 'left_eye': 6, 'right_eye': 6,
+        'top_lip': 12, 'bottom_lip': 12
+    }
+    NUM_FACE_FEATURES = 16
+    
     def __init__(self, config: EmotionRecognitionConfig):
         self.config = config
         self.model = None
@@ -80,75 +108,144 @@ class FacialEmotionRecognizer:
         
     def extract_facial_features(self, image: np.ndarray) -> np.ndarray:
         """Extract facial features from an image."""
-        try:
-            # Detect face landmarks
-            face_landmarks = face_recognition.face_landmarks(image)
-            
-            if not face_landmarks:
-                return np.zeros(self.config.facial_feature_dim)
-            
-            # Extract key facial features
-            features = []
+        return self.extract_facial_features_batch([image])[0]
+    
+    def extract_facial_features_batch(self, images: List[np.ndarray]) -> np.ndarray:
+        """
+        Extract facial features for N images as an (N, facial_feature_dim) matrix.
+        
+        Landmarks of every face in the batch are stacked into arrays so the
+        aspect ratios, eyebrow, nose and geometric features are computed once
+        for all faces. Faces in an image are averaged and the result is padded
+        or truncated to facial_feature_dim in a single assignment. Images with
+        no face (or whose landmark detection fails) get a zero row.
+        """
+        num_images = len(images)
+        output = np.zeros((num_images, self.config.facial_feature_dim))
+        if num_images == 0:
+            return output
+        
+        standard_faces, standard_owners = [], []
+        irregular_features, irregular_owners = [], []
+        
+        for idx, image in enumerate(images):
+            try:
+                face_landmarks = face_recognition.face_landmarks(image)
+            except Exception as e:
+                logger.error(f"Error extracting facial features: {e}")
+                continue
             
             for face in face_landmarks:
-                # Eye features
-                left_eye = face['left_eye']
-                right_eye = face['right_eye']
-                
-                # Calculate eye aspect ratio (EAR)
-                left_ear = self._calculate_eye_aspect_ratio(left_eye)
-                right_ear = self._calculate_eye_aspect_ratio(right_eye)
-                
-                # Mouth features
-                top_lip = face['top_lip']
-                bottom_lip = face['bottom_lip']
-                
-                # Calculate mouth aspect ratio (MAR)
-                mar = self._calculate_mouth_aspect_ratio(top_lip, bottom_lip)
-                
-                # Eyebrow features
-                left_eyebrow = face['left_eyebrow']
-                right_eyebrow = face['right_eyebrow']
-                
-                # Calculate eyebrow positions
-                left_eyebrow_height = self._calculate_eyebrow_height(left_eyebrow)
-                right_eyebrow_height = self._calculate_eyebrow_height(right_eyebrow)
-                
-                # Nose features
-                nose_bridge = face['nose_bridge']
-                nose_tip = face['nose_tip']
-                
-                # Calculate nose features
-                nose_width = self._calculate_nose_width(nose_tip)
-                
-                # Combine features
-                face_features = [
-                    left_ear, right_ear, mar,
-                    left_eyebrow_height, right_eyebrow_height,
-                    nose_width
-                ]
-                
-                # Add geometric features
-                geometric_features = self._extract_geometric_features(face)
-                face_features.extend(geometric_features)
-                
-                features.append(face_features)
-            
-            # Average features if multiple faces detected
-            if features:
-                avg_features = np.mean(features, axis=0)
-                # Pad or truncate to required dimension
-                if len(avg_features) < self.config.facial_feature_dim:
-                    avg_features = np.pad(avg_features, (0, self.config.facial_feature_dim - len(avg_features)))
+                if all(len(face.get(key, ())) == count for key, count in self.LANDMARK_LAYOUT.items()):
+                    standard_faces.append(face)
+                    standard_owners.append(idx)
                 else:
-                    avg_features = avg_features[:self.config.facial_feature_dim]
-                return avg_features
-            else:
-                return np.zeros(self.config.facial_feature_dim)
-                
-        except Exception as e:
-            logger.error(f"Error extracting facial features: {e}")
-            return np.zeros(self.config.facial_feature_dim)
+                    # Non-standard landmark sets use the per-face path
+                    try:
+                        irregular_features.append(self._extract_face_features(face))
+                        irregular_owners.append(idx)
+                    except Exception as e:
+                        logger.error(f"Error extracting facial features: {e}")
+        
+        face_features = [self._compute_face_features_vectorized(standard_faces)] if standard_faces else []
+        if irregular_features:
+            face_features.append(np.asarray(irregular_features, dtype=np.float64))
+        if not face_features:
+            return output
+        
+        face_features = np.vstack(face_features)
+        owners = np.asarray(standard_owners + irregular_owners, dtype=np.intp)
+        
+        # Average features per image when multiple faces are detected
+        sums = np.zeros((num_images, face_features.shape[1]))
+        np.add.at(sums, owners, face_features)
+        counts = np.bincount(owners, minlength=num_images)
+        has_face = counts > 0
+        sums[has_face] /= counts[has_face, None]
+        
+        # Pad or truncate to the required dimension
+        width = min(face_features.shape[1], self.config.facial_feature_dim)
+        output[:, :width] = sums[:, :width]
+        return output
+    
+    def _compute_face_features_vectorized(self, faces: List[Dict[str, List[Tuple[int, int]]]]) -> np.ndarray:
+        """Compute the per-face feature vector for F faces with the standard landmark layout."""
+        def stack(key: str) -> np.ndarray:
+            return np.asarray([face[key] for face in faces], dtype=np.float64)  # (F, points, 2)
+        
+        left_eye, right_eye = stack('left_eye'), stack('right_eye')
+        top_lip, bottom_lip = stack('top_lip'), stack('bottom_lip')
+        chin, nose_tip = stack('chin'), stack('nose_tip')
+        
+        def distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+            return np.linalg.norm(a - b, axis=-1)
+        
+        def safe_ratio(numerator: np.ndarray, denominator: np.ndarray, default: float) -> np.ndarray:
+            result = np.full_like(numerator, default)
+            np.divide(numerator, denominator, out=result, where=denominator > 0)
+            return result
+        
+        # Eye aspect ratio (EAR) for both eyes at once: (2, F)
+        eyes = np.stack([left_eye, right_eye])
+        ear = safe_ratio(
+            distance(eyes[:, :, 1], eyes[:, :, 5]) + distance(eyes[:, :, 2], eyes[:, :, 4]),
+            2.0 * distance(eyes[:, :, 0], eyes[:, :, 3]),
+            0.0
+        )
+        
+        # Mouth aspect ratio (MAR)
+        mar = safe_ratio(
+            distance(top_lip[:, 2], bottom_lip[:, 6]) +
+            distance(top_lip[:, 3], bottom_lip[:, 5]) +
+            distance(top_lip[:, 4], bottom_lip[:, 4]),
+            2.0 * distance(top_lip[:, 0], top_lip[:, 6]),
+            0.0
+        )
+        
+        # Eyebrow heights and nose width
+        left_eyebrow_height = stack('left_eyebrow')[:, :, 1].mean(axis=1)
+        right_eyebrow_height = stack('right_eyebrow')[:, :, 1].mean(axis=1)
+        nose_width = np.ptp(nose_tip[:, :, 0], axis=1)
+        
+        # Geometric features: face aspect ratio and eye distance
+        face_extent = np.ptp(chin, axis=1)  # (F, 2) -> width, height
+        aspect_ratio = safe_ratio(face_extent[:, 0], face_extent[:, 1], 1.0)
+        eye_distance = distance(left_eye.mean(axis=1), right_eye.mean(axis=1))
+        
+        features = np.zeros((len(faces), self.NUM_FACE_FEATURES))
+        features[:, :8] = np.column_stack([
+            ear[0], ear[1], mar,
+            left_eyebrow_height, right_eyebrow_height, nose_width,
+            aspect_ratio, eye_distance
+        ])
+        # Remaining columns are placeholders for additional geometric features
+        return features
+    
+    def _extract_face_features(self, face: Dict[str, List[Tuple[int, int]]]) -> List[float]:
+        """Compute the feature vector for a single face (non-standard landmark sets)."""
+        # Calculate eye aspect ratio (EAR)
+        left_ear = self._calculate_eye_aspect_ratio(face['left_eye'])
+        right_ear = self._calculate_eye_aspect_ratio(face['right_eye'])
+        
+        # Calculate mouth aspect ratio (MAR)
+        mar = self._calculate_mouth_aspect_ratio(face['top_lip'], face['bottom_lip'])
+        
+        # Calculate eyebrow positions
+        left_eyebrow_height = self._calculate_eyebrow_height(face['left_eyebrow'])
+        right_eyebrow_height = self._calculate_eyebrow_height(face['right_eyebrow'])
+        
+        # Calculate nose features
+        nose_width = self._calculate_nose_width(face['nose_tip'])
+        
+        face_features = [
+            left_ear, right_ear, mar,
+            left_eyebrow_height, right_eyebrow_height,
+            nose_width
+        ]
+        
+        # Add geometric features
+        face_features.extend(self._extract_geometric_features(face))
+        return face_features
     
     def _calculate_eye_aspect_ratio(self, eye_points: List[Tuple[int, int]]) -> float:
         """Calculate the eye aspect ratio (EAR) for eye openness detection."""
@@ -325,65 +422,40 @@ class VoiceEmotionRecognizer:
     def __init__(self, config: EmotionRecognitionConfig):
         self.config = config
         self.model = None
-        self.feature_extractor = None
+        self.feature_extractor = VoiceFeatureExtractor(
+            sample_rate=config.audio_sample_rate,
+            feature_dim=config.voice_feature_dim,
+            n_fft=config.voice_n_fft,
+            hop_length=config.voice_hop_length
+        )
         self.emotion_classifier = None
         self.is_trained = False
         
     def extract_voice_features(self, audio: np.ndarray) -> np.ndarray:
         """Extract voice features from audio signal."""
         try:
-            features = []
-            
-            # MFCC features
-            mfccs = librosa.feature.mfcc(y=audio, sr=self.config.audio_sample_rate, n_mfcc=13)
-            mfcc_mean = np.mean(mfccs, axis=1)
-            mfcc_std = np.std(mfccs, axis=1)
-            features.extend(mfcc_mean)
-            features.extend(mfcc_std)
-            
-            # Spectral features
-            spectral_centroids = librosa.feature.spectral_centroid(y=audio, sr=self.config.audio_sample_rate)[0]
-            spectral_rolloff = librosa.feature.spectral_rolloff(y=audio, sr=self.config.audio_sample_rate)[0]
-            spectral_bandwidth = librosa.feature.spectral_bandwidth(y=audio, sr=self.config.audio_sample_rate)[0]
-            
-            features.extend([
-                np.mean(spectral_centroids), np.std(spectral_centroids),
-                np.mean(spectral_rolloff), np.std(spectral_rolloff),
-                np.mean(spectral_bandwidth), np.std(spectral_bandwidth)
-            ])
-            
-            # Pitch features
-            pitches, magnitudes = librosa.piptrack(y=audio, sr=self.config.audio_sample_rate)
-            pitch_mean = np.mean(pitches[magnitudes > 0.1])
-            pitch_std = np.std(pitches[magnitudes > 0.1])
-            features.extend([pitch_mean, pitch_std])
-            
-            # Energy features
-            rms = librosa.feature.rms(y=audio)[0]
-            zero_crossing_rate = librosa.feature.zero_crossing_rate(audio)[0]
-            
-            features.extend([
-                np.mean(rms), np.std(rms),
-                np.mean(zero_crossing_rate), np.std(zero_crossing_rate)
-            ])
-            
-            # Tempo features
-            tempo, _ = librosa.beat.beat_track(y=audio, sr=self.config.audio_sample_rate)
-            features.append(tempo)
-            
-            # Convert to numpy array and pad/truncate
-            features = np.array(features)
-            if len(features) < self.config.voice_feature_dim:
-                features = np.pad(features, (0, self.config.voice_feature_dim - len(features)))
-            else:
-                features = features[:self.config.voice_feature_dim]
-            
-            return features
+            return self.feature_extractor.extract(audio)
             
         except Exception as e:
             logger.error(f"Error extracting voice features: {e}")
             return np.zeros(self.config.voice_feature_dim)
     
+    def extract_voice_features_batch(self, clips: List[np.ndarray]) -> np.ndarray:
+        """Extract voice features for many clips as an (N, voice_feature_dim) matrix."""
+        try:
+            return self.feature_extractor.extract_batch(clips)
+            
+        except Exception as e:
+            logger.error(f"Error extracting batch voice features: {e}")
+            return np.zeros((len(clips), self.config.voice_feature_dim))
+    
+    def create_stream(self, window_seconds: Optional[float] = None) -> StreamingVoiceFeatureExtractor:
+        """Create a streaming extractor over a ring buffer of recent audio."""
+        return StreamingVoiceFeatureExtractor(
+            self.feature_extractor,
+            window_seconds=window_seconds or self.config.voice_stream_window_seconds
+        )
+    
     def recognize_emotion(self, audio: np.ndarray) -> Dict[str, Any]:
         """Recognize emotion from voice."""
         if not self.is_trained:
@@ -475,6 +547,7 @@ class BehavioralEmotionRecognizer:
         self.config = config
         self.model = None
         self.feature_extractor = None
+        self.feature_aggregator = BehavioralFeatureAggregator(config.behavioral_feature_dim)
         self.emotion_classifier = None
         self.is_trained = False
         
@@ -551,6 +624,29 @@ class BehavioralEmotionRecognizer:
             logger.error(f"Error extracting behavioral features: {e}")
             return np.zeros(self.config.behavioral_feature_dim)
     
+    def extract_behavioral_features_batch(self, events: pd.DataFrame,
+                                          student_column: str = 'student_id') -> Tuple[pd.Index, np.ndarray]:
+        """Extract features for every student in a long-format event frame as (student ids, matrix)."""
+        try:
+            aggregator = BehavioralFeatureAggregator(self.config.behavioral_feature_dim,
+                                                     student_column=student_column, timestamp_column=None)
+            aggregator.update(events)
+            return aggregator.features()
+            
+        except Exception as e:
+            logger.error(f"Error extracting batch behavioral features: {e}")
+            return pd.Index([]), np.zeros((0, self.config.behavioral_feature_dim))
+    
+    def update_behavioral_features(self, new_events: pd.DataFrame) -> Tuple[pd.Index, np.ndarray]:
+        """Fold new events into the running per-student features; returns rows for the students updated."""
+        try:
+            updated = self.feature_aggregator.update(new_events)
+            return self.feature_aggregator.features(updated)
+            
+        except Exception as e:
+            logger.error(f"Error updating behavioral features: {e}")
+            return pd.Index([]), np.zeros((0, self.config.behavioral_feature_dim))
+    
     def recognize_emotion(self, behavior_data: pd.DataFrame) -> Dict[str, Any]:
         """Recognize emotion from behavioral patterns."""
         if not self.is_trained:
@@ -650,7 +746,8 @@ class MultiModalEmotionFusion:
         """Fuse emotions from multiple modalities."""
         logger.info("Fusing emotions from multiple modalities...")
         
-        if self.is_trained and self.fusion_model:
+        # The learned model needs all three modalities; partial results use rule-based fusion
+        if self.is_trained and self.fusion_model and facial_emotion and voice_emotion and behavioral_emotion:
             return self._learned_fusion(facial_emotion, voice_emotion, behavioral_emotion)
         else:
             return self._rule_based_fusion(facial_emotion, voice_emotion, behavioral_emotion)
@@ -704,40 +801,34 @@ class MultiModalEmotionFusion:
                            voice_emotion: Dict[str, Any],
                            behavioral_emotion: Dict[str, Any]) -> Dict[str, Any]:
         """Use rule-based fusion to combine emotions."""
-        # Weight each modality based on confidence
-        facial_weight = facial_emotion['confidence']
-        voice_weight = voice_emotion['confidence']
-        behavioral_weight = behavioral_emotion['confidence']
+        # Weight each available modality based on confidence; missing modalities get no weight
+        modalities = {
+            'facial': facial_emotion,
+            'voice': voice_emotion,
+            'behavioral': behavioral_emotion
+        }
+        available = {name: emotion for name, emotion in modalities.items() if emotion}
+        weights = {name: 0.0 for name in modalities}
+        weights.update({name: emotion['confidence'] for name, emotion in available.items()})
         
         # Normalize weights
-        total_weight = facial_weight + voice_weight + behavioral_weight
+        total_weight = sum(weights.values())
         if total_weight > 0:
-            facial_weight /= total_weight
-            voice_weight /= total_weight
-            behavioral_weight /= total_weight
+            weights = {name: weight / total_weight for name, weight in weights.items()}
         else:
-            facial_weight = voice_weight = behavioral_weight = 1.0 / 3.0
+            weights.update({name: 1.0 / len(available) for name in available})
         
         # Weighted average of emotion probabilities
         fused_probabilities = np.zeros(len(self.config.emotion_categories))
-        
-        for i in range(len(self.config.emotion_categories)):
-            fused_probabilities[i] = (
-                facial_emotion['probabilities'][i] * facial_weight +
-                voice_emotion['probabilities'][i] * voice_weight +
-                behavioral_emotion['probabilities'][i] * behavioral_weight
-            )
+        for name, emotion in available.items():
+            fused_probabilities += np.asarray(emotion['probabilities']) * weights[name]
         
         # Get predicted emotion
         predicted_emotion_idx = np.argmax(fused_probabilities)
         predicted_emotion = self.config.emotion_categories[predicted_emotion_idx]
         
         # Calculate confidence as weighted average
-        confidence = (
-            facial_emotion['confidence'] * facial_weight +
-            voice_emotion['confidence'] * voice_weight +
-            behavioral_emotion['confidence'] * behavioral_weight
-        )
+        confidence = sum(emotion['confidence'] * weights[name] for name, emotion in available.items())
         
         # Calculate intensity
         intensity = self._calculate_fused_intensity(fused_probabilities)
@@ -747,11 +838,7 @@ class MultiModalEmotionFusion:
             'confidence': confidence,
             'intensity': intensity,
             'probabilities': fused_probabilities.tolist(),
-            'modality_contributions': {
-                'facial': facial_weight,
-                'voice': voice_weight,
-                'behavioral': behavioral_weight
-            },
+            'modality_contributions': weights,
             'fusion_method': 'rule_based'
         }
     
@@ -768,6 +855,18 @@ class MultiModalEmotionFusion:
         else:
             return 'low'
 
+_modality_executor = None
+_modality_executor_lock = threading.Lock()
+
+def get_modality_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Return the process-wide executor used for concurrent modality recognition."""
+    global _modality_executor
+    with _modality_executor_lock:
+        if _modality_executor is None:
+            _modality_executor = ThreadPoolExecutor(max_workers=max_workers,
+                                                    thread_name_prefix='emotion-modality')
+        return _modality_executor
+
 class EmotionalIntelligenceEngine:
     """Main engine that orchestrates all emotional intelligence components."""
     
@@ -777,15 +876,22 @@ class EmotionalIntelligenceEngine:
         self.voice_recognizer = VoiceEmotionRecognizer(config)
         self.behavioral_recognizer = BehavioralEmotionRecognizer(config)
         self.emotion_fusion = MultiModalEmotionFusion(config)
-        self.emotion_history = []
+        self.history_store = create_emotion_history_store(
+            config.emotion_categories,
+            capacity=config.emotion_history_capacity,
+            path=config.emotion_history_path,
+            retention=timedelta(days=config.emotion_history_retention_days)
+        )
         
     def analyze_emotional_state(self, facial_image: np.ndarray = None,
                                voice_audio: np.ndarray = None,
-                               behavior_data: pd.DataFrame = None) -> Dict[str, Any]:
+                               behavior_data: pd.DataFrame = None,
+                               student_id: str = 'default') -> Dict[str, Any]:
         """Analyze emotional state using available modalities."""
         logger.info("Analyzing emotional state...")
         
         analysis_results = {
+            'student_id': student_id,
             'timestamp': datetime.now().isoformat(),
             'modalities_used': [],
             'facial_analysis': None,
@@ -796,35 +902,27 @@ class EmotionalIntelligenceEngine:
             'recommendations': []
         }
         
-        # Analyze facial expressions
-        if facial_image is not None:
-            try:
-                facial_emotion = self.facial_recognizer.recognize_emotion(facial_image)
-                analysis_results['facial_analysis'] = facial_emotion
-                analysis_results['modalities_used'].append('facial')
-                logger.info(f"Facial emotion detected: {facial_emotion['emotion']}")
-            except Exception as e:
-                logger.error(f"Error in facial emotion recognition: {e}")
+        # Recognize each available modality, in parallel when configured
+        tasks = [
+            (name, recognizer, data)
+            for name, recognizer, data in (
+                ('facial', self.facial_recognizer, facial_image),
+                ('voice', self.voice_recognizer, voice_audio),
+                ('behavioral', self.behavioral_recognizer, behavior_data)
+            )
+            if data is not None
+        ]
         
-        # Analyze voice
-        if voice_audio is not None:
-            try:
-                voice_emotion = self.voice_recognizer.recognize_emotion(voice_audio)
-                analysis_results['voice_analysis'] = voice_emotion
-                analysis_results['modalities_used'].append('voice')
-                logger.info(f"Voice emotion detected: {voice_emotion['emotion']}")
-            except Exception as e:
-                logger.error(f"Error in voice emotion recognition: {e}")
+        if self.config.concurrent_modalities and len(tasks) > 1:
+            modality_results = self._recognize_concurrently(tasks, analysis_results)
+        else:
+            modality_results = self._recognize_sequentially(tasks)
         
-        # Analyze behavior
-        if behavior_data is not None:
-            try:
-                behavioral_emotion = self.behavioral_recognizer.recognize_emotion(behavior_data)
-                analysis_results['behavioral_analysis'] = behavioral_emotion
-                analysis_results['modalities_used'].append('behavioral')
-                logger.info(f"Behavioral emotion detected: {behavioral_emotion['emotion']}")
-            except Exception as e:
-                logger.error(f"Error in behavioral emotion recognition: {e}")
+        for name, _, _ in tasks:
+            if name in modality_results:
+                analysis_results[f'{name}_analysis'] = modality_results[name]
+                analysis_results['modalities_used'].append(name)
+                logger.info(f"{name.capitalize()} emotion detected: {modality_results[name]['emotion']}")
         
         # Fuse emotions if multiple modalities are available
         if len(analysis_results['modalities_used']) > 1:
@@ -846,11 +944,74 @@ class EmotionalIntelligenceEngine:
         analysis_results['recommendations'] = self._generate_emotion_recommendations(analysis_results)
         
         # Store in history
-        self.emotion_history.append(analysis_results)
+        self._record_history(student_id, analysis_results)
         
         logger.info("Emotional state analysis complete")
         return analysis_results
     
+    def _recognize_sequentially(self, tasks: List[Tuple[str, Any, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Run each modality's recognizer one after another."""
+        results = {}
+        for name, recognizer, data in tasks:
+            try:
+                results[name] = recognizer.recognize_emotion(data)
+            except Exception as e:
+                logger.error(f"Error in {name} emotion recognition: {e}")
+        return results
+    
+    def _recognize_concurrently(self, tasks: List[Tuple[str, Any, Any]],
+                                analysis_results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run each modality's recognizer on the shared executor.
+        
+        Modalities still running after modality_timeout_seconds are recorded in
+        ``timed_out_modalities`` and left out; the rest are fused as usual.
+        """
+        executor = get_modality_executor(self.config.modality_workers)
+        futures = {
+            executor.submit(recognizer.recognize_emotion, data): name
+            for name, recognizer, data in tasks
+        }
+        done, not_done = wait(futures, timeout=self.config.modality_timeout_seconds)
+        
+        results = {}
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+            except Exception as e:
+                logger.error(f"Error in {name} emotion recognition: {e}")
+        
+        timed_out = sorted(futures[future] for future in not_done)
+        for future in not_done:
+            future.cancel()
+        if timed_out:
+            analysis_results['timed_out_modalities'] = timed_out
+            logger.warning(f"Emotion recognition timed out after {self.config.modality_timeout_seconds}s "
+                           f"for: {', '.join(timed_out)}")
+        
+        return results
+    
+    def _dominant_analysis(self, analysis_results: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Pick the fused result, falling back to the first single modality available."""
+        for key in ('fused_emotion', 'facial_analysis', 'voice_analysis', 'behavioral_analysis'):
+            if analysis_results.get(key):
+                return analysis_results[key]
+        return None
+    
+    def _record_history(self, student_id: str, analysis_results: Dict[str, Any]):
+        """Append the dominant emotion of an analysis to the student's history."""
+        try:
+            dominant = self._dominant_analysis(analysis_results) or {}
+            self.history_store.append(
+                student_id,
+                dominant.get('emotion'),
+                dominant.get('confidence', 0.0),
+                datetime.fromisoformat(analysis_results['timestamp'])
+            )
+        except Exception as e:
+            logger.error(f"Error recording emotion history: {e}")
+    
     def _generate_emotional_insights(self, analysis_results: Dict[str, Any]) -> Dict[str, Any]:
         """Generate insights from emotional analysis."""
         insights = {
@@ -862,20 +1023,14 @@ class EmotionalIntelligenceEngine:
         }
         
         # Determine dominant emotion
-        if analysis_results['fused_emotion']:
-            insights['dominant_emotion'] = analysis_results['fused_emotion']['emotion']
-        elif analysis_results['facial_analysis']:
-            insights['dominant_emotion'] = analysis_results['facial_analysis']['emotion']
-        elif analysis_results['voice_analysis']:
-            insights['dominant_emotion'] = analysis_results['voice_analysis']['emotion']
-        elif analysis_results['behavioral_analysis']:
-            insights['dominant_emotion'] = analysis_results['behavioral_analysis']['emotion']
+        dominant = self._dominant_analysis(analysis_results)
+        if dominant:
+            insights['dominant_emotion'] = dominant['emotion']
         
         # Analyze emotional stability
-        if len(self.emotion_history) > 1:
-            recent_emotions = [h.get('fused_emotion', {}).get('emotion', 'unknown') 
-                              for h in self.emotion_history[-5:]]
-            unique_emotions = len(set(recent_emotions))
+        recent = self.history_store.recent(analysis_results.get('student_id', 'default'), 5)
+        if len(recent.codes) > 1:
+            unique_emotions = len(np.unique(recent.codes))
             
             if unique_emotions <= 2:
                 insights['emotional_stability'] = 'high'
@@ -957,35 +1112,32 @@ class EmotionalIntelligenceEngine:
         
         return recommendations
     
-    def get_emotion_trends(self, time_window: timedelta = timedelta(days=7)) -> Dict[str, Any]:
+    def get_emotion_trends(self, time_window: timedelta = timedelta(days=7),
+                           student_id: str = 'default') -> Dict[str, Any]:
         """Get emotion trends over a specified time window."""
         cutoff_time = datetime.now() - time_window
         
-        # Filter recent history
-        recent_history = [
-            entry for entry in self.emotion_history
-            if datetime.fromisoformat(entry['timestamp']) > cutoff_time
-        ]
+        # Binary-search the student's history for the window
+        recent_history = self.history_store.window(student_id, cutoff_time)
         
-        if not recent_history:
+        if len(recent_history.codes) == 0:
             return {'message': 'No emotion data available for the specified time window'}
         
         # Analyze trends
-        emotions = [entry.get('fused_emotion', {}).get('emotion', 'unknown') 
-                   for entry in recent_history]
+        emotions = self.history_store.decode(recent_history.codes)
         
         # Count emotions
-        emotion_counts = {}
-        for emotion in emotions:
-            emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+        codes, counts = np.unique(recent_history.codes, return_counts=True)
+        emotion_counts = dict(zip(self.history_store.decode(codes), counts.tolist()))
         
         # Calculate trends
         trends = {
-            'total_analyses': len(recent_history),
+            'total_analyses': len(emotions),
             'emotion_distribution': emotion_counts,
             'most_common_emotion': max(emotion_counts.items(), key=lambda x: x[1])[0] if emotion_counts else 'unknown',
+            'average_confidence': float(recent_history.confidences.mean()),
             'emotional_stability': self._calculate_emotional_stability(emotions),
-            'stress_trend': self._calculate_stress_trend(recent_history)
+            'stress_trend': self._calculate_stress_trend(emotions)
         }
         
         return trends
@@ -1007,14 +1159,11 @@ class EmotionalIntelligenceEngine:
         else:
             return 'low'
     
-    def _calculate_stress_trend(self, history: List[Dict[str, Any]]) -> str:
+    def _calculate_stress_trend(self, emotions: List[str]) -> str:
         """Calculate stress trend over time."""
         stress_emotions = ['angry', 'fearful', 'sad']
         
-        stress_counts = []
-        for entry in history:
-            emotion = entry.get('fused_emotion', {}).get('emotion', 'unknown')
-            stress_counts.append(1 if emotion in stress_emotions else 0)
+        stress_counts = [1 if emotion in stress_emotions else 0 for emotion in emotions]
         
         if len(stress_counts) < 2:
             return 'insufficient_data'
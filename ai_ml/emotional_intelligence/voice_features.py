@@ -0,0 +1,274 @@
+"""
+Shared-STFT Voice Feature Extraction
+Addis Ababa AI School Management System
+
+Computes every spectral and energy feature used by the voice emotion
+recognizer from a single magnitude spectrogram instead of letting each
+librosa feature function recompute its own STFT or mel spectrogram:
+- MFCCs from the mel projection of the power spectrogram
+- Spectral centroid, rolloff and bandwidth and pitch (piptrack) from the
+  magnitude spectrogram
+- Tempo from an onset envelope derived from the same mel spectrogram
+- RMS and zero-crossing rate from the same time-domain frames that feed
+  the FFT
+
+Three modes share one per-frame analysis:
+- ``VoiceFeatureExtractor.extract`` for a single clip
+- ``VoiceFeatureExtractor.extract_batch`` for many clips in one FFT pass
+- ``StreamingVoiceFeatureExtractor`` for live audio over a ring buffer
+"""
+
+import numpy as np
+import scipy.fft
+import librosa
+import logging
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Column layout of the per-frame feature rows
+NUM_MFCC = 13
+COL_CENTROID = NUM_MFCC
+COL_ROLLOFF = NUM_MFCC + 1
+COL_BANDWIDTH = NUM_MFCC + 2
+COL_RMS = NUM_MFCC + 3
+COL_ZCR = NUM_MFCC + 4
+COL_ONSET = NUM_MFCC + 5
+COL_PITCH_SUM = NUM_MFCC + 6
+COL_PITCH_SUMSQ = NUM_MFCC + 7
+COL_PITCH_COUNT = NUM_MFCC + 8
+NUM_FRAME_COLUMNS = NUM_MFCC + 9
+
+# Mel power is floored this many dB below the clip's peak, as
+# librosa.feature.mfcc and librosa.onset.onset_strength do
+TOP_DB = 80.0
+
+
+class VoiceFeatureExtractor:
+    """Extracts the voice feature vector from one shared spectrogram per clip."""
+
+    def __init__(self, sample_rate: int = 16000, feature_dim: int = 256,
+                 n_fft: int = 2048, hop_length: int = 512, n_mels: int = 128,
+                 pitch_threshold: float = 0.1):
+        self.sample_rate = sample_rate
+        self.feature_dim = feature_dim
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.pitch_threshold = pitch_threshold
+
+        # Precomputed once and reused for every frame
+        self.window = librosa.filters.get_window('hann', n_fft, fftbins=True)
+        self.mel_basis = librosa.filters.mel(sr=sample_rate, n_fft=n_fft, n_mels=n_mels)
+
+    def frame_signal(self, audio: np.ndarray) -> np.ndarray:
+        """Centre-pad and frame a clip into an (n_fft, frames) view, as librosa.stft does."""
+        audio = np.ascontiguousarray(audio, dtype=np.float32)
+        padded = np.pad(audio, self.n_fft // 2, mode='constant')
+        if len(padded) < self.n_fft:
+            padded = np.pad(padded, (0, self.n_fft - len(padded)))
+        return librosa.util.frame(padded, frame_length=self.n_fft, hop_length=self.hop_length)
+
+    def analyze_frames(self, frames: np.ndarray,
+                       previous_mel_db: Optional[np.ndarray] = None,
+                       segment_starts: Optional[np.ndarray] = None,
+                       peak_db: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, Optional[float]]:
+        """
+        Compute per-frame features for an (n_fft, T) block of time-domain frames.
+
+        Returns a (T, NUM_FRAME_COLUMNS) array, the last mel-dB column and the
+        peak mel dB; a streaming caller passes the last two back in to continue
+        the onset envelope and the dB floor. ``segment_starts`` marks frames
+        that begin a new clip (no onset from the previous frame, own floor).
+        """
+        num_frames = frames.shape[1]
+        rows = np.zeros((num_frames, NUM_FRAME_COLUMNS))
+        if num_frames == 0:
+            return rows, previous_mel_db, peak_db
+
+        # The only FFT: magnitude spectrogram shared by every feature below
+        magnitude = np.abs(np.fft.rfft(frames * self.window[:, None], axis=0))
+        power = magnitude ** 2
+
+        # MFCC from the mel projection of the power spectrogram
+        mel_db = librosa.power_to_db(self.mel_basis @ power, top_db=None)
+
+        # Floor at TOP_DB below the peak of each clip (of the stream so far)
+        starts = np.asarray(segment_starts if segment_starts is not None else [0])
+        peaks = np.maximum.reduceat(mel_db.max(axis=0), starts)
+        if peak_db is not None and segment_starts is None:
+            peaks = np.maximum(peaks, peak_db)
+        floor = np.repeat(peaks, np.diff(np.append(starts, num_frames))) - TOP_DB
+        mel_db = np.maximum(mel_db, floor)
+        rows[:, :NUM_MFCC] = scipy.fft.dct(mel_db, axis=0, type=2, norm='ortho')[:NUM_MFCC].T
+
+        # Spectral shape
+        centroid = librosa.feature.spectral_centroid(S=magnitude, sr=self.sample_rate, n_fft=self.n_fft)
+        rows[:, COL_CENTROID] = centroid[0]
+        rows[:, COL_ROLLOFF] = librosa.feature.spectral_rolloff(S=magnitude, sr=self.sample_rate,
+                                                                n_fft=self.n_fft)[0]
+        rows[:, COL_BANDWIDTH] = librosa.feature.spectral_bandwidth(S=magnitude, sr=self.sample_rate,
+                                                                    n_fft=self.n_fft, centroid=centroid)[0]
+
+        # Energy: RMS and zero-crossing rate from the frames that fed the FFT
+        rows[:, COL_RMS] = np.sqrt(np.mean(frames.astype(np.float64) ** 2, axis=0))
+        sign_changes = np.abs(np.diff(np.signbit(frames).astype(np.int8), axis=0))
+        rows[:, COL_ZCR] = sign_changes.mean(axis=0)
+
+        # Onset strength (spectral flux of the mel spectrogram) for tempo estimation
+        previous = np.empty_like(mel_db)
+        previous[:, 1:] = mel_db[:, :-1]
+        previous[:, 0] = previous_mel_db if previous_mel_db is not None else mel_db[:, 0]
+        onset = np.maximum(0.0, mel_db - previous).mean(axis=0)
+        if segment_starts is not None:
+            onset[segment_starts] = 0.0
+        rows[:, COL_ONSET] = onset
+
+        # Pitch: keep sums so mean/std can be aggregated over any set of frames
+        pitches, magnitudes = librosa.piptrack(S=magnitude, sr=self.sample_rate, n_fft=self.n_fft,
+                                               hop_length=self.hop_length)
+        selected = np.where(magnitudes > self.pitch_threshold, pitches, 0.0)
+        rows[:, COL_PITCH_SUM] = selected.sum(axis=0)
+        rows[:, COL_PITCH_SUMSQ] = (selected ** 2).sum(axis=0)
+        rows[:, COL_PITCH_COUNT] = (magnitudes > self.pitch_threshold).sum(axis=0)
+
+        return rows, mel_db[:, -1].copy(), float(peaks[-1])
+
+    def summarize(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Reduce per-frame rows to the recognizer's feature vector.
+
+        Layout (padded with zeros to feature_dim): MFCC means (13), MFCC stds (13),
+        centroid/rolloff/bandwidth mean and std (6), pitch mean and std (2),
+        RMS mean and std, zero-crossing-rate mean and std (4), tempo (1).
+        """
+        features = np.zeros(self.feature_dim)
+        if len(rows) == 0:
+            return features
+
+        mfcc = rows[:, :NUM_MFCC]
+        spectral = rows[:, [COL_CENTROID, COL_ROLLOFF, COL_BANDWIDTH]]
+        energy = rows[:, [COL_RMS, COL_ZCR]]
+
+        pitch_count = rows[:, COL_PITCH_COUNT].sum()
+        if pitch_count > 0:
+            pitch_mean = rows[:, COL_PITCH_SUM].sum() / pitch_count
+            pitch_std = np.sqrt(max(0.0, rows[:, COL_PITCH_SUMSQ].sum() / pitch_count - pitch_mean ** 2))
+        else:
+            pitch_mean = pitch_std = 0.0
+
+        tempo = 0.0
+        if len(rows) > 1:
+            tempo = float(librosa.feature.tempo(onset_envelope=rows[:, COL_ONSET], sr=self.sample_rate,
+                                                hop_length=self.hop_length)[0])
+
+        values = np.concatenate([
+            mfcc.mean(axis=0), mfcc.std(axis=0),
+            np.column_stack([spectral.mean(axis=0), spectral.std(axis=0)]).ravel(),
+            [pitch_mean, pitch_std],
+            np.column_stack([energy.mean(axis=0), energy.std(axis=0)]).ravel(),
+            [tempo]
+        ])
+        width = min(len(values), self.feature_dim)
+        features[:width] = values[:width]
+        return features
+
+    def extract(self, audio: np.ndarray) -> np.ndarray:
+        """Extract the feature vector for one clip."""
+        rows, _, _ = self.analyze_frames(self.frame_signal(audio))
+        return self.summarize(rows)
+
+    def extract_batch(self, clips: List[np.ndarray]) -> np.ndarray:
+        """
+        Extract feature vectors for many clips as an (N, feature_dim) matrix.
+
+        Frames of all clips are concatenated so the FFT, mel projection and
+        spectral features run once over the whole batch; rows are then split
+        back per clip for the summary statistics.
+        """
+        output = np.zeros((len(clips), self.feature_dim))
+        if not clips:
+            return output
+
+        framed = [self.frame_signal(clip) for clip in clips]
+        lengths = np.array([block.shape[1] for block in framed])
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+
+        rows, _, _ = self.analyze_frames(np.concatenate(framed, axis=1), segment_starts=offsets[:-1])
+
+        for idx in range(len(clips)):
+            output[idx] = self.summarize(rows[offsets[idx]:offsets[idx + 1]])
+        return output
+
+
+class StreamingVoiceFeatureExtractor:
+    """
+    Maintains voice features over a ring buffer of the most recent audio.
+
+    Each pushed chunk is framed and analysed once; only the per-frame rows
+    are kept (a bounded ring of window_seconds of frames), so refreshing the
+    features never re-transforms audio that has already been seen.
+    """
+
+    def __init__(self, extractor: VoiceFeatureExtractor, window_seconds: float = 10.0):
+        self.extractor = extractor
+        self.capacity = max(2, int(window_seconds * extractor.sample_rate / extractor.hop_length))
+        self._rows = np.zeros((self.capacity, NUM_FRAME_COLUMNS))
+        self._start = 0
+        self._size = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._previous_mel_db = None
+        self._peak_db = None
+
+    @property
+    def num_frames(self) -> int:
+        return self._size
+
+    def reset(self):
+        """Drop all buffered audio and frame features."""
+        self._start = 0
+        self._size = 0
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._previous_mel_db = None
+        self._peak_db = None
+
+    def push(self, chunk: np.ndarray) -> int:
+        """Add a chunk of audio samples; returns the number of new frames analysed."""
+        samples = np.concatenate([self._pending, np.asarray(chunk, dtype=np.float32).ravel()])
+        n_fft, hop_length = self.extractor.n_fft, self.extractor.hop_length
+
+        if len(samples) < n_fft:
+            self._pending = samples
+            return 0
+
+        frames = librosa.util.frame(samples, frame_length=n_fft, hop_length=hop_length)
+        num_frames = frames.shape[1]
+        rows, self._previous_mel_db, self._peak_db = self.extractor.analyze_frames(
+            frames, self._previous_mel_db, peak_db=self._peak_db
+        )
+        # Keep the samples the next frame still needs
+        self._pending = samples[num_frames * hop_length:].copy()
+
+        self._append(rows)
+        return num_frames
+
+    def _append(self, rows: np.ndarray):
+        rows = rows[-self.capacity:]
+        end = (self._start + self._size) % self.capacity
+        first = min(len(rows), self.capacity - end)
+        self._rows[end:end + first] = rows[:first]
+        self._rows[:len(rows) - first] = rows[first:]
+
+        overflow = max(0, self._size + len(rows) - self.capacity)
+        self._start = (self._start + overflow) % self.capacity
+        self._size = min(self.capacity, self._size + len(rows))
+
+    def frame_rows(self) -> np.ndarray:
+        """Buffered per-frame rows in time order."""
+        end = self._start + self._size
+        if end <= self.capacity:
+            return self._rows[self._start:end]
+        return np.concatenate([self._rows[self._start:], self._rows[:end - self.capacity]])
+
+    def features(self) -> np.ndarray:
+        """Feature vector over the buffered window."""
+        return self.extractor.summarize(self.frame_rows())
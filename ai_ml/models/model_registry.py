@@ -0,0 +1,401 @@
+"""
+Versioned Model Registry for Educational AI
+Addis Ababa AI School Management System
+
+Stores and serves trained models:
+- Versioned artifacts under ``<root>/<name>/<version>/`` with a metadata
+  file holding the SHA-256 checksum, size, format and caller metadata
+- A ``current.json`` pointer per model, replaced atomically, so promoting
+  or rolling back a version is picked up by running workers without a restart
+- Lazy loading on first use, with checksum verification
+- An LRU cache bounded by model count and by estimated memory
+"""
+
+import hashlib
+import importlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+import joblib
+import torch
+
+logger = logging.getLogger(__name__)
+
+METADATA_NAME = 'metadata.json'
+CURRENT_POINTER_NAME = 'current.json'
+
+# Artifact file name per storage format
+ARTIFACT_NAMES = {
+    'predictor': 'model.joblib',  # EducationalPredictor.save_model output
+    'torch': 'model.pt',          # whole nn.Module saved with torch.save
+    'joblib': 'model.joblib',     # any other picklable model
+}
+
+
+def file_checksum(path: str, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json_atomic(path: str, data: Dict[str, Any]):
+    """Write JSON to a temporary file and rename it over ``path``."""
+    temporary = f"{path}.tmp.{os.getpid()}.{threading.get_ident()}"
+    with open(temporary, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(temporary, path)
+
+
+def estimate_model_bytes(model: Any, fallback: int = 0) -> int:
+    """
+    Approximate resident size of a loaded model.
+
+    Torch modules are measured from their parameters and buffers; other
+    models use ``fallback`` (the artifact size on disk, a reasonable proxy
+    for pickled sklearn estimators).
+    """
+    if isinstance(model, torch.nn.Module):
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(tensor.numel() * tensor.element_size() for tensor in tensors)
+    return fallback
+
+
+class ModelCache:
+    """Thread-safe LRU cache of loaded models bounded by count and estimated memory."""
+
+    def __init__(self, max_models: int = 10, max_memory_mb: Optional[float] = None):
+        self.max_models = max_models
+        self.max_bytes = int(max_memory_mb * 1024 * 1024) if max_memory_mb else None
+        self._entries: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.RLock()
+        self._key_locks: Dict[Hashable, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def keys(self) -> List[Hashable]:
+        with self._lock:
+            return list(self._entries)
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(size for _, size in self._entries.values())
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached model for ``key`` (marked most recently used), or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, model: Any, size_bytes: int = 0):
+        """Insert a model and evict least recently used entries over the bounds."""
+        with self._lock:
+            self._entries[key] = (model, size_bytes)
+            self._entries.move_to_end(key)
+            self._evict(keep=key)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Tuple[Any, int]]) -> Any:
+        """
+        Cached model for ``key``, calling ``loader`` on a miss.
+
+        ``loader`` returns ``(model, size_bytes)``. Concurrent misses on the
+        same key wait for a single load instead of loading twice.
+        """
+        model = self.get(key)
+        if model is not None:
+            return model
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    return entry[0]
+            model, size_bytes = loader()
+            self.put(key, model, size_bytes)
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return model
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return entry[0] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self, keep: Hashable):
+        while len(self._entries) > 1 and (
+            len(self._entries) > self.max_models
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            oldest = next(iter(self._entries))
+            if oldest == keep:
+                break
+            self._entries.pop(oldest)
+            self.evictions += 1
+            logger.info(f"Evicted model {oldest} from cache")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'cached_models': len(self._entries),
+                'max_models': self.max_models,
+                'memory_mb': self.total_bytes / (1024 * 1024),
+                'max_memory_mb': self.max_bytes / (1024 * 1024) if self.max_bytes is not None else None,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+
+class ModelRegistry:
+    """
+    Versioned on-disk model store with lazy, cached loading.
+
+    ``register`` writes a new version and (by default) promotes it;
+    ``get_model`` resolves the current version on every call, so a
+    promotion by any process takes effect on the next request.
+    """
+
+    def __init__(self, root: str, cache: Optional[ModelCache] = None):
+        self.root = root
+        self.cache = cache if cache is not None else ModelCache()
+        self.load_errors: Dict[str, str] = {}
+        self._pointer_cache: Dict[str, Tuple[int, Optional[str]]] = {}
+        # Metadata is written once per version, so it never needs re-reading
+        self._metadata_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # Current version per model whose older cached versions were last dropped
+        self._swept_versions: Dict[str, str] = {}
+        os.makedirs(root, exist_ok=True)
+
+    # Storage
+
+    def _model_dir(self, name: str) -> str:
+        return os.path.join(self.root, name)
+
+    def _version_dir(self, name: str, version: str) -> str:
+        return os.path.join(self.root, name, version)
+
+    def _next_version(self, name: str) -> str:
+        numbers = [int(version[1:]) for version in self.list_versions(name)
+                   if version.startswith('v') and version[1:].isdigit()]
+        return f"v{max(numbers, default=0) + 1}"
+
+    def register(self, name: str, model: Any, metadata: Optional[Dict[str, Any]] = None,
+                 version: Optional[str] = None, promote: bool = True) -> Dict[str, Any]:
+        """
+        Save ``model`` as a new version of ``name`` and return its metadata.
+
+        Predictors are saved with their own ``save_model``, torch modules
+        with ``torch.save`` and anything else with joblib.
+        """
+        version = version or self._next_version(name)
+        version_dir = self._version_dir(name, version)
+        if os.path.exists(os.path.join(version_dir, METADATA_NAME)):
+            raise ValueError(f"Model {name} already has a version {version}")
+        os.makedirs(version_dir, exist_ok=True)
+
+        if hasattr(model, 'save_model') and hasattr(model, 'load_model'):
+            artifact_format = 'predictor'
+        elif isinstance(model, torch.nn.Module):
+            artifact_format = 'torch'
+        else:
+            artifact_format = 'joblib'
+
+        path = os.path.join(version_dir, ARTIFACT_NAMES[artifact_format])
+        if artifact_format == 'predictor':
+            model.save_model(path)
+        elif artifact_format == 'torch':
+            torch.save(model, path)
+        else:
+            joblib.dump(model, path)
+
+        model_metadata = {
+            'name': name,
+            'version': version,
+            'format': artifact_format,
+            'model_class': f"{type(model).__module__}:{type(model).__qualname__}",
+            'artifact': os.path.basename(path),
+            'checksum': file_checksum(path),
+            'size_bytes': os.path.getsize(path),
+            'memory_bytes': estimate_model_bytes(model, os.path.getsize(path)),
+            'created_at': datetime.now().isoformat(),
+            'metadata': metadata or {}
+        }
+        _write_json_atomic(os.path.join(version_dir, METADATA_NAME), model_metadata)
+        self._metadata_cache[(name, version)] = model_metadata
+        logger.info(f"Registered model {name} version {version}")
+
+        if promote:
+            self.promote(name, version)
+        return model_metadata
+
+    def list_models(self) -> List[str]:
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root)
+                      if os.path.isdir(self._model_dir(entry)))
+
+    def list_versions(self, name: str) -> List[str]:
+        """Versions of ``name`` that have metadata, oldest first."""
+        model_dir = self._model_dir(name)
+        if not os.path.isdir(model_dir):
+            return []
+        versions = [entry for entry in os.listdir(model_dir)
+                    if os.path.exists(os.path.join(model_dir, entry, METADATA_NAME))]
+        return sorted(versions, key=lambda version: self.get_metadata(name, version)['created_at'])
+
+    def get_metadata(self, name: str, version: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+        cached = self._metadata_cache.get((name, version))
+        if cached is not None:
+            return cached
+
+        path = os.path.join(self._version_dir(name, version), METADATA_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            metadata = json.load(f)
+        self._metadata_cache[(name, version)] = metadata
+        return metadata
+
+    # Version pointer
+
+    def promote(self, name: str, version: str):
+        """Make ``version`` the current version of ``name`` (hot swap or rollback)."""
+        if self.get_metadata(name, version) is None:
+            raise ValueError(f"Model {name} has no version {version}")
+        _write_json_atomic(os.path.join(self._model_dir(name), CURRENT_POINTER_NAME), {
+            'version': version,
+            'promoted_at': datetime.now().isoformat()
+        })
+        self._pointer_cache.pop(name, None)
+        logger.info(f"Promoted model {name} to version {version}")
+
+    def current_version(self, name: str) -> Optional[str]:
+        """Current version of ``name``; re-read only when the pointer file changes."""
+        path = os.path.join(self._model_dir(name), CURRENT_POINTER_NAME)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        cached = self._pointer_cache.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with open(path) as f:
+            version = json.load(f).get('version')
+        self._pointer_cache[name] = (mtime, version)
+        return version
+
+    # Loading
+
+    def _load_artifact(self, metadata: Dict[str, Any]) -> Tuple[Any, int]:
+        """Load a version's artifact after verifying its checksum."""
+        path = os.path.join(self._version_dir(metadata['name'], metadata['version']), metadata['artifact'])
+        checksum = file_checksum(path)
+        if checksum != metadata['checksum']:
+            raise ValueError(f"Checksum mismatch for {metadata['name']} {metadata['version']}")
+
+        artifact_format = metadata['format']
+        if artifact_format == 'predictor':
+            module_name, class_name = metadata['model_class'].split(':')
+            predictor_class = getattr(importlib.import_module(module_name), class_name)
+            model = predictor_class.from_file(path)
+        elif artifact_format == 'torch':
+            model = torch.load(path, map_location='cpu', weights_only=False)
+            model.eval()
+        else:
+            model = joblib.load(path)
+
+        logger.info(f"Loaded model {metadata['name']} version {metadata['version']}")
+        return model, estimate_model_bytes(model, metadata.get('memory_bytes', metadata['size_bytes']))
+
+    def get_model(self, name: str, version: Optional[str] = None) -> Optional[Any]:
+        """
+        Model ``name`` at ``version`` (default: current), loaded on first use.
+
+        Returns None when the model has no registered version. When a new
+        current version is loaded, cached older versions of the same model
+        are dropped.
+        """
+        version = version or self.current_version(name)
+        if version is None:
+            return None
+        metadata = self.get_metadata(name, version)
+        if metadata is None:
+            return None
+
+        key = ('registry', name, version)
+        try:
+            model = self.cache.get_or_load(key, lambda: self._load_artifact(metadata))
+        except Exception as e:
+            self.load_errors[name] = str(e)
+            logger.error(f"Error loading model {name} version {version}: {e}")
+            raise
+        self.load_errors.pop(name, None)
+
+        # Sweep once per newly current version rather than on every call
+        if self._swept_versions.get(name) != version and version == self.current_version(name):
+            for cached_key in self.cache.keys():
+                if cached_key[:2] == ('registry', name) and cached_key != key:
+                    self.cache.pop(cached_key)
+            self._swept_versions[name] = version
+        return model
+
+    def _loaded_versions(self, name: str) -> List[str]:
+        return [key[2] for key in self.cache.keys() if key[:2] == ('registry', name)]
+
+    def load_states(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model current version and whether it is loaded, not loaded or failed."""
+        states = {}
+        for name in self.list_models():
+            version = self.current_version(name)
+            loaded_versions = self._loaded_versions(name)
+            if name in self.load_errors:
+                state = 'error'
+            elif version is None:
+                state = 'unregistered'
+            elif version in loaded_versions:
+                state = 'loaded'
+            else:
+                state = 'not_loaded'
+            states[name] = {
+                'current_version': version,
+                'state': state,
+                'loaded_versions': loaded_versions,
+                'versions': self.list_versions(name)
+            }
+            if state == 'error':
+                states[name]['error'] = self.load_errors[name]
+        return states
@@ -307,9 +307,9 @@ class LearningPatternRecognizer(nn.Module):
             bidirectional=True
         )
         
-        # Behavioral feature processing
+        # Behavioral feature processing (matches the bidirectional LSTM state size)
         self.behavioral_encoder = nn.Sequential(
-            nn.Linear(behavioral_feature_dim, hidden_dim),
+            nn.Linear(behavioral_feature_dim, hidden_dim * 2),
             nn.ReLU(),
             nn.Dropout(0.2)
         )
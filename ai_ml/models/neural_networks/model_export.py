@@ -0,0 +1,317 @@
+"""
+Model Export and Optimized Serving for Educational AI
+Addis Ababa AI School Management System
+
+Exports the educational neural networks for CPU inference:
+- TorchScript (traced) artifacts
+- ONNX artifacts (when the onnx/onnxruntime packages are installed)
+- Dynamically int8-quantized variants of both
+- Output parity checks of every variant against the eager model
+- A manifest per model that the serving layer reads to load the best
+  variant that passed its parity check
+"""
+
+import torch
+import torch.nn as nn
+import inspect
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+# Preferred order when several variants passed their parity check
+DEFAULT_VARIANT_ORDER = ['onnx_int8', 'torchscript_int8', 'onnx', 'torchscript']
+
+
+def onnx_available() -> bool:
+    """Whether ONNX export and onnxruntime inference can be used."""
+    try:
+        import onnx  # noqa: F401
+        import onnxruntime  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@dataclass
+class ExportConfig:
+    """Configuration for model export."""
+    output_dir: str = 'models/exported'
+    formats: List[str] = field(default_factory=lambda: ['torchscript', 'onnx'])
+    quantize: bool = True
+    # Parity is measured as max |optimized - eager| / max(1, max |eager|) over all outputs
+    tolerance: float = 1e-4
+    quantized_tolerance: float = 5e-2
+    onnx_opset: int = 17
+
+
+def _flatten_outputs(outputs) -> Tuple[Optional[List[str]], List[torch.Tensor]]:
+    """Split model outputs into (dict keys or None, list of tensors)."""
+    if isinstance(outputs, dict):
+        return list(outputs.keys()), list(outputs.values())
+    if isinstance(outputs, (tuple, list)):
+        return None, list(outputs)
+    return None, [outputs]
+
+
+def _relative_difference(reference: Sequence[torch.Tensor], candidate: Sequence[torch.Tensor]) -> Tuple[float, float]:
+    """Max absolute difference and the same difference relative to the output scale."""
+    max_diff = 0.0
+    scale = 1.0
+    for expected, actual in zip(reference, candidate):
+        expected = expected.detach().float()
+        actual = torch.as_tensor(actual).float()
+        max_diff = max(max_diff, (expected - actual).abs().max().item())
+        scale = max(scale, expected.abs().max().item())
+    return max_diff, max_diff / scale
+
+
+def dynamic_quantization_targets(model: nn.Module) -> set:
+    """
+    Names of the Linear/LSTM modules that can be dynamically quantized.
+
+    Linear layers inside TransformerEncoderLayer are skipped: its fast-path
+    check reads ``linear.weight`` as a tensor, which quantized Linear does
+    not provide.
+    """
+    excluded = [name for name, module in model.named_modules()
+                if isinstance(module, (nn.TransformerEncoderLayer, nn.MultiheadAttention))]
+    return {
+        name for name, module in model.named_modules()
+        if isinstance(module, (nn.Linear, nn.LSTM))
+        and not any(name.startswith(prefix + '.') for prefix in excluded)
+    }
+
+
+class OptimizedModel:
+    """Callable wrapper around an exported artifact with the eager model's call signature."""
+
+    def __init__(self, name: str, variant: str, path: str, output_keys: Optional[List[str]],
+                 input_names: List[str]):
+        self.name = name
+        self.variant = variant
+        self.path = path
+        self.output_keys = output_keys
+        self.input_names = input_names
+        self.is_onnx = variant.startswith('onnx')
+
+        if self.is_onnx:
+            import onnxruntime
+            options = onnxruntime.SessionOptions()
+            options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            self.session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+            self.module = None
+        else:
+            self.session = None
+            self.module = torch.jit.load(path, map_location='cpu')
+            self.module.eval()
+
+    def eval(self):
+        """No-op for compatibility with nn.Module callers."""
+        return self
+
+    def __call__(self, *inputs: torch.Tensor):
+        if not self.is_onnx:
+            with torch.no_grad():
+                return self.module(*inputs)
+
+        feeds = {name: tensor.detach().cpu().numpy() for name, tensor in zip(self.input_names, inputs)}
+        outputs = [torch.from_numpy(output) for output in self.session.run(None, feeds)]
+        if self.output_keys is not None:
+            return dict(zip(self.output_keys, outputs))
+        return outputs[0] if len(outputs) == 1 else tuple(outputs)
+
+    def __repr__(self):
+        return f"OptimizedModel(name={self.name!r}, variant={self.variant!r})"
+
+
+class ModelExporter:
+    """Exports eager models to TorchScript/ONNX (fp32 and int8) and checks parity."""
+
+    def __init__(self, config: ExportConfig = None):
+        self.config = config or ExportConfig()
+
+    def export(self, model: nn.Module, example_inputs: Tuple[torch.Tensor, ...], name: str,
+               parity_inputs: Optional[Tuple[torch.Tensor, ...]] = None) -> Dict[str, Any]:
+        """
+        Export a model and write its manifest.
+
+        ``example_inputs`` are used for tracing; optional arguments not in
+        the example are not part of the exported graph. Parity is checked on
+        ``parity_inputs`` (defaults to the example inputs with a different
+        batch size, to exercise the dynamic batch dimension).
+        """
+        model = model.cpu().eval()
+        model_dir = os.path.join(self.config.output_dir, name)
+        os.makedirs(model_dir, exist_ok=True)
+
+        if parity_inputs is None:
+            half = max(1, example_inputs[0].shape[0] // 2)
+            parity_inputs = tuple(tensor[:half] for tensor in example_inputs)
+
+        with torch.no_grad():
+            output_keys, reference = _flatten_outputs(model(*parity_inputs))
+            _, example_outputs = _flatten_outputs(model(*example_inputs))
+
+        input_names = [f'input_{i}' for i in range(len(example_inputs))]
+        output_names = output_keys or [f'output_{i}' for i in range(len(example_outputs))]
+
+        manifest = {
+            'name': name,
+            'model_class': type(model).__name__,
+            'created_at': datetime.now().isoformat(),
+            'torch_version': torch.__version__,
+            'input_names': input_names,
+            'output_keys': output_keys,
+            'input_shapes': [list(tensor.shape) for tensor in example_inputs],
+            'variants': {}
+        }
+
+        quantized_model = None
+        if self.config.quantize:
+            quantized_model = torch.ao.quantization.quantize_dynamic(
+                model, dynamic_quantization_targets(model), dtype=torch.qint8
+            )
+
+        if 'torchscript' in self.config.formats:
+            self._export_torchscript(model, example_inputs, os.path.join(model_dir, 'model.ts.pt'),
+                                     'torchscript', manifest)
+            if quantized_model is not None:
+                self._export_torchscript(quantized_model, example_inputs,
+                                         os.path.join(model_dir, 'model.int8.ts.pt'), 'torchscript_int8', manifest)
+
+        if 'onnx' in self.config.formats:
+            if onnx_available():
+                self._export_onnx(model, example_inputs, input_names, output_names, model_dir, manifest)
+            else:
+                logger.warning("onnx/onnxruntime not installed; skipping ONNX export")
+
+        for variant, entry in manifest['variants'].items():
+            self._check_parity(manifest, variant, entry, parity_inputs, reference)
+
+        with open(os.path.join(model_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"Exported {name}: " + ', '.join(
+            f"{variant} ({'ok' if entry.get('parity_passed') else 'failed'})"
+            for variant, entry in manifest['variants'].items()
+        ))
+        return manifest
+
+    def _export_torchscript(self, model: nn.Module, example_inputs: Tuple[torch.Tensor, ...],
+                            path: str, variant: str, manifest: Dict[str, Any]):
+        """Trace a model to TorchScript."""
+        try:
+            with torch.no_grad():
+                traced = torch.jit.trace(model, example_inputs, strict=False, check_trace=False)
+                traced = torch.jit.freeze(traced) if not variant.endswith('int8') else traced
+            torch.jit.save(traced, path)
+            manifest['variants'][variant] = self._variant_entry(path, 'torchscript', variant.endswith('int8'))
+        except Exception as e:
+            logger.error(f"TorchScript export failed for {manifest['name']} ({variant}): {e}")
+
+    def _export_onnx(self, model: nn.Module, example_inputs: Tuple[torch.Tensor, ...],
+                     input_names: List[str], output_names: List[str], model_dir: str,
+                     manifest: Dict[str, Any]):
+        """Export a model to ONNX with a dynamic batch dimension, plus an int8 variant."""
+        path = os.path.join(model_dir, 'model.onnx')
+        try:
+            dynamic_axes = {axis_name: {0: 'batch'} for axis_name in input_names + output_names}
+            export_kwargs = {}
+            if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+                # Newer torch defaults to the dynamo exporter; keep the TorchScript-based one
+                export_kwargs['dynamo'] = False
+            torch.onnx.export(
+                model, example_inputs, path,
+                input_names=input_names, output_names=output_names,
+                dynamic_axes=dynamic_axes, opset_version=self.config.onnx_opset, **export_kwargs
+            )
+            manifest['variants']['onnx'] = self._variant_entry(path, 'onnx', False)
+        except Exception as e:
+            logger.error(f"ONNX export failed for {manifest['name']}: {e}")
+            return
+
+        if self.config.quantize:
+            quantized_path = os.path.join(model_dir, 'model.int8.onnx')
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+                quantize_dynamic(path, quantized_path, weight_type=QuantType.QInt8)
+                manifest['variants']['onnx_int8'] = self._variant_entry(quantized_path, 'onnx', True)
+            except Exception as e:
+                logger.error(f"ONNX quantization failed for {manifest['name']}: {e}")
+
+    @staticmethod
+    def _variant_entry(path: str, export_format: str, quantized: bool) -> Dict[str, Any]:
+        return {
+            'path': os.path.basename(path),
+            'format': export_format,
+            'quantized': quantized,
+            'size_mb': os.path.getsize(path) / (1024 * 1024)
+        }
+
+    def _check_parity(self, manifest: Dict[str, Any], variant: str, entry: Dict[str, Any],
+                      parity_inputs: Tuple[torch.Tensor, ...], reference: List[torch.Tensor]):
+        """Run a variant on the parity inputs and record its difference from the eager model."""
+        tolerance = self.config.quantized_tolerance if entry['quantized'] else self.config.tolerance
+        try:
+            optimized = OptimizedModel(
+                manifest['name'], variant,
+                os.path.join(self.config.output_dir, manifest['name'], entry['path']),
+                manifest['output_keys'], manifest['input_names']
+            )
+            _, outputs = _flatten_outputs(optimized(*parity_inputs))
+            max_diff, relative_diff = _relative_difference(reference, outputs)
+            entry.update({
+                'max_abs_diff': max_diff,
+                'relative_diff': relative_diff,
+                'tolerance': tolerance,
+                'parity_passed': bool(relative_diff <= tolerance)
+            })
+        except Exception as e:
+            logger.error(f"Parity check failed to run for {manifest['name']} ({variant}): {e}")
+            entry.update({'parity_passed': False, 'error': str(e), 'tolerance': tolerance})
+
+
+def read_manifest(model_dir: str, name: str) -> Optional[Dict[str, Any]]:
+    """Read an exported model's manifest, or None if the model was never exported."""
+    path = os.path.join(model_dir, name, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def load_optimized_model(model_dir: str, name: str,
+                         variant_order: Optional[List[str]] = None) -> Optional[OptimizedModel]:
+    """
+    Load the first variant in ``variant_order`` that passed its parity check.
+
+    Returns None when the model has no usable exported artifact, so the
+    caller can fall back to the eager model.
+    """
+    manifest = read_manifest(model_dir, name)
+    if manifest is None:
+        return None
+
+    has_onnx = onnx_available()
+    for variant in variant_order or DEFAULT_VARIANT_ORDER:
+        entry = manifest['variants'].get(variant)
+        if not entry or not entry.get('parity_passed'):
+            continue
+        if entry['format'] == 'onnx' and not has_onnx:
+            continue
+        try:
+            model = OptimizedModel(name, variant, os.path.join(model_dir, name, entry['path']),
+                                   manifest['output_keys'], manifest['input_names'])
+            logger.info(f"Loaded optimized model {name} ({variant})")
+            return model
+        except Exception as e:
+            logger.error(f"Error loading {variant} artifact for {name}: {e}")
+
+    return None
@@ -9,7 +9,7 @@ including hyperparameter optimization, automated training, and model evaluation.
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from torch.utils.data import DataLoader, Dataset, random_split
+from torch.utils.data import DataLoader
 import numpy as np
 import pandas as pd
 from sklearn.model_selection import train_test_split
@@ -20,14 +20,26 @@ import mlflow
 import logging
 import json
 import os
+import shutil
+import time
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import Dict, List, Tuple, Optional, Any, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import warnings
 warnings.filterwarnings('ignore')
 
+from .array_dataset import ArrayDataset, create_batch_loader, write_npy_shards
+from .training_profiler import EpochProfiler
+from .mixed_precision import autocast, configure_threads, create_grad_scaler, resolve_autocast_dtype
+from .metric_logger import AsyncMetricLogger
+from .checkpointing import CheckpointManager, capture_rng_state, restore_rng_state
+from ...analytics.drift import drift_report, fit_drift_reference
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -64,31 +76,65 @@ class TrainingConfig:
     numerical_columns: List[str] = None
     
     # Advanced parameters
-    use_mixed_precision: bool = True
+    use_mixed_precision: bool = True  # bfloat16 autocast where supported natively, else float32
+    intra_op_threads: int = 0  # torch CPU threads per op (0 = torch default)
+    inter_op_threads: int = 0  # torch CPU threads running independent ops (0 = torch default)
     gradient_clipping: float = 1.0
     label_smoothing: float = 0.1
     focal_loss_alpha: float = 1.0
     focal_loss_gamma: float = 2.0
-
-class EducationalDataset(Dataset):
-    """Custom dataset for educational data."""
     
-    def __init__(self, features: np.ndarray, targets: np.ndarray, transform=None):
-        self.features = torch.FloatTensor(features)
-        self.targets = torch.LongTensor(targets)
-        self.transform = transform
+    # Hyperparameter search parameters
+    hpo_n_jobs: int = 1  # trials run in this many processes
+    hpo_trial_epochs: int = 50  # epochs per trial (pruning usually stops weak trials sooner)
+    hpo_pruner: str = 'median'  # 'median', 'successive_halving', 'hyperband' or 'none'
+    hpo_storage: Optional[str] = None  # database URL or journal file path; temporary journal when parallel
+    hpo_study_name: Optional[str] = None  # study to resume from hpo_storage; without it every run starts a fresh study
     
-    def __len__(self):
-        return len(self.features)
+    # Incremental training parameters
+    incremental_epochs: int = 5
+    incremental_learning_rate_scale: float = 0.1  # fine-tuning uses learning_rate times this
+    replay_ratio: float = 1.0  # historical rows replayed per new row
+    drift_psi_threshold: float = 0.2
+    drift_max_share: float = 0.1  # share of drifted features that warrants a full retrain
+    drift_min_rows: int = 50  # smaller batches of new rows never count as drifted
     
-    def __getitem__(self, idx):
-        feature = self.features[idx]
-        target = self.targets[idx]
-        
-        if self.transform:
-            feature = self.transform(feature)
-        
-        return feature, target
+    # Profiling parameters
+    profile_training: bool = False  # per-phase timings, samples/sec and peak memory per epoch (syncs CUDA every phase)
+    profile_trace_epochs: Optional[List[int]] = None  # [first, last] epochs to capture a torch.profiler trace of
+    profile_trace_dir: str = 'training_traces'
+    
+    # Tracking parameters
+    metric_flush_interval: float = 5.0  # seconds between batched MLflow metric writes
+    metric_queue_size: int = 10000  # buffered metrics; the oldest are dropped while the store lags
+    
+    # Checkpoint parameters
+    checkpoint_dir: Optional[str] = None  # resumable checkpoints are written here (None disables them)
+    checkpoint_every: int = 1  # epochs between checkpoints
+    checkpoint_keep_last: int = 3
+
+# Architectures searched by hyperparameter optimization (Optuna categorical
+# choices must be primitives, so they are suggested by name)
+HIDDEN_SIZE_CHOICES = {
+    '128-64': [128, 64],
+    '256-128-64': [256, 128, 64],
+    '512-256-128-64': [512, 256, 128, 64]
+}
+
+# History rows sampled for the drift reference of incremental training
+DRIFT_REFERENCE_ROWS = 100000
+
+class EducationalDataset(ArrayDataset):
+    """
+    Custom dataset for educational data.
+    
+    Wraps the feature and target arrays without copying them (features are
+    converted to float32 only if they are not already). Index it with a
+    slice or an index array to get a whole batch; see ``create_batch_loader``.
+    """
+    
+    def __init__(self, features: np.ndarray, targets: np.ndarray, transform=None):
+        super().__init__([(features, targets)], transform=transform)
 
 class DataPreprocessor:
     """Advanced data preprocessing for educational datasets."""
@@ -124,6 +170,37 @@ class DataPreprocessor:
         logger.info(f"Preprocessing complete. Features shape: {features.shape}, Targets shape: {targets.shape}")
         return features, targets
     
+    def prepare_chunk(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Row-local preparation applied to each extracted chunk before it is cached.
+        
+        Only transforms that do not depend on the rest of the data happen
+        here (types and temporal features); imputation, encoding and scaling
+        are fitted on the full cached dataset by ``preprocess_data``.
+        """
+        if self.config.numerical_columns:
+            for col in self.config.numerical_columns:
+                if col in chunk.columns:
+                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype(np.float64)
+        
+        if self.config.categorical_columns:
+            for col in self.config.categorical_columns:
+                if col in chunk.columns:
+                    chunk[col] = chunk[col].where(chunk[col].isna(), chunk[col].astype(str))
+        
+        if 'timestamp' in chunk.columns:
+            chunk = self._add_temporal_features(chunk)
+        
+        return chunk
+    
+    def _add_temporal_features(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Add hour, weekday and month of the ``timestamp`` column."""
+        timestamps = pd.to_datetime(data['timestamp'])
+        data['hour_of_day'] = timestamps.dt.hour
+        data['day_of_week'] = timestamps.dt.dayofweek
+        data['month'] = timestamps.dt.month
+        return data
+    
     def _handle_missing_values(self, data: pd.DataFrame) -> pd.DataFrame:
         """Handle missing values in the dataset."""
         # For numerical columns, fill with median
@@ -174,11 +251,9 @@ class DataPreprocessor:
                 data[f'{col}_squared'] = data[col] ** 2
                 data[f'{col}_cubed'] = data[col] ** 3
         
-        # Add temporal features if available
-        if 'timestamp' in data.columns:
-            data['hour_of_day'] = pd.to_datetime(data['timestamp']).dt.hour
-            data['day_of_week'] = pd.to_datetime(data['timestamp']).dt.dayofweek
-            data['month'] = pd.to_datetime(data['timestamp']).dt.month
+        # Add temporal features if available (extracted data already has them)
+        if 'timestamp' in data.columns and 'hour_of_day' not in data.columns:
+            data = self._add_temporal_features(data)
         
         return data
     
@@ -215,6 +290,12 @@ class AdvancedTrainer:
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         self.best_model = None
         self.training_history = []
+        self._split_cache: Dict[Tuple[int, float], Tuple[ArrayDataset, np.ndarray, np.ndarray]] = {}
+        self._autocast_dtype: Optional[torch.dtype] = None
+        self._grad_scaler = None
+        self._metric_logger: Optional[AsyncMetricLogger] = None
+        
+        configure_threads(config.intra_op_threads, config.inter_op_threads)
         
         # Setup MLflow
         mlflow.set_tracking_uri("sqlite:///mlflow.db")
@@ -223,47 +304,42 @@ class AdvancedTrainer:
         logger.info(f"Training on device: {self.device}")
     
     def train_with_hyperparameter_optimization(self, 
-                                             train_data: Tuple[np.ndarray, np.ndarray],
-                                             n_trials: int = 100) -> Dict[str, Any]:
-        """Train model with hyperparameter optimization using Optuna."""
-        logger.info(f"Starting hyperparameter optimization with {n_trials} trials...")
-        
-        def objective(trial):
-            # Suggest hyperparameters
-            lr = trial.suggest_float('learning_rate', 1e-5, 1e-1, log=True)
-            batch_size = trial.suggest_categorical('batch_size', [16, 32, 64, 128])
-            hidden_sizes = trial.suggest_categorical('hidden_sizes', 
-                                                   [[128, 64], [256, 128, 64], [512, 256, 128, 64]])
-            dropout_rate = trial.suggest_float('dropout_rate', 0.1, 0.5)
-            weight_decay = trial.suggest_float('weight_decay', 1e-6, 1e-3, log=True)
-            
-            # Update config
-            trial_config = TrainingConfig(
-                model_type=self.config.model_type,
-                input_size=self.config.input_size,
-                hidden_sizes=hidden_sizes,
-                output_size=self.config.output_size,
-                dropout_rate=dropout_rate,
-                batch_size=batch_size,
-                learning_rate=lr,
-                weight_decay=weight_decay,
-                num_epochs=50  # Shorter training for optimization
-            )
-            
-            # Train model
-            try:
-                model, metrics = self._train_single_model(train_data, trial_config)
-                return metrics['val_accuracy']
-            except Exception as e:
-                logger.warning(f"Trial failed: {e}")
-                return 0.0
+                                             train_data: Union[Tuple[np.ndarray, np.ndarray], ArrayDataset],
+                                             n_trials: int = 100,
+                                             n_jobs: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Train model with hyperparameter optimization using Optuna.
+        
+        Trials report validation accuracy every epoch so the configured
+        pruner can stop weak ones early. With ``n_jobs`` (default
+        ``config.hpo_n_jobs``) above 1, trials run in that many processes
+        that share one memory-mapped copy of the data.
+        
+        A study named by ``config.hpo_study_name`` that already exists in
+        ``config.hpo_storage`` is resumed: only the trials still missing from
+        ``n_trials`` are run, and with ``config.checkpoint_dir`` trials
+        interrupted by a crash continue from their checkpoints.
+        """
+        n_jobs = max(1, n_jobs or self.config.hpo_n_jobs)
+        logger.info(f"Starting hyperparameter optimization with {n_trials} trials in {n_jobs} process(es)...")
+        
+        # Convert once; every trial shares the same arrays
+        train_data = self._as_dataset(train_data)
         
         # Run optimization
-        study = optuna.create_study(direction='maximize')
-        study.optimize(objective, n_trials=n_trials)
+        if n_jobs > 1:
+            study = self._optimize_in_processes(train_data, n_trials, n_jobs)
+        else:
+            study = self._create_study(self.config.hpo_storage)
+            remaining = max(0, n_trials - self._finished_trials(study))
+            study.optimize(lambda trial: self._objective(trial, train_data), n_trials=remaining)
+        
+        pruned = sum(trial.state == optuna.trial.TrialState.PRUNED for trial in study.trials)
+        logger.info(f"{pruned} of {len(study.trials)} trials were pruned")
         
         # Get best parameters
-        best_params = study.best_params
+        best_params = dict(study.best_params)
+        best_params['hidden_sizes'] = HIDDEN_SIZE_CHOICES[best_params['hidden_sizes']]
         logger.info(f"Best hyperparameters: {best_params}")
         
         # Update config with best parameters
@@ -274,7 +350,9 @@ class AdvancedTrainer:
         self.config.weight_decay = best_params['weight_decay']
         
         # Train final model with best parameters
-        final_model, final_metrics = self._train_single_model(train_data, self.config)
+        final_model, final_metrics = self._train_single_model(
+            train_data, self.config, checkpoint_dir=self._checkpoint_subdir(study.study_name, 'final')
+        )
         
         return {
             'best_params': best_params,
@@ -283,30 +361,256 @@ class AdvancedTrainer:
             'optimization_history': study.trials_dataframe()
         }
     
-    def _train_single_model(self, 
-                           train_data: Tuple[np.ndarray, np.ndarray],
-                           config: TrainingConfig) -> Tuple[nn.Module, Dict[str, float]]:
-        """Train a single model with given configuration."""
-        features, targets = train_data
-        
-        # Split data
-        train_features, val_features, train_targets, val_targets = train_test_split(
-            features, targets, test_size=config.validation_split, random_state=42, stratify=targets
+    def _objective(self, trial: optuna.Trial, dataset: ArrayDataset) -> float:
+        """Train one trial configuration, reporting validation accuracy per epoch."""
+        # Suggest hyperparameters
+        lr = trial.suggest_float('learning_rate', 1e-5, 1e-1, log=True)
+        batch_size = trial.suggest_categorical('batch_size', [16, 32, 64, 128])
+        hidden_sizes = trial.suggest_categorical('hidden_sizes', list(HIDDEN_SIZE_CHOICES))
+        dropout_rate = trial.suggest_float('dropout_rate', 0.1, 0.5)
+        weight_decay = trial.suggest_float('weight_decay', 1e-6, 1e-3, log=True)
+        
+        # Update config
+        trial_config = replace(
+            self.config,
+            hidden_sizes=HIDDEN_SIZE_CHOICES[hidden_sizes],
+            dropout_rate=dropout_rate,
+            batch_size=batch_size,
+            learning_rate=lr,
+            weight_decay=weight_decay,
+            num_epochs=self.config.hpo_trial_epochs  # Shorter training for optimization
         )
         
-        # Create datasets
-        train_dataset = EducationalDataset(train_features, train_targets)
-        val_dataset = EducationalDataset(val_features, val_targets)
-        
-        # Create dataloaders
-        train_loader = DataLoader(train_dataset, batch_size=config.batch_size, shuffle=True)
-        val_loader = DataLoader(val_dataset, batch_size=config.batch_size, shuffle=False)
+        # Train model; a trial re-run after a crash continues from its predecessor's checkpoints
+        number = trial.user_attrs.get('resumed_from', trial.number)
+        checkpoint_dir = self._checkpoint_subdir(trial.study.study_name, f'trial_{number}')
+        try:
+            model, metrics = self._train_single_model(dataset, trial_config, trial=trial,
+                                                      checkpoint_dir=checkpoint_dir)
+            return metrics['val_accuracy']
+        except optuna.TrialPruned:
+            if checkpoint_dir:
+                shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            raise
+        except Exception as e:
+            logger.warning(f"Trial failed: {e}")
+            if checkpoint_dir:
+                shutil.rmtree(checkpoint_dir, ignore_errors=True)
+            return 0.0
+    
+    def _create_study(self, storage_spec: Optional[str]) -> optuna.Study:
+        """
+        Create the study, or resume ``config.hpo_study_name`` when ``config.hpo_storage`` already holds it.
+        
+        Without an explicit study name the study gets a fresh generated name,
+        so a run on new data never picks up trials scored on older data.
+        Trials that a crashed run left running are marked failed and queued
+        again with the same parameters. Resuming assumes no other process
+        is still working on the study.
+        """
+        study_name = self.config.hpo_study_name if self.config.hpo_storage else None
+        study = optuna.create_study(direction='maximize', pruner=self._create_pruner(),
+                                    storage=_create_optuna_storage(storage_spec),
+                                    study_name=study_name, load_if_exists=True)
+        
+        stale = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.RUNNING,))
+        for trial in stale:
+            study.tell(trial.number, state=optuna.trial.TrialState.FAIL)
+            resumed_from = trial.user_attrs.get('resumed_from', trial.number)
+            study.enqueue_trial(trial.params, user_attrs={'resumed_from': resumed_from})
+        if study.trials:
+            logger.info(f"Resuming study {study.study_name}: {self._finished_trials(study)} trials finished, "
+                        f"{len(stale)} interrupted trials queued again")
+        return study
+    
+    @staticmethod
+    def _finished_trials(study: optuna.Study) -> int:
+        states = (optuna.trial.TrialState.COMPLETE, optuna.trial.TrialState.PRUNED)
+        return len(study.get_trials(deepcopy=False, states=states))
+    
+    def _checkpoint_subdir(self, *parts: str) -> Optional[str]:
+        """A directory under ``config.checkpoint_dir``, or None when checkpointing is off."""
+        if not self.config.checkpoint_dir:
+            return None
+        return os.path.join(self.config.checkpoint_dir, *parts)
+    
+    def _create_pruner(self) -> optuna.pruners.BasePruner:
+        """Pruner for the configured strategy; epochs are the pruning steps."""
+        pruner = self.config.hpo_pruner.lower()
+        if pruner == 'median':
+            return optuna.pruners.MedianPruner(n_startup_trials=5, n_warmup_steps=5)
+        elif pruner == 'successive_halving':
+            return optuna.pruners.SuccessiveHalvingPruner(min_resource=5)
+        elif pruner == 'hyperband':
+            return optuna.pruners.HyperbandPruner(min_resource=5, max_resource=self.config.hpo_trial_epochs)
+        elif pruner == 'none':
+            return optuna.pruners.NopPruner()
+        else:
+            raise ValueError(f"Unknown pruner: {self.config.hpo_pruner}")
+    
+    def _optimize_in_processes(self, dataset: ArrayDataset, n_trials: int, n_jobs: int) -> optuna.Study:
+        """Run the study's trials in ``n_jobs`` worker processes sharing one storage and one dataset copy."""
+        work_dir = tempfile.mkdtemp(prefix='hpo-', dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+        try:
+            # Workers memory-map the same shard files, so the data sits in
+            # (shared) page cache once rather than once per process
+            if dataset.directory and dataset.indices is None:
+                data_dir = dataset.directory
+            else:
+                features, targets = dataset[0:len(dataset)]
+                data_dir = os.path.join(work_dir, 'data')
+                write_npy_shards(features.numpy(), targets.numpy(), data_dir)
+            
+            storage_spec = self.config.hpo_storage or os.path.join(work_dir, 'study.log')
+            study = self._create_study(storage_spec)
+            n_trials = max(0, n_trials - self._finished_trials(study))
+            
+            # Split trials and CPU threads evenly between workers
+            trials_per_worker = [n_trials // n_jobs + (i < n_trials % n_jobs) for i in range(n_jobs)]
+            threads = max(1, torch.get_num_threads() // n_jobs)
+            with ProcessPoolExecutor(n_jobs, mp_context=multiprocessing.get_context('spawn')) as pool:
+                futures = [
+                    pool.submit(_run_study_worker, self.config, self.model_factory, study.study_name,
+                                storage_spec, data_dir, worker_trials, threads)
+                    for worker_trials in trials_per_worker if worker_trials
+                ]
+                for future in futures:
+                    future.result()
+            
+            # Reload so the trials recorded by the workers are visible; a
+            # temporary journal is copied to memory before it is removed
+            if self.config.hpo_storage:
+                return optuna.load_study(study_name=study.study_name, storage=_create_optuna_storage(storage_spec))
+            results = optuna.storages.InMemoryStorage()
+            optuna.copy_study(from_study_name=study.study_name, from_storage=_create_optuna_storage(storage_spec),
+                              to_storage=results)
+            return optuna.load_study(study_name=study.study_name, storage=results)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def train_incremental(self,
+                          new_data: Union[Tuple[np.ndarray, np.ndarray], ArrayDataset],
+                          history: Union[Tuple[np.ndarray, np.ndarray], ArrayDataset, None] = None,
+                          initial_state: Union[Dict[str, torch.Tensor], str, None] = None) -> Tuple[nn.Module, Dict[str, Any]]:
+        """
+        Refresh a trained model with new records instead of retraining from scratch.
+        
+        The model is warm-started from ``initial_state`` (a state dict or a
+        path saved with ``torch.save``; defaults to this trainer's best
+        model) and fine-tuned for ``incremental_epochs`` at a reduced
+        learning rate on the new rows mixed with a random replay sample of
+        ``history``. When the new features have drifted from ``history``, or
+        there is no model to start from, it trains from scratch on all data.
+        Drift is measured against all of ``history`` (a random sample of
+        ``DRIFT_REFERENCE_ROWS`` rows when it is larger).
+        """
+        new_dataset = self._as_dataset(new_data)
+        history_dataset = self._as_dataset(history) if history is not None else None
+        new_features, new_targets = (tensor.numpy() for tensor in new_dataset[0:len(new_dataset)])
+        
+        state = initial_state if initial_state is not None else self.best_model
+        if isinstance(state, str):
+            state = torch.load(state, map_location=self.device)
+        
+        # Replay a random sample of history alongside the new rows
+        replay_features = new_features[:0]
+        replay_targets = new_targets[:0]
+        if history_dataset is not None and len(history_dataset):
+            count = min(len(history_dataset), int(round(self.config.replay_ratio * len(new_dataset))))
+            rows = np.sort(np.random.default_rng().choice(len(history_dataset), count, replace=False))
+            replay_features, replay_targets = (tensor.numpy() for tensor in history_dataset[rows])
+        
+        drift = None
+        if history_dataset is not None and len(history_dataset):
+            reference_rows = np.arange(len(history_dataset))
+            if len(reference_rows) > DRIFT_REFERENCE_ROWS:
+                reference_rows = np.sort(np.random.default_rng().choice(reference_rows, DRIFT_REFERENCE_ROWS,
+                                                                        replace=False))
+            reference_features = history_dataset[reference_rows][0].numpy()
+            drift = drift_report(fit_drift_reference(reference_features), new_features,
+                                 self.config.drift_psi_threshold, self.config.drift_max_share,
+                                 self.config.drift_min_rows)
+        
+        if state is None or (drift is not None and drift['drift']):
+            reason = 'no model to warm-start' if state is None else 'feature drift'
+            logger.info(f"Full retrain warranted: {reason}")
+            if history_dataset is not None:
+                history_features, history_targets = (tensor.numpy() for tensor in history_dataset[0:len(history_dataset)])
+                all_data = (np.concatenate([history_features, new_features]),
+                            np.concatenate([history_targets, new_targets]))
+            else:
+                all_data = (new_features, new_targets)
+            model, metrics = self._train_single_model(all_data, self.config,
+                                                      checkpoint_dir=self._checkpoint_subdir('incremental'))
+            metrics.update({'mode': 'full_retrain', 'reason': reason, 'drift': drift})
+            return model, metrics
+        
+        logger.info(f"Fine-tuning on {len(new_features)} new and {len(replay_features)} replayed records...")
+        incremental_config = replace(
+            self.config,
+            num_epochs=self.config.incremental_epochs,
+            learning_rate=self.config.learning_rate * self.config.incremental_learning_rate_scale
+        )
+        mixed = (np.concatenate([new_features, replay_features]), np.concatenate([new_targets, replay_targets]))
+        model, metrics = self._train_single_model(mixed, incremental_config, initial_state=state,
+                                                  checkpoint_dir=self._checkpoint_subdir('incremental'))
+        metrics.update({
+            'mode': 'warm_start',
+            'new_samples': len(new_features),
+            'replay_samples': len(replay_features),
+            'drift': drift
+        })
+        return model, metrics
+    
+    def _split_indices(self, dataset: ArrayDataset, validation_split: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Stratified train/validation indices, computed once per dataset and split fraction."""
+        key = (id(dataset), validation_split)
+        cached = self._split_cache.get(key)
+        if cached is None or cached[0] is not dataset:
+            train_indices, val_indices = train_test_split(
+                np.arange(len(dataset)), test_size=validation_split,
+                random_state=42, stratify=dataset.targets()
+            )
+            # The dataset is kept with its split so its id cannot be reused
+            cached = self._split_cache[key] = (dataset, train_indices, val_indices)
+        return cached[1], cached[2]
+    
+    def _train_single_model(self, 
+                           train_data: Union[Tuple[np.ndarray, np.ndarray], ArrayDataset],
+                           config: TrainingConfig,
+                           trial: Optional[optuna.Trial] = None,
+                           initial_state: Optional[Dict[str, torch.Tensor]] = None,
+                           checkpoint_dir: Optional[str] = None) -> Tuple[nn.Module, Dict[str, float]]:
+        """
+        Train a single model with given configuration.
+        
+        With an Optuna ``trial``, validation accuracy is reported after every
+        epoch and ``optuna.TrialPruned`` is raised when the pruner stops it.
+        ``initial_state`` warm-starts the model from earlier weights.
+        
+        With ``checkpoint_dir`` (default ``config.checkpoint_dir``), training
+        state is checkpointed every ``checkpoint_every`` epochs and a run
+        interrupted by a crash resumes from its latest checkpoint. The
+        checkpoints are removed once the run finishes.
+        """
+        dataset = self._as_dataset(train_data)
+        
+        # Split data into index views over the same arrays
+        train_indices, val_indices = self._split_indices(dataset, config.validation_split)
+        
+        # Create dataloaders that serve whole batches
+        train_loader = create_batch_loader(dataset.subset(train_indices), config.batch_size, shuffle=True, seed=42)
+        val_loader = create_batch_loader(dataset.subset(val_indices), config.batch_size, shuffle=False)
         
         # Create model
         model = self._create_model(config)
+        if initial_state is not None:
+            model.load_state_dict(initial_state)
         model.to(self.device)
         
         # Setup training components
+        self._autocast_dtype = resolve_autocast_dtype(self.device, config.use_mixed_precision)
+        self._grad_scaler = create_grad_scaler(self.device, self._autocast_dtype)
         criterion = self._create_loss_function(config)
         optimizer = self._create_optimizer(model, config)
         scheduler = self._create_scheduler(optimizer, config)
@@ -315,44 +619,99 @@ class AdvancedTrainer:
         best_val_accuracy = 0.0
         patience_counter = 0
         training_history = []
-        
-        for epoch in range(config.num_epochs):
-            # Training phase
-            train_loss, train_accuracy = self._train_epoch(model, train_loader, criterion, optimizer)
-            
-            # Validation phase
-            val_loss, val_accuracy = self._validate_epoch(model, val_loader, criterion)
+        start_epoch = 0
+        
+        checkpoint_dir = checkpoint_dir or config.checkpoint_dir
+        checkpoints = CheckpointManager(checkpoint_dir, config.checkpoint_keep_last) if checkpoint_dir else None
+        checkpoint = checkpoints.load_latest(map_location='cpu') if checkpoints else None
+        if checkpoint is not None:
+            self._restore_checkpoint(checkpoint, config, model, optimizer, scheduler, train_loader)
+            start_epoch = checkpoint['epoch'] + 1
+            best_val_accuracy = checkpoint['best_val_accuracy']
+            patience_counter = checkpoint['patience_counter']
+            training_history = checkpoint['training_history']
+            epoch, train_accuracy, val_accuracy = (training_history[-1][key] for key in
+                                                   ('epoch', 'train_accuracy', 'val_accuracy'))
+            logger.info(f"Resuming training from epoch {start_epoch} (best val accuracy {best_val_accuracy:.4f})")
             
-            # Learning rate scheduling
-            if scheduler:
-                scheduler.step()
-            
-            # Record metrics
-            epoch_metrics = {
-                'epoch': epoch,
-                'train_loss': train_loss,
-                'train_accuracy': train_accuracy,
-                'val_loss': val_loss,
-                'val_accuracy': val_accuracy,
-                'learning_rate': optimizer.param_groups[0]['lr']
-            }
-            training_history.append(epoch_metrics)
-            
-            # Early stopping
-            if val_accuracy > best_val_accuracy:
-                best_val_accuracy = val_accuracy
-                patience_counter = 0
-                self.best_model = model.state_dict().copy()
-            else:
-                patience_counter += 1
-                if patience_counter >= config.early_stopping_patience:
-                    logger.info(f"Early stopping at epoch {epoch}")
-                    break
-            
-            # Log progress
-            if epoch % 10 == 0:
-                logger.info(f"Epoch {epoch}: Train Loss: {train_loss:.4f}, Train Acc: {train_accuracy:.4f}, "
-                          f"Val Loss: {val_loss:.4f}, Val Acc: {val_accuracy:.4f}")
+            # The pruner sees the resumed epochs too
+            if trial is not None:
+                for metrics in training_history:
+                    trial.report(metrics['val_accuracy'], metrics['epoch'])
+        
+        profiler = EpochProfiler(self.device, enabled=config.profile_training,
+                                 trace_epochs=config.profile_trace_epochs, trace_dir=config.profile_trace_dir)
+        
+        try:
+            for epoch in range(start_epoch, config.num_epochs):
+                # Training phase
+                with profiler.epoch(epoch):
+                    train_loss, train_accuracy = self._train_epoch(model, train_loader, criterion, optimizer, profiler)
+                
+                # Validation phase
+                val_started = time.perf_counter()
+                val_loss, val_accuracy = self._validate_epoch(model, val_loader, criterion)
+                val_seconds = time.perf_counter() - val_started
+                
+                # Learning rate scheduling
+                if scheduler:
+                    scheduler.step()
+                
+                # Record metrics
+                epoch_metrics = {
+                    'epoch': epoch,
+                    'train_loss': train_loss,
+                    'train_accuracy': train_accuracy,
+                    'val_loss': val_loss,
+                    'val_accuracy': val_accuracy,
+                    'learning_rate': optimizer.param_groups[0]['lr']
+                }
+                if config.profile_training:
+                    epoch_metrics.update({f'profile_{name}': value for name, value in profiler.summary.items()})
+                    epoch_metrics['profile_time_validation'] = val_seconds
+                training_history.append(epoch_metrics)
+                self._log_metrics({key: value for key, value in epoch_metrics.items() if key != 'epoch'}, epoch)
+                
+                if trial is not None:
+                    trial.report(val_accuracy, epoch)
+                    if trial.should_prune():
+                        logger.info(f"Trial {trial.number} pruned at epoch {epoch}")
+                        raise optuna.TrialPruned()
+                
+                # Early stopping
+                if val_accuracy > best_val_accuracy:
+                    best_val_accuracy = val_accuracy
+                    patience_counter = 0
+                    # Clone: state_dict() shares storage with the parameters being trained
+                    self.best_model = {key: value.detach().clone() for key, value in model.state_dict().items()}
+                else:
+                    patience_counter += 1
+                    if patience_counter >= config.early_stopping_patience:
+                        logger.info(f"Early stopping at epoch {epoch}")
+                        break
+                
+                # Checkpoint (copied here, written in the background)
+                if checkpoints is not None and (epoch + 1) % config.checkpoint_every == 0:
+                    checkpoints.save(epoch, self._checkpoint_state(
+                        epoch, config, model, optimizer, scheduler, train_loader,
+                        best_val_accuracy, patience_counter, training_history
+                    ))
+                
+                # Log progress
+                if epoch % 10 == 0:
+                    logger.info(f"Epoch {epoch}: Train Loss: {train_loss:.4f}, Train Acc: {train_accuracy:.4f}, "
+                              f"Val Loss: {val_loss:.4f}, Val Acc: {val_accuracy:.4f}")
+                    if config.profile_training:
+                        logger.info(self._format_profile(profiler.summary))
+        finally:
+            # Queued metrics reach MLflow even when training stops with an exception
+            self.flush_metrics()
+            if checkpoints is not None:
+                checkpoints.close()
+        
+        # The run finished, so there is nothing left to resume
+        if checkpoints is not None:
+            checkpoints.clear()
         
         # Load best model
         model.load_state_dict(self.best_model)
@@ -368,6 +727,95 @@ class AdvancedTrainer:
         
         return model, final_metrics
     
+    @staticmethod
+    def _checkpoint_signature(config: TrainingConfig) -> Dict[str, Any]:
+        return {key: getattr(config, key) for key in ('model_type', 'input_size', 'hidden_sizes', 'output_size')}
+    
+    def _checkpoint_state(self, epoch: int, config: TrainingConfig, model: nn.Module,
+                          optimizer: optim.Optimizer, scheduler, train_loader: DataLoader,
+                          best_val_accuracy: float, patience_counter: int,
+                          training_history: List[Dict[str, float]]) -> Dict[str, Any]:
+        """Everything needed to continue training after ``epoch``."""
+        return {
+            'epoch': epoch,
+            'model_config': self._checkpoint_signature(config),
+            'model_state_dict': model.state_dict(),
+            'optimizer_state_dict': optimizer.state_dict(),
+            'scheduler_state_dict': scheduler.state_dict() if scheduler else None,
+            'grad_scaler_state_dict': self._grad_scaler.state_dict() if self._grad_scaler else None,
+            'best_model': self.best_model,
+            'best_val_accuracy': best_val_accuracy,
+            'patience_counter': patience_counter,
+            'training_history': training_history,
+            'rng_state': capture_rng_state(),
+            'sampler_rng_state': train_loader.sampler.rng.bit_generator.state
+        }
+    
+    def _restore_checkpoint(self, checkpoint: Dict[str, Any], config: TrainingConfig, model: nn.Module,
+                            optimizer: optim.Optimizer, scheduler, train_loader: DataLoader):
+        """Load the model, optimizer, scheduler and RNG state saved by ``_checkpoint_state``."""
+        if checkpoint['model_config'] != self._checkpoint_signature(config):
+            raise ValueError(f"Checkpoint was written for a different model ({checkpoint['model_config']}); "
+                             f"use another checkpoint_dir")
+        model.load_state_dict(checkpoint['model_state_dict'])
+        optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
+        if scheduler and checkpoint['scheduler_state_dict'] is not None:
+            scheduler.load_state_dict(checkpoint['scheduler_state_dict'])
+        if self._grad_scaler and checkpoint['grad_scaler_state_dict'] is not None:
+            self._grad_scaler.load_state_dict(checkpoint['grad_scaler_state_dict'])
+        self.best_model = checkpoint['best_model']
+        restore_rng_state(checkpoint['rng_state'])
+        train_loader.sampler.rng.bit_generator.state = checkpoint['sampler_rng_state']
+    
+    @staticmethod
+    def _format_profile(summary: Dict[str, float]) -> str:
+        phases = ', '.join(f"{name[5:]} {seconds:.2f}s" for name, seconds in summary.items()
+                           if name.startswith('time_') and name != 'time_epoch')
+        if 'peak_rss_mb' in summary:
+            memory = f"peak RSS {summary['peak_rss_mb']:.0f} MB"
+        else:
+            memory = f"process peak RSS {summary['process_peak_rss_mb']:.0f} MB"
+        return (f"  {summary['samples_per_sec']:.0f} samples/sec, epoch {summary['time_epoch']:.2f}s "
+                f"({phases}), {memory}")
+    
+    def _log_metrics(self, metrics: Dict[str, float], step: int):
+        """
+        Queue epoch metrics for the active MLflow run, if the caller started one.
+        
+        Metrics are written in batches by a background logger per run, so
+        training never waits on the tracking store.
+        """
+        run = mlflow.active_run()
+        if run is None:
+            return
+        if self._metric_logger is None or self._metric_logger.run_id != run.info.run_id:
+            self.close_metric_logger()
+            self._metric_logger = AsyncMetricLogger(
+                run.info.run_id, tracking_uri=mlflow.get_tracking_uri(),
+                flush_interval=self.config.metric_flush_interval, max_queue_size=self.config.metric_queue_size
+            )
+        self._metric_logger.log_metrics(metrics, step)
+    
+    def flush_metrics(self, timeout: Optional[float] = 30.0) -> bool:
+        """Wait for queued metrics to reach MLflow (e.g. before ending the run)."""
+        if self._metric_logger is None:
+            return True
+        return self._metric_logger.flush(timeout)
+    
+    def close_metric_logger(self):
+        """Flush queued metrics and stop the background metric logger."""
+        if self._metric_logger is not None:
+            self._metric_logger.close()
+            self._metric_logger = None
+    
+    @staticmethod
+    def _as_dataset(train_data: Union[Tuple[np.ndarray, np.ndarray], ArrayDataset]) -> ArrayDataset:
+        """Use a prepared (e.g. memory-mapped) dataset as is, or wrap (features, targets) arrays."""
+        if isinstance(train_data, ArrayDataset):
+            return train_data
+        features, targets = train_data
+        return EducationalDataset(features, targets)
+    
     def _create_model(self, config: TrainingConfig) -> nn.Module:
         """Create model based on configuration."""
         if config.model_type == 'transformer':
@@ -422,56 +870,67 @@ class AdvancedTrainer:
             return None
     
     def _train_epoch(self, model: nn.Module, train_loader: DataLoader, 
-                     criterion: nn.Module, optimizer: optim.Optimizer) -> Tuple[float, float]:
+                     criterion: nn.Module, optimizer: optim.Optimizer,
+                     profiler: Optional[EpochProfiler] = None) -> Tuple[float, float]:
         """Train for one epoch."""
+        profiler = profiler or EpochProfiler(self.device, enabled=False)
         model.train()
-        total_loss = 0.0
-        correct = 0
+        # Loss and accuracy are accumulated on the device and read back once
+        # per epoch, instead of forcing a host sync with .item() every batch
+        total_loss = torch.zeros((), device=self.device)
+        correct = torch.zeros((), dtype=torch.long, device=self.device)
         total = 0
-        
-        for batch_features, batch_targets in train_loader:
-            batch_features = batch_features.to(self.device)
-            batch_targets = batch_targets.to(self.device)
+        num_batches = 0
+        
+        batches = iter(train_loader)
+        while True:
+            with profiler.phase('data'):
+                batch = next(batches, None)
+                if batch is not None:
+                    batch_features = batch[0].to(self.device, non_blocking=True)
+                    batch_targets = batch[1].to(self.device, non_blocking=True)
+            if batch is None:
+                break
             
             # Forward pass
-            optimizer.zero_grad()
-            outputs = model(batch_features)
-            
-            # Handle different output formats
-            if isinstance(outputs, dict):
-                # Multi-task learning
-                loss = 0
-                for key, output in outputs.items():
-                    if key in ['difficulty_prediction', 'learning_style', 'emotion_classification']:
-                        loss += criterion(output, batch_targets)
-                loss = loss / len(outputs)
-            else:
-                # Single task
-                loss = criterion(outputs, batch_targets)
+            with profiler.phase('forward'):
+                optimizer.zero_grad()
+                with autocast(self.device, self._autocast_dtype):
+                    outputs = model(batch_features)
+                    loss = self._compute_loss(outputs, batch_targets, criterion)
             
             # Backward pass
-            loss.backward()
-            
-            # Gradient clipping
-            if self.config.gradient_clipping > 0:
-                torch.nn.utils.clip_grad_norm_(model.parameters(), self.config.gradient_clipping)
-            
-            optimizer.step()
+            with profiler.phase('backward'):
+                if self._grad_scaler is not None:
+                    self._grad_scaler.scale(loss).backward()
+                else:
+                    loss.backward()
             
-            # Calculate accuracy
-            if isinstance(outputs, dict):
-                # Use first output for accuracy calculation
-                first_output = list(outputs.values())[0]
-                _, predicted = torch.max(first_output.data, 1)
-            else:
-                _, predicted = torch.max(outputs.data, 1)
+            with profiler.phase('optimizer'):
+                if self._grad_scaler is not None:
+                    self._grad_scaler.unscale_(optimizer)
+                
+                # Gradient clipping
+                if self.config.gradient_clipping > 0:
+                    torch.nn.utils.clip_grad_norm_(model.parameters(), self.config.gradient_clipping)
+                
+                if self._grad_scaler is not None:
+                    self._grad_scaler.step(optimizer)
+                    self._grad_scaler.update()
+                else:
+                    optimizer.step()
+                
+                # Calculate accuracy
+                total_loss += loss.detach().float()
+                correct += (self._predicted_classes(outputs) == batch_targets).sum()
             
             total += batch_targets.size(0)
-            correct += (predicted == batch_targets).sum().item()
-            total_loss += loss.item()
+            num_batches += 1
+            profiler.add_samples(batch_targets.size(0))
         
-        avg_loss = total_loss / len(train_loader)
-        accuracy = correct / total
+        with profiler.phase('sync'):
+            avg_loss = total_loss.item() / max(num_batches, 1)
+            accuracy = correct.item() / max(total, 1)
         
         return avg_loss, accuracy
     
@@ -479,46 +938,66 @@ class AdvancedTrainer:
                        criterion: nn.Module) -> Tuple[float, float]:
         """Validate for one epoch."""
         model.eval()
-        total_loss = 0.0
-        correct = 0
+        total_loss = torch.zeros((), device=self.device)
+        correct = torch.zeros((), dtype=torch.long, device=self.device)
         total = 0
+        num_batches = 0
         
         with torch.no_grad():
             for batch_features, batch_targets in val_loader:
-                batch_features = batch_features.to(self.device)
-                batch_targets = batch_targets.to(self.device)
+                batch_features = batch_features.to(self.device, non_blocking=True)
+                batch_targets = batch_targets.to(self.device, non_blocking=True)
                 
                 # Forward pass
-                outputs = model(batch_features)
-                
-                # Handle different output formats
-                if isinstance(outputs, dict):
-                    # Multi-task learning
-                    loss = 0
-                    for key, output in outputs.items():
-                        if key in ['difficulty_prediction', 'learning_style', 'emotion_classification']:
-                            loss += criterion(output, batch_targets)
-                    loss = loss / len(outputs)
-                else:
-                    # Single task
-                    loss = criterion(outputs, batch_targets)
-                
-                # Calculate accuracy
-                if isinstance(outputs, dict):
-                    # Use first output for accuracy calculation
-                    first_output = list(outputs.values())[0]
-                    _, predicted = torch.max(first_output.data, 1)
-                else:
-                    _, predicted = torch.max(outputs.data, 1)
-                
+                with autocast(self.device, self._autocast_dtype):
+                    outputs = model(batch_features)
+                    total_loss += self._compute_loss(outputs, batch_targets, criterion).float()
+                correct += (self._predicted_classes(outputs) == batch_targets).sum()
                 total += batch_targets.size(0)
-                correct += (predicted == batch_targets).sum().item()
-                total_loss += loss.item()
+                num_batches += 1
         
-        avg_loss = total_loss / len(val_loader)
-        accuracy = correct / total
+        avg_loss = total_loss.item() / max(num_batches, 1)
+        accuracy = correct.item() / max(total, 1)
         
         return avg_loss, accuracy
+    
+    @staticmethod
+    def _compute_loss(outputs: Union[torch.Tensor, Dict[str, torch.Tensor]], targets: torch.Tensor,
+                      criterion: nn.Module) -> torch.Tensor:
+        """Loss of single-task outputs or the averaged loss of multi-task outputs."""
+        if isinstance(outputs, dict):
+            # Multi-task learning
+            loss = 0
+            for key, output in outputs.items():
+                if key in ['difficulty_prediction', 'learning_style', 'emotion_classification']:
+                    loss += criterion(output, targets)
+            return loss / len(outputs)
+        # Single task
+        return criterion(outputs, targets)
+    
+    @staticmethod
+    def _predicted_classes(outputs: Union[torch.Tensor, Dict[str, torch.Tensor]]) -> torch.Tensor:
+        # Multi-task models use their first output for accuracy calculation
+        if isinstance(outputs, dict):
+            outputs = list(outputs.values())[0]
+        return torch.argmax(outputs.detach(), dim=1)
+
+def _create_optuna_storage(spec: Optional[str]):
+    """Optuna storage from a database URL or a journal file path (None keeps the study in memory)."""
+    if not spec:
+        return None
+    if '://' in spec:
+        return spec
+    return optuna.storages.JournalStorage(optuna.storages.journal.JournalFileBackend(spec))
+
+def _run_study_worker(config: TrainingConfig, model_factory, study_name: str, storage_spec: str,
+                      data_dir: str, n_trials: int, num_threads: int):
+    """Run ``n_trials`` trials of a shared study in a worker process."""
+    trainer = AdvancedTrainer(replace(config, intra_op_threads=num_threads), model_factory)
+    dataset = ArrayDataset.from_npy_shards(data_dir)
+    study = optuna.load_study(study_name=study_name, storage=_create_optuna_storage(storage_spec),
+                              pruner=trainer._create_pruner())
+    study.optimize(lambda trial: trainer._objective(trial, dataset), n_trials=n_trials)
 
 class ModelEvaluator:
     """Advanced model evaluation for educational AI models."""
@@ -0,0 +1,295 @@
+"""
+Array-backed Training Datasets
+Addis Ababa AI School Management System
+
+Zero-copy dataset layer for the training pipeline:
+- Features and targets stay NumPy arrays (float32 / int64) and are exposed to
+  torch with ``torch.from_numpy``, so the training set is held in memory once
+- Datasets can span memory-mapped ``.npy`` shards, for training sets larger
+  than RAM; only the rows of the current batch are paged in
+- Train/validation splits are index views over the same arrays, not copies
+- Whole batches are served by slicing or gathering the arrays, driven by a
+  batch sampler, instead of fetching rows one at a time and collating them
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Dataset, Sampler
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+BatchKey = Union[int, slice, np.ndarray]
+
+
+def as_training_arrays(features: np.ndarray, targets: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Features as float32 and targets as int64.
+
+    Arrays (and memory maps) that already have these dtypes are returned as
+    they are, so callers that prepare float32 data never pay for a copy.
+    """
+    features = np.asanyarray(features, dtype=np.float32)
+    targets = np.asanyarray(targets, dtype=np.int64)
+    if len(features) != len(targets):
+        raise ValueError(f"Features have {len(features)} rows but targets have {len(targets)}")
+    return features, targets
+
+
+class ArrayDataset(Dataset):
+    """
+    Dataset over one or more (features, targets) array shards.
+
+    Indexing with an int returns one row, as a map-style dataset should.
+    Indexing with a slice or an index array returns the whole batch as two
+    tensors; this is what ``create_batch_loader`` uses. ``indices`` restricts
+    the dataset to a subset of rows (see ``subset``) without copying.
+    """
+
+    def __init__(self, shards: Sequence[Tuple[np.ndarray, np.ndarray]],
+                 indices: Optional[np.ndarray] = None, transform=None):
+        self.shards = [as_training_arrays(features, targets) for features, targets in shards]
+        if not self.shards:
+            raise ValueError("ArrayDataset needs at least one shard")
+        widths = {features.shape[1:] for features, _ in self.shards}
+        if len(widths) > 1:
+            raise ValueError(f"Shards have different feature shapes: {sorted(widths)}")
+
+        # Global row r lives in shard searchsorted(offsets, r, 'right') - 1
+        self.offsets = np.cumsum([0] + [len(targets) for _, targets in self.shards])
+        self.indices = None if indices is None else np.asarray(indices, dtype=np.int64)
+        self.transform = transform
+        self.directory: Optional[str] = None  # set when opened from a shard manifest
+
+    @classmethod
+    def from_arrays(cls, features: np.ndarray, targets: np.ndarray, transform=None) -> 'ArrayDataset':
+        return cls([(features, targets)], transform=transform)
+
+    @classmethod
+    def from_npy_shards(cls, directory: str, transform=None) -> 'ArrayDataset':
+        """Open the shards listed in ``directory``'s manifest as read-only memory maps."""
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+
+        shards = [
+            (np.load(os.path.join(directory, shard['features']), mmap_mode='r'),
+             np.load(os.path.join(directory, shard['targets']), mmap_mode='r'))
+            for shard in manifest['shards']
+        ]
+        dataset = cls(shards, transform=transform)
+        dataset.directory = directory
+        return dataset
+
+    @property
+    def num_rows(self) -> int:
+        """Rows across all shards, ignoring ``indices``."""
+        return int(self.offsets[-1])
+
+    @property
+    def memory_mapped(self) -> bool:
+        return any(isinstance(features, np.memmap) for features, _ in self.shards)
+
+    @property
+    def num_features(self) -> int:
+        return int(np.prod(self.shards[0][0].shape[1:]))
+
+    def __len__(self):
+        return len(self.indices) if self.indices is not None else self.num_rows
+
+    def targets(self) -> np.ndarray:
+        """All targets of this dataset, in order (targets are small enough to materialize)."""
+        if len(self.shards) == 1:
+            all_targets = np.asarray(self.shards[0][1])
+        else:
+            all_targets = np.concatenate([targets for _, targets in self.shards])
+        return all_targets if self.indices is None else all_targets[self.indices]
+
+    def subset(self, indices: np.ndarray) -> 'ArrayDataset':
+        """
+        A view of the given rows of this dataset.
+
+        Memory-mapped subsets keep their rows in file order so that batches
+        read the shards sequentially; in-memory subsets keep the given order.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.indices is not None:
+            indices = self.indices[indices]
+        if self.memory_mapped:
+            indices = np.sort(indices)
+
+        subset = ArrayDataset.__new__(type(self))
+        subset.__dict__.update(self.__dict__)
+        subset.indices = indices
+        return subset
+
+    def __getitem__(self, key: BatchKey):
+        if isinstance(key, (int, np.integer)):
+            features, targets = self._fetch(np.array([int(key)], dtype=np.int64))
+            features, targets = features[0], targets[0]
+        else:
+            features, targets = self._fetch(key)
+
+        if self.transform:
+            features = self.transform(features)
+        return features, targets
+
+    def _fetch(self, key: Union[slice, np.ndarray]) -> Tuple[torch.Tensor, torch.Tensor]:
+        if isinstance(key, slice):
+            if self.indices is not None:
+                return self._gather(self.indices[key])
+            start, stop, step = key.indices(self.num_rows)
+            if step == 1:
+                return self._range(start, stop)
+            return self._gather(np.arange(start, stop, step))
+
+        rows = np.asarray(key, dtype=np.int64)
+        if self.indices is not None:
+            rows = self.indices[rows]
+        return self._gather(rows)
+
+    def _range(self, start: int, stop: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Rows [start, stop) — a zero-copy view when they sit in one in-memory shard."""
+        first = int(np.searchsorted(self.offsets, start, side='right')) - 1
+        parts = []
+        while start < stop:
+            shard_stop = min(stop, int(self.offsets[first + 1]))
+            local = slice(start - int(self.offsets[first]), shard_stop - int(self.offsets[first]))
+            features, targets = self.shards[first]
+            parts.append((features[local], targets[local]))
+            start, first = shard_stop, first + 1
+
+        if len(parts) <= 1:
+            return self._tensors(*parts[0]) if parts else self._gather(np.empty(0, dtype=np.int64))
+        return self._tensors(np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts]))
+
+    def _gather(self, rows: np.ndarray) -> Tuple[torch.Tensor, torch.Tensor]:
+        """Arbitrary rows, copied into one batch (only the batch is copied)."""
+        if len(self.shards) == 1:
+            features, targets = self.shards[0]
+            return self._tensors(features[rows], targets[rows])
+
+        shard_ids = np.searchsorted(self.offsets, rows, side='right') - 1
+        features_out = np.empty((len(rows),) + self.shards[0][0].shape[1:], dtype=np.float32)
+        targets_out = np.empty(len(rows), dtype=np.int64)
+        for shard_id in np.unique(shard_ids):
+            mask = shard_ids == shard_id
+            local = rows[mask] - self.offsets[shard_id]
+            features, targets = self.shards[shard_id]
+            features_out[mask] = features[local]
+            targets_out[mask] = targets[local]
+        return self._tensors(features_out, targets_out)
+
+    @staticmethod
+    def _tensors(features: np.ndarray, targets: np.ndarray) -> Tuple[torch.Tensor, torch.Tensor]:
+        # Slices of memory maps are read-only views of the file; page them in
+        # as a private batch copy, which torch.from_numpy can then share
+        if not features.flags.writeable or isinstance(features, np.memmap):
+            features = np.array(features)
+        if not targets.flags.writeable or isinstance(targets, np.memmap):
+            targets = np.array(targets)
+        return torch.from_numpy(features), torch.from_numpy(targets)
+
+
+class ArrayBatchSampler(Sampler):
+    """
+    Yields one key per batch for ``ArrayDataset.__getitem__``.
+
+    Without shuffling, batches are consecutive slices. With shuffling,
+    ``contiguous=True`` shuffles the order of slice batches and rotates their
+    boundaries by a random offset every epoch (sequential reads, suited to
+    memory-mapped shards); otherwise each batch is a random, sorted set of
+    row indices drawn from a fresh permutation.
+    """
+
+    def __init__(self, num_rows: int, batch_size: int, shuffle: bool = False,
+                 contiguous: bool = False, seed: Optional[int] = None):
+        self.num_rows = num_rows
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.contiguous = contiguous
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self):
+        return -(-self.num_rows // self.batch_size)
+
+    def __iter__(self):
+        if not self.shuffle:
+            for start in range(0, self.num_rows, self.batch_size):
+                yield slice(start, min(start + self.batch_size, self.num_rows))
+            return
+
+        if self.contiguous:
+            # Batches tile the rows starting at a random offset and wrapping
+            # around; only the batch that wraps is an index array
+            offset = int(self.rng.integers(self.num_rows)) if self.num_rows else 0
+            for batch in self.rng.permutation(len(self)):
+                start = batch * self.batch_size
+                size = min(self.batch_size, self.num_rows - start)
+                first, last = (offset + start) % self.num_rows, (offset + start + size) % self.num_rows
+                if first < last or last == 0:
+                    yield slice(first, first + size)
+                else:
+                    yield np.concatenate([np.arange(0, last), np.arange(first, self.num_rows)])
+            return
+
+        permutation = self.rng.permutation(self.num_rows)
+        for start in range(0, self.num_rows, self.batch_size):
+            yield np.sort(permutation[start:start + self.batch_size])
+
+
+def create_batch_loader(dataset: ArrayDataset, batch_size: int, shuffle: bool = False,
+                        seed: Optional[int] = None, num_workers: int = 0) -> DataLoader:
+    """
+    DataLoader that fetches whole batches from ``dataset``.
+
+    Automatic batching is turned off (``batch_size=None``), so the DataLoader
+    passes each sampler key straight to the dataset and never collates rows.
+    Memory-mapped datasets are read in contiguous batches.
+    """
+    sampler = ArrayBatchSampler(len(dataset), batch_size, shuffle=shuffle,
+                                contiguous=dataset.memory_mapped, seed=seed)
+    return DataLoader(dataset, sampler=sampler, batch_size=None, num_workers=num_workers)
+
+
+def write_npy_shards(features: np.ndarray, targets: np.ndarray, directory: str,
+                     rows_per_shard: int = 100000, metadata: Optional[Dict[str, Any]] = None) -> ArrayDataset:
+    """
+    Write ``features``/``targets`` as ``.npy`` shards plus a manifest and open them memory-mapped.
+
+    ``features`` may itself be a memory map or any array-like supporting
+    slicing, so arbitrarily large inputs are written one shard at a time.
+    """
+    os.makedirs(directory, exist_ok=True)
+    shards: List[Dict[str, Any]] = []
+    for number, start in enumerate(range(0, len(targets), rows_per_shard)):
+        shard_features, shard_targets = as_training_arrays(
+            features[start:start + rows_per_shard], targets[start:start + rows_per_shard]
+        )
+        entry = {
+            'features': f'features-{number:05d}.npy',
+            'targets': f'targets-{number:05d}.npy',
+            'rows': int(len(shard_targets))
+        }
+        np.save(os.path.join(directory, entry['features']), shard_features)
+        np.save(os.path.join(directory, entry['targets']), shard_targets)
+        shards.append(entry)
+
+    manifest = {
+        'shards': shards,
+        'rows': int(len(targets)),
+        'num_features': int(np.prod(np.shape(features)[1:])),
+        'metadata': metadata or {}
+    }
+    temporary = os.path.join(directory, MANIFEST_NAME + '.tmp')
+    with open(temporary, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(temporary, os.path.join(directory, MANIFEST_NAME))
+
+    logger.info(f"Wrote {len(targets)} rows in {len(shards)} shards to {directory}")
+    return ArrayDataset.from_npy_shards(directory)
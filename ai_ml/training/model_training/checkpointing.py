@@ -0,0 +1,165 @@
+"""
+Training Checkpoints
+Addis Ababa AI School Management System
+
+Resumable training state that survives crashes and evictions:
+- A checkpoint holds whatever the trainer needs to continue an interrupted
+  run: model, optimizer and scheduler state, the Python/NumPy/torch RNG
+  states, the epoch and the best metric so far
+- State is copied to CPU memory on the training thread and serialized on a
+  background thread, so writing a checkpoint does not stall training steps
+- Files are written under a temporary name, fsynced and renamed into place,
+  so a crash mid-write never leaves a truncated checkpoint behind; only the
+  latest ``keep_last`` checkpoints are kept
+"""
+
+import copy
+import logging
+import os
+import random
+import re
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import torch
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_PATTERN = re.compile(r'^checkpoint_epoch_(\d+)\.pt$')
+TEMP_PREFIX = '.checkpoint-'
+
+
+def capture_rng_state() -> Dict[str, Any]:
+    """Python, NumPy and torch (CPU and CUDA) global RNG states."""
+    state = {'python': random.getstate(), 'numpy': np.random.get_state(), 'torch': torch.get_rng_state()}
+    if torch.cuda.is_available():
+        state['cuda'] = torch.cuda.get_rng_state_all()
+    return state
+
+
+def restore_rng_state(state: Dict[str, Any]):
+    """Restore RNG states saved by ``capture_rng_state``."""
+    random.setstate(state['python'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+    if 'cuda' in state and torch.cuda.is_available():
+        torch.cuda.set_rng_state_all(state['cuda'])
+
+
+def snapshot(value: Any) -> Any:
+    """Deep copy of ``value`` (nested dicts/lists of state) with every tensor copied to CPU memory."""
+    if isinstance(value, torch.Tensor):
+        return value.detach().to('cpu', copy=True)
+    if isinstance(value, dict):
+        return type(value)((key, snapshot(item)) for key, item in value.items())
+    if type(value) in (list, tuple):
+        return type(value)(snapshot(item) for item in value)
+    return copy.deepcopy(value)
+
+
+class CheckpointManager:
+    """
+    Writes numbered checkpoints of one training run to ``directory``.
+
+    ``save`` returns once the state is copied; the file is written by a
+    background thread, one checkpoint at a time. Call ``close()`` when the
+    run stops (it waits for the last write) and ``clear()`` once it has
+    finished and there is nothing left to resume.
+
+    Checkpoints are loaded with full unpickling, so only load directories
+    written by this trainer.
+    """
+
+    def __init__(self, directory: str, keep_last: int = 3):
+        self.directory = directory
+        self.keep_last = max(1, keep_last)
+        os.makedirs(directory, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='checkpoint-writer')
+        self._pending: Optional[Future] = None
+
+        # Leftovers of writes interrupted by a crash
+        for name in os.listdir(directory):
+            if name.startswith(TEMP_PREFIX):
+                os.remove(os.path.join(directory, name))
+
+    def checkpoints(self) -> List[str]:
+        """Checkpoint paths, oldest first."""
+        numbered = []
+        for name in os.listdir(self.directory):
+            match = CHECKPOINT_PATTERN.match(name)
+            if match:
+                numbered.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return [path for _, path in sorted(numbered)]
+
+    def load_latest(self, map_location=None) -> Optional[Dict[str, Any]]:
+        """The newest readable checkpoint, or None when there is nothing to resume."""
+        for path in reversed(self.checkpoints()):
+            try:
+                checkpoint = torch.load(path, map_location=map_location, weights_only=False)
+            except Exception as e:
+                logger.warning(f"Skipping unreadable checkpoint {path}: {e}")
+                continue
+            logger.info(f"Loaded checkpoint {path}")
+            return checkpoint
+        return None
+
+    def save(self, epoch: int, state: Dict[str, Any]):
+        """Copy ``state`` and write it as the checkpoint of ``epoch`` in the background."""
+        # At most one write in flight, so a slow disk cannot pile up copies
+        self.wait()
+        self._pending = self._executor.submit(self._write, epoch, snapshot(state))
+
+    def wait(self):
+        """Wait for the checkpoint being written, if any."""
+        if self._pending is None:
+            return
+        try:
+            self._pending.result()
+        except Exception as e:
+            logger.warning(f"Could not write checkpoint to {self.directory}: {e}")
+        self._pending = None
+
+    def close(self):
+        """Finish the pending write and stop the writer thread."""
+        self.wait()
+        self._executor.shutdown()
+
+    def clear(self):
+        """Remove this run's checkpoints (and the directory, if that leaves it empty)."""
+        self.wait()
+        for path in self.checkpoints():
+            os.remove(path)
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+
+    def _write(self, epoch: int, state: Dict[str, Any]):
+        path = os.path.join(self.directory, f'checkpoint_epoch_{epoch:05d}.pt')
+        fd, temp_path = tempfile.mkstemp(prefix=TEMP_PREFIX, dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                torch.save(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self._sync_directory()
+
+        for old_path in self.checkpoints()[:-self.keep_last]:
+            os.remove(old_path)
+
+    def _sync_directory(self):
+        # Persist the rename itself (not supported on Windows)
+        if os.name != 'posix':
+            return
+        fd = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
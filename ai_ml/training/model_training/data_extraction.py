@@ -0,0 +1,233 @@
+"""
+Training Data Extraction
+Addis Ababa AI School Management System
+
+Streams training rows from the database into a columnar cache:
+- Each partition (e.g. an academic year) is read as an iterator of rows,
+  so callers can use server-side cursors (``QuerySet.iterator(chunk_size=...)``)
+  and never hold a whole table in memory
+- Rows are turned into DataFrames one chunk at a time and passed through
+  ``DataPreprocessor.prepare_chunk`` before being written as a compressed
+  shard (Parquet when pyarrow is installed, ``.npz`` otherwise)
+- A manifest records a fingerprint per partition; later runs re-extract only
+  partitions whose fingerprint changed and drop partitions that disappeared
+- Training reads the cached shards instead of querying the database
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+from decimal import Decimal
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def parquet_available() -> bool:
+    """Whether shards can be written as Parquet."""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+@dataclass
+class ExtractionPartition:
+    """
+    One independently refreshable slice of a training table.
+
+    ``fingerprint`` must change whenever the partition's source rows change
+    (e.g. row count plus latest update time); ``rows`` streams the rows as
+    dicts when the partition has to be (re-)extracted.
+    """
+    name: str
+    fingerprint: str
+    rows: Callable[[], Iterable[Dict[str, Any]]]
+
+
+class TrainingDataExtractor:
+    """
+    Columnar shard cache of a training table, refreshed partition by partition.
+
+    Timezone-aware times are stored as naive wall-clock times in
+    ``time_zone`` (the school's local zone, e.g. ``settings.TIME_ZONE``), so
+    hour, weekday and month features describe the students' day.
+    """
+
+    def __init__(self, output_dir: str, preprocessor=None, chunk_size: int = 5000,
+                 shard_format: Optional[str] = None, time_zone: str = 'UTC'):
+        self.output_dir = output_dir
+        self.preprocessor = preprocessor
+        self.chunk_size = chunk_size
+        self.time_zone = time_zone
+        self.shard_format = shard_format or ('parquet' if parquet_available() else 'npz')
+        if self.shard_format not in ('parquet', 'npz'):
+            raise ValueError(f"Unknown shard format: {self.shard_format}")
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.output_dir, MANIFEST_NAME)
+
+    def manifest(self) -> Dict[str, Any]:
+        """The current manifest (empty when nothing was extracted yet)."""
+        if not os.path.exists(self.manifest_path):
+            return {'partitions': {}}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def extract(self, partitions: Iterable[ExtractionPartition], full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the cache up to date with ``partitions``.
+
+        Partitions whose fingerprint matches the manifest are kept as they
+        are unless ``full`` is set. Returns a summary of what was done.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest = self.manifest()
+        previous = manifest.get('partitions', {})
+        current: Dict[str, Any] = {}
+        summary = {'extracted': [], 'unchanged': [], 'removed': [], 'rows': 0}
+
+        for partition in partitions:
+            entry = previous.get(partition.name)
+            if (not full and entry is not None and entry['fingerprint'] == partition.fingerprint
+                    and entry.get('format') == self.shard_format
+                    and entry.get('time_zone', 'UTC') == self.time_zone and self._shards_exist(entry)):
+                current[partition.name] = entry
+                summary['unchanged'].append(partition.name)
+                continue
+
+            current[partition.name] = self._extract_partition(partition)
+            summary['extracted'].append(partition.name)
+            summary['rows'] += current[partition.name]['rows']
+            # Persist progress so an interrupted run keeps the partitions it finished
+            self._write_manifest(dict(manifest, partitions={**previous, **current}))
+
+        for name in set(previous) - set(current):
+            shutil.rmtree(os.path.join(self.output_dir, previous[name]['directory']), ignore_errors=True)
+            summary['removed'].append(name)
+
+        self._write_manifest(dict(manifest, partitions=current, updated_at=datetime.now().isoformat()))
+        logger.info(f"Extraction into {self.output_dir}: {len(summary['extracted'])} partitions extracted "
+                    f"({summary['rows']} rows), {len(summary['unchanged'])} unchanged, "
+                    f"{len(summary['removed'])} removed")
+        return summary
+
+    def _extract_partition(self, partition: ExtractionPartition) -> Dict[str, Any]:
+        """Stream one partition into a fresh shard directory and swap it in."""
+        directory = self._partition_directory(partition.name)
+        final_dir = os.path.join(self.output_dir, directory)
+        staging_dir = final_dir + '.staging'
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        shards, total_rows, chunk = [], 0, []
+        for row in partition.rows():
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                shards.append(self._write_shard(chunk, staging_dir, len(shards)))
+                total_rows += len(chunk)
+                chunk = []
+        if chunk:
+            shards.append(self._write_shard(chunk, staging_dir, len(shards)))
+            total_rows += len(chunk)
+
+        shutil.rmtree(final_dir, ignore_errors=True)
+        os.replace(staging_dir, final_dir)
+        logger.info(f"Extracted partition {partition.name}: {total_rows} rows in {len(shards)} shards")
+        return {
+            'fingerprint': partition.fingerprint,
+            'directory': directory,
+            'format': self.shard_format,
+            'time_zone': self.time_zone,
+            'shards': shards,
+            'rows': total_rows,
+            'extracted_at': datetime.now().isoformat()
+        }
+
+    def _write_shard(self, rows: List[Dict[str, Any]], directory: str, number: int) -> str:
+        chunk = self._normalize_types(pd.DataFrame.from_records(rows), self.time_zone)
+        if self.preprocessor is not None:
+            chunk = self.preprocessor.prepare_chunk(chunk)
+
+        name = f'part-{number:05d}.{self.shard_format}'
+        path = os.path.join(directory, name)
+        if self.shard_format == 'parquet':
+            chunk.to_parquet(path, index=False, compression='zstd')
+        else:
+            np.savez_compressed(path, **{
+                column: self._npz_column(chunk[column]) for column in chunk.columns
+            })
+        return name
+
+    @staticmethod
+    def _normalize_types(chunk: pd.DataFrame, time_zone: str = 'UTC') -> pd.DataFrame:
+        """Decimal columns (DecimalField values) as floats and timezone-aware times as naive ``time_zone`` times."""
+        for column in chunk.columns:
+            values = chunk[column]
+            if values.dtype == object:
+                first = values.dropna().head(1)
+                if len(first) and isinstance(first.iloc[0], Decimal):
+                    chunk[column] = pd.to_numeric(values, errors='coerce').astype(np.float64)
+            elif isinstance(values.dtype, pd.DatetimeTZDtype):
+                chunk[column] = values.dt.tz_convert(time_zone).dt.tz_localize(None)
+        return chunk
+
+    @staticmethod
+    def _npz_column(column: pd.Series) -> np.ndarray:
+        # Object and string columns become fixed-width strings so shards load without pickle
+        values = column.to_numpy()
+        if values.dtype == object:
+            return column.astype(object).where(column.notna(), '').to_numpy(dtype=str)
+        return values
+
+    @staticmethod
+    def _npz_values(values: np.ndarray):
+        # Empty strings stood in for missing values of string columns
+        if values.dtype.kind == 'U':
+            return pd.Series(values, dtype=object).replace('', None).to_numpy()
+        return values
+
+    @staticmethod
+    def _partition_directory(name: str) -> str:
+        return re.sub(r'[^A-Za-z0-9_.=-]+', '_', name)
+
+    def _shards_exist(self, entry: Dict[str, Any]) -> bool:
+        directory = os.path.join(self.output_dir, entry['directory'])
+        return all(os.path.exists(os.path.join(directory, shard)) for shard in entry['shards'])
+
+    def _write_manifest(self, manifest: Dict[str, Any]):
+        temporary = self.manifest_path + '.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temporary, self.manifest_path)
+
+    def iter_shards(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """Cached shards as DataFrames, one at a time, in partition order."""
+        for name, entry in sorted(self.manifest().get('partitions', {}).items()):
+            directory = os.path.join(self.output_dir, entry['directory'])
+            for shard in entry['shards']:
+                path = os.path.join(directory, shard)
+                if entry.get('format') == 'parquet':
+                    yield pd.read_parquet(path, columns=columns)
+                else:
+                    with np.load(path, allow_pickle=False) as arrays:
+                        names = [column for column in (columns or arrays.files) if column in arrays.files]
+                        yield pd.DataFrame({column: self._npz_values(arrays[column]) for column in names})
+
+    def load(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """All cached rows as one DataFrame (only ``columns`` when given)."""
+        frames = list(self.iter_shards(columns))
+        if not frames:
+            return pd.DataFrame(columns=columns or [])
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,148 @@
+"""
+Asynchronous MLflow Metric Logging
+Addis Ababa AI School Management System
+
+Keeps tracking-store writes off the training loop:
+- Metrics are buffered in memory and written in batches (``log_batch``) from
+  a background thread, every ``flush_interval`` seconds or once a full batch
+  is waiting, so a step never waits on the store or its lock
+- The buffer is bounded: while the store is slow or unavailable the oldest
+  metrics are dropped (and counted) instead of growing memory or blocking
+- Failed writes are retried with backoff, then dropped with a warning
+- Pending metrics are flushed on ``flush()``, on ``close()`` (also when used as
+  a context manager that exits with an exception) and at interpreter exit
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from mlflow.entities import Metric
+from mlflow.tracking import MlflowClient
+
+logger = logging.getLogger(__name__)
+
+# MLflow accepts at most this many metrics per log_batch call
+MAX_METRICS_PER_BATCH = 1000
+
+
+class AsyncMetricLogger:
+    """
+    Buffers metrics for one MLflow run and writes them in batches from a background thread.
+
+    ``log_metrics`` only appends to the buffer. Call ``flush()`` before
+    reading the run's metrics back and ``close()`` when done with the run.
+    """
+
+    def __init__(self, run_id: str, tracking_uri: Optional[str] = None, flush_interval: float = 5.0,
+                 max_queue_size: int = 10000, max_retries: int = 3, retry_backoff: float = 0.5):
+        self.run_id = run_id
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.dropped = 0
+        self._client = MlflowClient(tracking_uri=tracking_uri)
+        self._buffer: deque = deque(maxlen=max(1, max_queue_size))
+        self._condition = threading.Condition()
+        self._in_flight = 0
+        self._flush_waiters = 0
+        self._unreported_drops = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'mlflow-metrics-{run_id[:8]}', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def __enter__(self) -> 'AsyncMetricLogger':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """Metrics buffered or being written."""
+        with self._condition:
+            return len(self._buffer) + self._in_flight
+
+    def log_metrics(self, metrics: Dict[str, float], step: int):
+        """Queue ``metrics`` for ``step``; never blocks on the tracking store."""
+        timestamp = int(time.time() * 1000)
+        entries = [Metric(key, float(value), timestamp, step) for key, value in metrics.items()]
+        with self._condition:
+            if self._closed:
+                logger.warning(f"Metric logger for run {self.run_id} is closed; dropping {len(entries)} metrics")
+                return
+            overflow = len(self._buffer) + len(entries) - self._buffer.maxlen
+            if overflow > 0:
+                # The deque discards the oldest entries itself
+                self.dropped += overflow
+                self._unreported_drops += overflow
+            self._buffer.extend(entries)
+            if len(self._buffer) >= MAX_METRICS_PER_BATCH:
+                self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = 30.0) -> bool:
+        """Wait until every queued metric has been written; False if ``timeout`` ran out first."""
+        with self._condition:
+            self._flush_waiters += 1
+            self._condition.notify_all()
+            try:
+                done = self._condition.wait_for(lambda: not self._buffer and not self._in_flight, timeout)
+            finally:
+                self._flush_waiters -= 1
+        if not done:
+            logger.warning(f"Timed out flushing metrics for run {self.run_id}; {self.pending} still pending")
+        return done
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Flush the remaining metrics and stop the background thread (safe to call twice)."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        atexit.unregister(self.close)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"Metric logger for run {self.run_id} closed with {self.pending} metrics unwritten")
+        if self.dropped:
+            logger.warning(f"Dropped {self.dropped} metrics for run {self.run_id} while the tracking store lagged")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: (self._closed or len(self._buffer) >= MAX_METRICS_PER_BATCH
+                             or (self._flush_waiters and self._buffer)),
+                    self.flush_interval
+                )
+                count = min(len(self._buffer), MAX_METRICS_PER_BATCH)
+                batch = [self._buffer.popleft() for _ in range(count)]
+                self._in_flight = count
+                drops, self._unreported_drops = self._unreported_drops, 0
+                if not batch and self._closed:
+                    return
+
+            if drops:
+                logger.warning(f"Tracking store is lagging; dropped the {drops} oldest metrics "
+                               f"for run {self.run_id}")
+            if batch:
+                self._write(batch)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _write(self, batch: List[Metric]):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self._client.log_batch(self.run_id, metrics=batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.warning(f"Could not log {len(batch)} metrics to MLflow: {e}")
+                    return
+                time.sleep(self.retry_backoff * 2 ** attempt)
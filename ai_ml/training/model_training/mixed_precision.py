@@ -0,0 +1,67 @@
+"""
+Mixed Precision and Thread Settings for Training
+Addis Ababa AI School Management System
+
+- bfloat16 autocast on CPUs with native bf16 support (AVX512-BF16 / AMX) and
+  on CUDA devices that support it; float16 with gradient scaling on older
+  CUDA devices; float32 everywhere else
+- Intra-op and inter-op thread counts for torch's CPU thread pools
+"""
+
+import logging
+from contextlib import nullcontext
+from typing import Optional
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+
+def cpu_bf16_supported() -> bool:
+    """Whether this CPU runs bfloat16 kernels natively (emulated bf16 is slower than fp32)."""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def resolve_autocast_dtype(device: torch.device, enabled: bool) -> Optional[torch.dtype]:
+    """The autocast dtype to train with on ``device``, or None for plain float32."""
+    if not enabled:
+        return None
+    if device.type == 'cuda':
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    if device.type == 'cpu' and cpu_bf16_supported():
+        return torch.bfloat16
+    logger.info(f"bfloat16 is not supported natively on {device.type}; training in float32")
+    return None
+
+
+def autocast(device: torch.device, dtype: Optional[torch.dtype]):
+    """Autocast context for ``dtype`` (a no-op context for float32)."""
+    if dtype is None:
+        return nullcontext()
+    return torch.autocast(device_type=device.type, dtype=dtype)
+
+
+def create_grad_scaler(device: torch.device, dtype: Optional[torch.dtype]):
+    """Gradient scaler for float16 training (bfloat16 has float32's range and needs none)."""
+    if dtype == torch.float16 and device.type == 'cuda':
+        return torch.amp.GradScaler('cuda')
+    return None
+
+
+def configure_threads(intra_op_threads: int = 0, inter_op_threads: int = 0):
+    """
+    Set torch's CPU thread pools (0 keeps torch's default).
+
+    The inter-op pool can only be sized before its first use in the process;
+    later attempts are logged and ignored.
+    """
+    if intra_op_threads > 0 and torch.get_num_threads() != intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads > 0 and torch.get_num_interop_threads() != inter_op_threads:
+        try:
+            torch.set_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"Could not set inter-op threads to {inter_op_threads}: {e}")
@@ -0,0 +1,163 @@
+"""
+Training Profiler
+Addis Ababa AI School Management System
+
+Opt-in profiling of training epochs:
+- Wall time per phase (data loading, forward, backward, optimizer step and
+  host syncs such as ``.item()``), samples/sec and peak memory per epoch;
+  the RSS peak is per epoch where the kernel's counter can be reset (Linux)
+  and the process lifetime peak elsewhere
+- The timings are synchronous: on CUDA the device is synchronized at every
+  phase boundary, several times per step, so time is charged to the phase
+  that queued the work. That stalls the asynchronous pipeline, so enable it
+  to diagnose a run rather than for every run
+- Optionally a ``torch.profiler`` trace (Chrome trace JSON) for a chosen range
+  of epochs, with the phases labelled via ``record_function``
+"""
+
+import logging
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Optional, Sequence
+
+import torch
+
+logger = logging.getLogger(__name__)
+
+PHASES = ('data', 'forward', 'backward', 'optimizer', 'sync')
+
+
+def peak_rss_mb() -> float:
+    """Process peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+
+def reset_peak_rss() -> bool:
+    """Reset the peak RSS counter (``VmHWM``) of this process; False where that is not supported."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_since_reset_mb() -> float:
+    """Peak resident set size in MB since the last ``reset_peak_rss``."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+    return peak_rss_mb()
+
+
+class EpochProfiler:
+    """
+    Collects per-phase timings for one epoch at a time.
+
+    Use ``phase(name)`` around each part of a training step, ``add_samples``
+    once per batch, and ``epoch(number)`` around the whole epoch; the
+    summary of the last epoch is in ``summary``. When disabled, phases only
+    label traced epochs and the device is synchronized only at the end of
+    a traced epoch.
+    """
+
+    def __init__(self, device: torch.device, enabled: bool = True,
+                 trace_epochs: Optional[Sequence[int]] = None, trace_dir: str = 'training_traces'):
+        self.device = device
+        self.enabled = enabled
+        self.trace_epochs = tuple(trace_epochs) if trace_epochs else None
+        self.trace_dir = trace_dir
+        self.summary: Dict[str, float] = {}
+        self._times: Dict[str, float] = {}
+        self._samples = 0
+        self._tracing = False
+        self._rss_reset = False
+
+    def _synchronize(self):
+        if self.device.type == 'cuda':
+            torch.cuda.synchronize(self.device)
+
+    def _traced(self, epoch: int) -> bool:
+        if not self.trace_epochs:
+            return False
+        first, last = self.trace_epochs[0], self.trace_epochs[-1]
+        return first <= epoch <= last
+
+    @contextmanager
+    def epoch(self, number: int):
+        """Profile one epoch; writes a trace when ``number`` is in ``trace_epochs``."""
+        self._times = dict.fromkeys(PHASES, 0.0)
+        self._samples = 0
+        if self.enabled and self.device.type == 'cuda':
+            torch.cuda.reset_peak_memory_stats(self.device)
+        self._rss_reset = self.enabled and reset_peak_rss()
+
+        trace = self._traced(number)
+        context = nullcontext()
+        if trace:
+            activities = [torch.profiler.ProfilerActivity.CPU]
+            if self.device.type == 'cuda':
+                activities.append(torch.profiler.ProfilerActivity.CUDA)
+            context = torch.profiler.profile(activities=activities, profile_memory=True)
+
+        started = time.perf_counter()
+        self._tracing = trace
+        try:
+            with context as profiler:
+                yield self
+        finally:
+            self._tracing = False
+        if self.enabled or trace:
+            self._synchronize()
+        elapsed = time.perf_counter() - started
+
+        if trace:
+            os.makedirs(self.trace_dir, exist_ok=True)
+            path = os.path.join(self.trace_dir, f'trace_epoch_{number}.json')
+            profiler.export_chrome_trace(path)
+            logger.info(f"Wrote torch.profiler trace for epoch {number} to {path}")
+
+        if self.enabled:
+            self.summary = self._summarize(elapsed)
+
+    @contextmanager
+    def phase(self, name: str):
+        """
+        Time a phase of the current step and label it in traced epochs.
+
+        A no-op when profiling is disabled and the epoch is not traced.
+        """
+        if not self.enabled and not self._tracing:
+            yield
+            return
+
+        label = torch.profiler.record_function(name) if self._tracing else nullcontext()
+        started = time.perf_counter()
+        with label:
+            yield
+            if self.enabled:
+                self._synchronize()
+        if self.enabled:
+            self._times[name] += time.perf_counter() - started
+
+    def add_samples(self, count: int):
+        self._samples += count
+
+    def _summarize(self, elapsed: float) -> Dict[str, float]:
+        summary = {f'time_{name}': seconds for name, seconds in self._times.items()}
+        summary['time_epoch'] = elapsed
+        summary['time_other'] = max(0.0, elapsed - sum(self._times.values()))
+        summary['samples'] = self._samples
+        summary['samples_per_sec'] = self._samples / elapsed if elapsed > 0 else 0.0
+        if self._rss_reset:
+            summary['peak_rss_mb'] = peak_rss_since_reset_mb()
+        else:
+            summary['process_peak_rss_mb'] = peak_rss_mb()
+        if self.device.type == 'cuda':
+            summary['peak_cuda_memory_mb'] = torch.cuda.max_memory_allocated(self.device) / (1024 * 1024)
+        return summary
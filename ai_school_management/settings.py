@@ -198,6 +198,29 @@ CORS_ALLOW_CREDENTIALS = config('CORS_ALLOW_CREDENTIALS', default=True, cast=boo
 OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY', '')
 ELEVENLABS_API_KEY = os.environ.get('ELEVENLABS_API_KEY', '')
 
+# Worker concurrency (match the gunicorn --workers / --threads used in deployment).
+# Used to size per-process resources such as the computer vision detector pool.
+WEB_CONCURRENCY = config('WEB_CONCURRENCY', default=1, cast=int)
+WEB_THREADS = config('WEB_THREADS', default=1, cast=int)
+
+# Computer vision tuning
+# CV_DETECTOR_POOL_SIZE: Haar cascade detector pairs per process (0 = one per request thread)
+# OPENCV_NUM_THREADS: OpenCV internal threads per process (0 = cpu_count / (workers * threads))
+CV_DETECTOR_POOL_SIZE = config('CV_DETECTOR_POOL_SIZE', default=0, cast=int)
+OPENCV_NUM_THREADS = config('OPENCV_NUM_THREADS', default=0, cast=int)
+
+# Batch scoring (manage.py score_students)
+# PREDICTION_MODEL_PATH: trained StudentPerformancePredictor (joblib); empty scores risk only
+# SCORING_CHECKPOINT_PATH: progress file used to resume an interrupted run
+PREDICTION_MODEL_PATH = config('PREDICTION_MODEL_PATH', default='')
+SCORING_CHECKPOINT_PATH = config('SCORING_CHECKPOINT_PATH', default=str(BASE_DIR / 'logs' / 'score_students.checkpoint.json'))
+SCORING_CHUNK_SIZE = config('SCORING_CHUNK_SIZE', default=500, cast=int)
+
+# Training data extraction (manage.py extract_training_data)
+# TRAINING_DATA_DIR: root of the cached shard directories, one per dataset
+TRAINING_DATA_DIR = config('TRAINING_DATA_DIR', default=str(BASE_DIR / 'training_data'))
+TRAINING_EXTRACT_CHUNK_SIZE = config('TRAINING_EXTRACT_CHUNK_SIZE', default=5000, cast=int)
+
 # File Upload Settings
 MAX_UPLOAD_SIZE = 52428800  # 50MB
 FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800
@@ -0,0 +1,250 @@
+"""
+Student Feature Store
+Versioned per-student feature vectors shared by all predictors
+"""
+import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from analytics.models import EngagementAnalytics
+from students.models import AcademicRecord, LearningSession
+from .models import AIBehavioralAnalysis, ConversationMessage, StudentFeatureVector
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever the feature definitions below change; vectors of other
+# versions are left untouched so models trained on them keep working
+FEATURE_SET_VERSION = 'v1'
+
+
+def _to_float(value) -> Optional[float]:
+    # Aggregates over DecimalFields come back as Decimal, which JSONField cannot store
+    return None if value is None else float(value)
+
+
+def _ratio(numerator, denominator, scale: float = 1.0) -> Optional[float]:
+    if numerator is None or not denominator:
+        return None
+    return float(numerator) / float(denominator) * scale
+
+
+class StudentFeatureStore:
+    """
+    Incrementally maintained table of per-student feature vectors
+
+    ``refresh`` finds the students with source rows (academic records,
+    learning sessions, engagement analytics, behavioral analyses and
+    conversation messages) changed since the last run's watermark and
+    recomputes only their vectors, with one grouped aggregation per source
+    table per chunk of students. Readers fetch vectors for many students in
+    one indexed query.
+    """
+
+    # Re-scan a little before the watermark so rows committed while the
+    # previous refresh was running are not missed (recomputing is idempotent)
+    WATERMARK_OVERLAP = timedelta(minutes=5)
+    CHUNK_SIZE = 500
+
+    # Stamped on targeted refreshes into an empty store, so the next
+    # incremental run still scans every source row
+    NO_WATERMARK = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+    def __init__(self, version: str = FEATURE_SET_VERSION):
+        self.version = version
+
+    def watermark(self):
+        """
+        Time up to which source changes are reflected in the store, or None
+        """
+        return StudentFeatureVector.objects.filter(
+            feature_set_version=self.version
+        ).aggregate(watermark=Max('computed_through'))['watermark']
+
+    def changed_student_ids(self, since=None) -> Set[int]:
+        """
+        Ids of students (users) with source rows changed after ``since``
+        """
+        # Sessions have no updated_at; their outcome columns are filled in
+        # when the session ends, so end_time marks that change
+        sources = [
+            (AcademicRecord.objects, ['updated_at'], 'student__user_id'),
+            (LearningSession.objects, ['created_at', 'end_time'], 'student__user_id'),
+            (EngagementAnalytics.objects, ['updated_at'], 'student_id'),
+            (AIBehavioralAnalysis.objects, ['created_at'], 'student_id'),
+            (ConversationMessage.objects, ['timestamp'], 'conversation__student_id'),
+        ]
+
+        student_ids = set()
+        for manager, changed_fields, student_field in sources:
+            queryset = manager.all()
+            if since is not None:
+                changed = Q()
+                for changed_field in changed_fields:
+                    changed |= Q(**{f'{changed_field}__gt': since})
+                queryset = queryset.filter(changed)
+            student_ids.update(queryset.values_list(student_field, flat=True).distinct())
+        student_ids.discard(None)
+        return student_ids
+
+    def compute_features(self, student_ids: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Feature vectors for the given students from grouped aggregations
+        """
+        features = {student_id: {} for student_id in student_ids}
+
+        academic = AcademicRecord.objects.filter(student__user_id__in=student_ids).values(
+            'student__user_id'
+        ).annotate(
+            record_count=Count('id'),
+            avg_score=Avg('score'),
+            avg_attendance=Avg('attendance_percentage'),
+            avg_participation=Avg('participation_score'),
+        )
+        for row in academic:
+            features[row['student__user_id']].update({
+                'academic_record_count': row['record_count'],
+                'current_grade': _to_float(row['avg_score']),
+                'attendance_rate': _to_float(row['avg_attendance']),
+                'participation_rate': _to_float(row['avg_participation']),
+            })
+
+        sessions = LearningSession.objects.filter(student__user_id__in=student_ids).values(
+            'student__user_id'
+        ).annotate(
+            session_count=Count('id'),
+            completed_count=Count('id', filter=Q(completed=True)),
+            total_minutes=Sum('duration_minutes'),
+            active_days=Count(TruncDate('start_time'), distinct=True),
+            avg_attention=Avg('attention_score'),
+            avg_performance=Avg('performance_score'),
+        )
+        for row in sessions:
+            features[row['student__user_id']].update({
+                'session_count': row['session_count'],
+                'lesson_completion_rate': _ratio(row['completed_count'], row['session_count'], 100),
+                'study_time_daily': _ratio(row['total_minutes'], row['active_days']),
+                'session_attention_score': _to_float(row['avg_attention']),
+                'average_score': _to_float(row['avg_performance']),
+            })
+
+        engagement = EngagementAnalytics.objects.filter(student_id__in=student_ids).values(
+            'student_id'
+        ).annotate(
+            avg_engagement=Avg('total_engagement_score'),
+            avg_social=Avg('social_engagement'),
+            avg_attention_span=Avg('attention_span'),
+            avg_distractions=Avg('distraction_frequency'),
+        )
+        for row in engagement:
+            features[row['student_id']].update({
+                'average_engagement_score': _to_float(row['avg_engagement']),
+                'social_engagement': _to_float(row['avg_social']),
+                'attention_span_minutes': _to_float(row['avg_attention_span']),
+                'distraction_frequency': _to_float(row['avg_distractions']),
+            })
+
+        behavioral = AIBehavioralAnalysis.objects.filter(student_id__in=student_ids).values(
+            'student_id'
+        ).annotate(
+            analysis_count=Count('id'),
+            avg_attention=Avg('attention_score'),
+        )
+        for row in behavioral:
+            features[row['student_id']].update({
+                'behavioral_analysis_count': row['analysis_count'],
+                'attention_score': _to_float(row['avg_attention']),
+            })
+
+        messages = ConversationMessage.objects.filter(conversation__student_id__in=student_ids).values(
+            'conversation__student_id'
+        ).annotate(
+            user_messages=Count('id', filter=Q(message_type='user')),
+            conversations=Count('conversation', distinct=True),
+        )
+        for row in messages:
+            features[row['conversation__student_id']].update({
+                'conversation_count': row['conversations'],
+                'help_seeking_frequency': _ratio(row['user_messages'], row['conversations']),
+            })
+
+        for values in features.values():
+            # Behavioral analyses are the primary attention signal; sessions fill the gap
+            if values.get('attention_score') is None and values.get('session_attention_score') is not None:
+                values['attention_score'] = values['session_attention_score']
+
+        return features
+
+    def refresh(self, full: bool = False, student_ids: Optional[Iterable[int]] = None) -> int:
+        """
+        Recompute vectors for students changed since the watermark
+
+        ``full`` recomputes every student with source data; ``student_ids``
+        restricts the refresh to the given students. Returns the number of
+        vectors written.
+
+        A targeted refresh does not advance the watermark: its vectors are
+        stamped with the current one, so other students changed since then
+        are still picked up by the next incremental run.
+        """
+        computed_through = timezone.now()
+
+        if student_ids is not None:
+            changed = set(student_ids)
+            computed_through = self.watermark() or self.NO_WATERMARK
+        else:
+            since = None if full else self.watermark()
+            if since is not None:
+                since -= self.WATERMARK_OVERLAP
+            changed = self.changed_student_ids(since)
+
+        changed = sorted(changed)
+        written = 0
+        for start in range(0, len(changed), self.CHUNK_SIZE):
+            chunk = changed[start:start + self.CHUNK_SIZE]
+            vectors = [
+                StudentFeatureVector(
+                    student_id=student_id,
+                    feature_set_version=self.version,
+                    features=features,
+                    computed_through=computed_through,
+                )
+                for student_id, features in self.compute_features(chunk).items()
+            ]
+            StudentFeatureVector.objects.bulk_create(
+                vectors,
+                update_conflicts=True,
+                unique_fields=['student', 'feature_set_version'],
+                update_fields=['features', 'computed_through', 'updated_at'],
+            )
+            written += len(vectors)
+
+        logger.info(f"Feature store {self.version}: refreshed {written} student vectors")
+        return written
+
+    def get_features(self, student_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Stored feature vectors for many students in one indexed read
+
+        Students without a vector are omitted; features that could not be
+        computed (no source data) are dropped so callers can apply defaults.
+        """
+        rows = StudentFeatureVector.objects.filter(
+            feature_set_version=self.version, student_id__in=list(student_ids)
+        ).values_list('student_id', 'features')
+        return {
+            student_id: {name: value for name, value in features.items() if value is not None}
+            for student_id, features in rows
+        }
+
+    def get_student_features(self, student_id: int) -> Dict[str, Any]:
+        """
+        Stored feature vector for one student (empty if none)
+        """
+        return self.get_features([student_id]).get(int(student_id), {})
+
+
+feature_store = StudentFeatureStore()
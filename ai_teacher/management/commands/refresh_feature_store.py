@@ -0,0 +1,33 @@
+"""
+Recompute student feature vectors changed since the last refresh
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from ai_teacher.feature_store import FEATURE_SET_VERSION, StudentFeatureStore
+
+
+class Command(BaseCommand):
+    help = 'Refresh the student feature store from source rows changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='Recompute every student instead of only those changed since the watermark')
+        parser.add_argument('--student', type=int, action='append', dest='student_ids',
+                            help='Refresh only this student (user id); may be repeated')
+        parser.add_argument('--feature-version', default=FEATURE_SET_VERSION,
+                            help=f'Feature set version to write (default: {FEATURE_SET_VERSION})')
+
+    def handle(self, *args, **options):
+        store = StudentFeatureStore(version=options['feature_version'])
+        watermark = store.watermark()
+
+        started = time.perf_counter()
+        written = store.refresh(full=options['full'], student_ids=options['student_ids'])
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {written} feature vectors ({store.version}) in {elapsed:.2f}s "
+            f"(previous watermark: {watermark.isoformat() if watermark else 'none'})"
+        ))
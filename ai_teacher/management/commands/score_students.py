@@ -0,0 +1,124 @@
+"""
+Nightly batch scoring of every student into PredictiveAnalysis rows
+"""
+import json
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from ai_teacher.batch_scoring import CohortScorer
+from ai_teacher.models import PredictiveAnalysis
+from students.models import Student
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Score all students in chunks and store the results as PredictiveAnalysis rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=settings.SCORING_CHUNK_SIZE,
+                            help='Students scored per vectorized call and bulk insert')
+        parser.add_argument('--model', default=settings.PREDICTION_MODEL_PATH,
+                            help='Trained StudentPerformancePredictor file (default: PREDICTION_MODEL_PATH)')
+        parser.add_argument('--checkpoint', default=settings.SCORING_CHECKPOINT_PATH,
+                            help='Progress file used to resume an interrupted run')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore an unfinished checkpoint and score from the first student')
+        parser.add_argument('--refresh-features', action='store_true',
+                            help='Refresh the feature store incrementally before scoring')
+
+    def _read_checkpoint(self, path):
+        if not path or not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def _write_checkpoint(self, path, checkpoint):
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{path}.tmp'
+        with open(temporary, 'w') as f:
+            json.dump(checkpoint, f, indent=2)
+        os.replace(temporary, path)
+
+    def handle(self, *args, **options):
+        scorer = CohortScorer(model_path=options['model'])
+        if options['refresh_features']:
+            scorer.store.refresh()
+
+        checkpoint = self._read_checkpoint(options['checkpoint'])
+        if checkpoint and not checkpoint.get('completed') and not options['restart']:
+            self.stdout.write(f"Resuming run started {checkpoint['started_at']} "
+                              f"after student {checkpoint['last_student_id']}")
+        else:
+            checkpoint = {
+                'started_at': timezone.now().isoformat(),
+                'last_student_id': 0,
+                'students_scored': 0,
+                'rows_written': 0,
+                'completed': False,
+            }
+            # Persist the run's start first: it scopes the rows a resumed run replaces
+            self._write_checkpoint(options['checkpoint'], checkpoint)
+        run_started_at = datetime.fromisoformat(checkpoint['started_at'])
+
+        # Keyset pagination on the user id so a resumed run continues where it stopped
+        student_ids = Student.objects.filter(
+            user_id__gt=checkpoint['last_student_id']
+        ).order_by('user_id').values_list('user_id', flat=True).iterator(chunk_size=options['chunk_size'])
+
+        started = time.perf_counter()
+        students_scored = rows_written = 0
+        for chunk in _chunks(student_ids, options['chunk_size']):
+            analyses = scorer.score(chunk)
+            with transaction.atomic():
+                # A crash after the previous commit but before its checkpoint
+                # re-scores the chunk; replace this run's rows instead of duplicating them
+                PredictiveAnalysis.objects.filter(
+                    student_id__in=chunk, analysis_type='intervention_needed',
+                    model_version=scorer.model_version, analysis_date__gte=run_started_at,
+                ).delete()
+                PredictiveAnalysis.objects.bulk_create(analyses, batch_size=options['chunk_size'])
+
+            students_scored += len(chunk)
+            rows_written += len(analyses)
+            checkpoint.update({
+                'last_student_id': chunk[-1],
+                'students_scored': checkpoint['students_scored'] + len(chunk),
+                'rows_written': checkpoint['rows_written'] + len(analyses),
+                'updated_at': timezone.now().isoformat(),
+            })
+            self._write_checkpoint(options['checkpoint'], checkpoint)
+
+            elapsed = time.perf_counter() - started
+            if options['verbosity'] > 1:
+                self.stdout.write(f"  {students_scored} students, {rows_written} rows "
+                                  f"({rows_written / elapsed:.0f} rows/sec)")
+
+        checkpoint['completed'] = True
+        checkpoint['completed_at'] = timezone.now().isoformat()
+        self._write_checkpoint(options['checkpoint'], checkpoint)
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {students_scored} students, wrote {rows_written} rows in {elapsed:.2f}s "
+            f"({rows_written / elapsed if elapsed > 0 else 0:.0f} rows/sec); "
+            f"run total {checkpoint['rows_written']} rows"
+        ))
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-18 22:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ai_teacher', '0003_advancedbehavioralmetrics_conversationcontext_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentFeatureVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature_set_version', models.CharField(max_length=20)),
+                ('features', models.JSONField(default=dict)),
+                ('computed_through', models.DateTimeField(db_index=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feature_vectors', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'student_feature_vectors',
+                'unique_together': {('student', 'feature_set_version')},
+            },
+        ),
+    ]
@@ -602,3 +602,29 @@ class LearningOutcomePrediction(models.Model):
     
     def __str__(self):
         return f"Outcome Prediction: {self.lesson.title} for {self.student.get_full_name()}"
+
+
+class StudentFeatureVector(models.Model):
+    """
+    Versioned per-student feature vector shared by all predictors
+    """
+    student = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='feature_vectors')
+    
+    # Feature definition version (bumped whenever the feature set changes)
+    feature_set_version = models.CharField(max_length=20)
+    
+    # Feature values keyed by feature name
+    features = models.JSONField(default=dict)
+    
+    # Source rows changed up to this time are reflected in the features
+    computed_through = models.DateTimeField(db_index=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        db_table = 'student_feature_vectors'
+        unique_together = ['student', 'feature_set_version']
+    
+    def __str__(self):
+        return f"Features {self.feature_set_version} for {self.student.get_full_name()}"
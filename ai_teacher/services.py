@@ -4,7 +4,11 @@ Phase 2: Multi-language Support, Computer Vision, Predictive Analytics, NLU
 """
 import json
 import logging
+import queue
+import threading
 import numpy as np
+from collections import namedtuple
+from contextlib import contextmanager
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 from django.conf import settings
@@ -157,17 +161,104 @@ class MultiLanguageService:
         return prompt
 
 
+CascadeDetectors = namedtuple('CascadeDetectors', ['face', 'eye'])
+
+
+def configure_opencv_threads() -> int:
+    """
+    Limit OpenCV's internal thread pool so it does not oversubscribe cores.
+
+    Every request thread in every worker process can be inside an OpenCV call
+    at the same time, so each call gets cpu_count / (workers * threads) cores.
+    OPENCV_NUM_THREADS overrides the derived value.
+    """
+    num_threads = getattr(settings, 'OPENCV_NUM_THREADS', 0)
+    if num_threads <= 0:
+        concurrency = max(1, getattr(settings, 'WEB_CONCURRENCY', 1)) * max(1, getattr(settings, 'WEB_THREADS', 1))
+        num_threads = max(1, (os.cpu_count() or 1) // concurrency)
+    cv2.setNumThreads(num_threads)
+    return num_threads
+
+
+class CascadeDetectorPool:
+    """
+    Pool of Haar cascade detector pairs for threaded workers
+
+    cv2.CascadeClassifier instances keep internal buffers and must not be
+    used by two threads at once. Each caller checks out its own face/eye
+    pair; pairs are created lazily on first demand, up to ``size`` (the
+    worker's request thread count by default), and reused afterwards.
+    """
+
+    FACE_MODEL = 'haarcascade_frontalface_default.xml'
+    EYE_MODEL = 'haarcascade_eye.xml'
+
+    def __init__(self, size: Optional[int] = None):
+        self.size = max(1, size or getattr(settings, 'CV_DETECTOR_POOL_SIZE', 0) or getattr(settings, 'WEB_THREADS', 1))
+        self.opencv_threads = None
+        self._available = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> int:
+        return self._created
+
+    def _create_detectors(self) -> CascadeDetectors:
+        return CascadeDetectors(
+            face=cv2.CascadeClassifier(cv2.data.haarcascades + self.FACE_MODEL),
+            eye=cv2.CascadeClassifier(cv2.data.haarcascades + self.EYE_MODEL),
+        )
+
+    def _acquire(self, timeout: Optional[float]) -> CascadeDetectors:
+        try:
+            return self._available.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self.opencv_threads is None:
+                self.opencv_threads = configure_opencv_threads()
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._create_detectors()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        # Pool is at capacity: wait for another thread to return a pair
+        return self._available.get(timeout=timeout)
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """
+        Borrow a detector pair for the duration of a ``with`` block
+        """
+        detectors = self._acquire(timeout)
+        try:
+            yield detectors
+        finally:
+            self._available.put(detectors)
+
+
 class AdvancedComputerVisionService:
     """
     Advanced computer vision service for sophisticated behavioral analysis
     """
     
-    def __init__(self):
+    def __init__(self, detector_pool: Optional[CascadeDetectorPool] = None):
         # Load pre-trained models for emotion detection and pose estimation
         self.emotion_model = None
         self.pose_estimator = None
-        self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-        self.eye_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_eye.xml')
+        # Cascades are loaded lazily per thread from the pool, not at import time
+        self.detector_pool = detector_pool or CascadeDetectorPool()
         
     def analyze_student_behavior(self, frame: np.ndarray) -> Dict[str, Any]:
         """
@@ -202,7 +293,14 @@ class AdvancedComputerVisionService:
         Detect face and eyes for attention tracking
         """
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        faces = self.face_cascade.detectMultiScale(gray, 1.3, 5)
+        
+        with self.detector_pool.checkout() as detectors:
+            faces = detectors.face.detectMultiScale(gray, 1.3, 5)
+            # Detect eyes within each face region
+            eyes_per_face = [
+                detectors.eye.detectMultiScale(gray[y:y+h, x:x+w])
+                for (x, y, w, h) in faces
+            ]
         
         face_data = {
             'faces_detected': len(faces),
@@ -211,13 +309,9 @@ class AdvancedComputerVisionService:
             'head_pose': 'neutral'
         }
         
-        for (x, y, w, h) in faces:
+        for (x, y, w, h), eyes in zip(faces, eyes_per_face):
             face_data['face_positions'].append({'x': int(x), 'y': int(y), 'width': int(w), 'height': int(h)})
             
-            # Detect eyes within face region
-            roi_gray = gray[y:y+h, x:x+w]
-            eyes = self.eye_cascade.detectMultiScale(roi_gray)
-            
             if len(eyes) >= 2:
                 face_data['eye_contact'] = True
                 
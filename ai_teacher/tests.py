@@ -1,3 +1,202 @@
-from django.test import TestCase
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from students.models import AcademicRecord, LearningSession, Student
+from .feature_store import StudentFeatureStore, feature_store
+from .management.commands.score_students import Command as ScoreStudentsCommand
+from .models import PredictiveAnalysis, StudentFeatureVector
+from .services import AdvancedComputerVisionService, CascadeDetectorPool
+
+
+def _synthetic_frame(seed: int, width: int = 320, height: int = 240) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+class CascadeDetectorPoolTests(SimpleTestCase):
+    """
+    Stress tests for sharing the computer vision service across request threads
+    """
+
+    def test_detectors_are_created_lazily(self):
+        pool = CascadeDetectorPool(size=2)
+        self.assertEqual(pool.created, 0)
+
+        with pool.checkout():
+            self.assertEqual(pool.created, 1)
+        with pool.checkout():
+            self.assertEqual(pool.created, 1)
+
+    def test_checked_out_detectors_are_never_shared(self):
+        pool = CascadeDetectorPool(size=3)
+        in_use = set()
+        collisions = []
+
+        def borrow(_):
+            with pool.checkout() as detectors:
+                key = id(detectors)
+                if key in in_use:
+                    collisions.append(key)
+                in_use.add(key)
+                detectors.face.detectMultiScale(_synthetic_frame(0)[:, :, 0], 1.3, 5)
+                in_use.discard(key)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(borrow, range(200)))
+
+        self.assertEqual(collisions, [])
+        self.assertLessEqual(pool.created, 3)
+
+    def test_concurrent_analyses_match_sequential_results(self):
+        frames = [_synthetic_frame(seed) for seed in range(16)]
+        service = AdvancedComputerVisionService(detector_pool=CascadeDetectorPool(size=4))
+
+        expected = [service._detect_face_and_eyes(frame) for frame in frames]
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            for _ in range(5):
+                results = list(executor.map(service._detect_face_and_eyes, frames))
+                self.assertEqual(results, expected)
+
+            analyses = list(executor.map(service.analyze_student_behavior, frames * 4))
+
+        self.assertTrue(all('error' not in analysis for analysis in analyses))
+        self.assertLessEqual(service.detector_pool.created, 4)
+
+
+class StudentFeatureStoreTests(TestCase):
+    """
+    Incremental refresh and bulk reads of the student feature store
+    """
+
+    def setUp(self):
+        self.store = StudentFeatureStore(version='test')
+        self.store.WATERMARK_OVERLAP = timedelta(0)
+        self.students = []
+        for index in range(2):
+            user = get_user_model().objects.create(username=f'student{index}', email=f'student{index}@example.com')
+            self.students.append(Student.objects.create(
+                user=user, student_id=f'S{index}', grade_level='5',
+                academic_year='2024', enrollment_date=timezone.now().date()
+            ))
+
+    def _add_record(self, student, subject, score):
+        AcademicRecord.objects.create(student=student, subject=subject, semester='1',
+                                      academic_year='2024', grade='B', score=score)
+
+    def test_refresh_aggregates_source_rows(self):
+        now = timezone.now()
+        self._add_record(self.students[0], 'math', 90)
+        self._add_record(self.students[0], 'science', 80)
+        LearningSession.objects.create(student=self.students[0], session_type='quiz', completed=True,
+                                       start_time=now - timedelta(hours=1), end_time=now)
+
+        self.assertEqual(self.store.refresh(), 1)
+
+        features = self.store.get_student_features(self.students[0].user_id)
+        self.assertEqual(features['current_grade'], 85.0)
+        self.assertEqual(features['lesson_completion_rate'], 100.0)
+        self.assertEqual(features['study_time_daily'], 60.0)
+        self.assertNotIn('attendance_rate', features)
+
+    def test_refresh_only_recomputes_changed_students(self):
+        self._add_record(self.students[0], 'math', 90)
+        self.store.refresh()
+        first_update = StudentFeatureVector.objects.get(student=self.students[0].user).updated_at
+
+        self._add_record(self.students[1], 'math', 60)
+        self.assertEqual(self.store.refresh(), 1)
+
+        self.assertEqual(StudentFeatureVector.objects.get(student=self.students[0].user).updated_at, first_update)
+        user_ids = [student.user_id for student in self.students]
+        with self.assertNumQueries(1):
+            features = self.store.get_features(user_ids)
+        self.assertEqual({user_id: values['current_grade'] for user_id, values in features.items()},
+                         {user_ids[0]: 90.0, user_ids[1]: 60.0})
+
+    def test_refresh_picks_up_sessions_that_ended_after_the_watermark(self):
+        start = timezone.now() - timedelta(hours=2)
+        session = LearningSession.objects.create(student=self.students[0], session_type='quiz',
+                                                 start_time=start)
+        self.store.refresh()
+        self.assertEqual(self.store.get_student_features(self.students[0].user_id)['lesson_completion_rate'], 0.0)
+
+        # The session ends after the refresh; created_at does not move
+        session.end_time = timezone.now()
+        session.duration_minutes = 45
+        session.completed = True
+        session.performance_score = 80
+        session.save()
+
+        self.assertEqual(self.store.refresh(), 1)
+        features = self.store.get_student_features(self.students[0].user_id)
+        self.assertEqual(features['lesson_completion_rate'], 100.0)
+        self.assertEqual(features['average_score'], 80.0)
+
+    def test_targeted_refresh_does_not_advance_watermark(self):
+        self._add_record(self.students[0], 'math', 90)
+        self.store.refresh()
+        watermark = self.store.watermark()
+
+        self._add_record(self.students[1], 'math', 60)
+        self._add_record(self.students[0], 'science', 70)
+        self.assertEqual(self.store.refresh(student_ids=[self.students[0].user_id]), 1)
+        self.assertEqual(self.store.watermark(), watermark)
+
+        # The incremental run still sees the other student's change
+        self.assertEqual(self.store.refresh(), 2)
+        self.assertEqual(self.store.get_student_features(self.students[1].user_id)['current_grade'], 60.0)
+
+
+class ScoreStudentsCommandTests(TestCase):
+    """
+    Resumable nightly scoring into PredictiveAnalysis rows
+    """
+
+    def setUp(self):
+        self.user_ids = []
+        for index in range(2):
+            user = get_user_model().objects.create(username=f'scored{index}', email=f'scored{index}@example.com')
+            student = Student.objects.create(
+                user=user, student_id=f'R{index}', grade_level='5',
+                academic_year='2024', enrollment_date=timezone.now().date()
+            )
+            AcademicRecord.objects.create(student=student, subject='math', semester='1',
+                                          academic_year='2024', grade='C', score=55 + index * 30)
+            self.user_ids.append(user.id)
+        feature_store.refresh()
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), 'score_students.json')
+
+    def _score(self):
+        call_command('score_students', chunk_size=1, model='', checkpoint=self.checkpoint, stdout=StringIO())
+
+    def test_resume_after_crash_between_commit_and_checkpoint_does_not_duplicate_rows(self):
+        write_checkpoint = ScoreStudentsCommand._write_checkpoint
+        writes = []
+
+        def evicted_after_first_chunk(command, path, checkpoint):
+            writes.append(checkpoint['last_student_id'])
+            # Writes: run start, then after each chunk; die before the first chunk's
+            if len(writes) == 2:
+                raise RuntimeError('evicted')
+            write_checkpoint(command, path, checkpoint)
+
+        with mock.patch.object(ScoreStudentsCommand, '_write_checkpoint', evicted_after_first_chunk):
+            with self.assertRaises(RuntimeError):
+                self._score()
+        self.assertEqual(PredictiveAnalysis.objects.filter(student_id__in=self.user_ids).count(), 1)
+
+        self._score()
+
+        rows = PredictiveAnalysis.objects.filter(student_id__in=self.user_ids)
+        self.assertEqual(sorted(rows.values_list('student_id', flat=True)), sorted(self.user_ids))
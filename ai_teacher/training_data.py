@@ -0,0 +1,108 @@
+"""
+Training Data Sources
+Partitioned, streamed views of the tables the AI models are trained on
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List
+
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from students.models import AcademicRecord, LearningSession
+
+logger = logging.getLogger(__name__)
+
+# Dataset name -> how to partition and stream it. ``fields`` are passed to
+# QuerySet.values(); aliases (name=F(...)) give columns their training names.
+# ``content_aggregates`` go into the partition fingerprint for tables whose
+# rows are edited without moving ``changed_field``.
+TRAINING_DATASETS: Dict[str, Dict[str, Any]] = {
+    'academic_records': {
+        'model': AcademicRecord,
+        'partition': 'academic_year',
+        'changed_field': 'updated_at',
+        'fields': ['id', 'student_id', 'subject', 'semester', 'academic_year', 'grade', 'score',
+                   'attendance_percentage', 'participation_score'],
+        'aliases': {},
+        'numerical_columns': ['score', 'attendance_percentage', 'participation_score'],
+        'categorical_columns': ['subject', 'semester', 'academic_year', 'grade'],
+        'content_aggregates': {},
+    },
+    'learning_sessions': {
+        'model': LearningSession,
+        'partition': 'month',  # calendar month of start_time
+        'changed_field': 'created_at',
+        'fields': ['id', 'student_id', 'session_type', 'duration_minutes', 'attention_score',
+                   'engagement_level', 'completed', 'performance_score'],
+        'aliases': {'timestamp': F('start_time')},
+        'numerical_columns': ['duration_minutes', 'attention_score', 'performance_score'],
+        'categorical_columns': ['session_type', 'engagement_level'],
+        # Sessions have no updated_at; the outcome columns are filled in when
+        # a session ends, long after created_at
+        'content_aggregates': {
+            'ended_count': Count('end_time'),
+            'completed_count': Count('id', filter=Q(completed=True)),
+            'minutes_total': Sum('duration_minutes'),
+            'attention_total': Sum('attention_score'),
+            'performance_total': Sum('performance_score'),
+            'low_engagement_count': Count('id', filter=Q(engagement_level='low')),
+            'medium_engagement_count': Count('id', filter=Q(engagement_level='medium')),
+            'high_engagement_count': Count('id', filter=Q(engagement_level='high')),
+        },
+    },
+}
+
+
+def _next_month(month: datetime) -> datetime:
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+
+def training_partitions(dataset: str, chunk_size: int = 2000) -> List[Any]:
+    """
+    Extraction partitions of ``dataset`` with a fingerprint each
+
+    Fingerprints (row count, latest change time, highest id and any content
+    aggregates per partition) come from one grouped query; rows are only
+    streamed, with a server-side cursor, for partitions the extractor
+    decides to refresh.
+    """
+    from ai_ml.training.model_training.data_extraction import ExtractionPartition
+
+    definition = TRAINING_DATASETS[dataset]
+    model = definition['model']
+
+    if definition['partition'] == 'month':
+        grouped = model.objects.annotate(month=TruncMonth('start_time')).values('month')
+    else:
+        grouped = model.objects.values(definition['partition'])
+    content = definition['content_aggregates']
+    summaries = grouped.annotate(
+        row_count=Count('id'), last_change=Max(definition['changed_field']), last_id=Max('id'), **content
+    ).order_by(definition['partition'])
+
+    partitions = []
+    for summary in summaries:
+        key = summary[definition['partition']]
+        if definition['partition'] == 'month':
+            name = f"month={key:%Y-%m}"
+            filters = {'start_time__gte': key, 'start_time__lt': _next_month(key)}
+        else:
+            name = f"{definition['partition']}={key}"
+            filters = {definition['partition']: key}
+
+        def rows(filters=filters):
+            return model.objects.filter(**filters).order_by('id').values(
+                *definition['fields'], **definition['aliases']
+            ).iterator(chunk_size=chunk_size)
+
+        last_change = summary['last_change'].isoformat() if summary['last_change'] else ''
+        partitions.append(ExtractionPartition(
+            name=name,
+            fingerprint=':'.join([str(summary['row_count']), last_change, str(summary['last_id'])]
+                                 + [str(summary[name]) for name in content]),
+            rows=rows,
+        ))
+
+    logger.info(f"Training dataset {dataset}: {len(partitions)} partitions")
+    return partitions
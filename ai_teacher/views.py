@@ -1121,18 +1121,25 @@ class PredictiveAnalyticsView(APIView):
                 return Response({'error': 'Student not found'}, 
                               status=status.HTTP_404_NOT_FOUND)
             
-            # Prepare student data for prediction
+            # Prepare student data for prediction: values in the request win,
+            # then the student's stored feature vector, then defaults
+            from .feature_store import feature_store
+            stored_features = feature_store.get_student_features(student.id)
+            defaults = {
+                'current_grade': 85,
+                'attendance_rate': 90,
+                'assignment_completion_rate': 88,
+                'average_score': 82,
+                'average_engagement_score': 75,
+                'attention_score': 78,
+                'participation_rate': 80,
+                'study_time_daily': 120,
+                'lesson_completion_rate': 85,
+                'help_seeking_frequency': 3,
+            }
             student_data = {
-                'current_grade': request.data.get('current_grade', 85),
-                'attendance_rate': request.data.get('attendance_rate', 90),
-                'assignment_completion_rate': request.data.get('assignment_completion_rate', 88),
-                'average_score': request.data.get('average_score', 82),
-                'average_engagement_score': request.data.get('average_engagement_score', 75),
-                'attention_score': request.data.get('attention_score', 78),
-                'participation_rate': request.data.get('participation_rate', 80),
-                'study_time_daily': request.data.get('study_time_daily', 120),
-                'lesson_completion_rate': request.data.get('lesson_completion_rate', 85),
-                'help_seeking_frequency': request.data.get('help_seeking_frequency', 3),
+                name: request.data.get(name, stored_features.get(name, default))
+                for name, default in defaults.items()
             }
             
             # Generate predictions
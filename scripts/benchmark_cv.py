@@ -0,0 +1,189 @@
+"""
+Computer-vision throughput benchmark.
+
+Runs each stage of ``AdvancedComputerVisionService`` and
+``FacialEmotionRecognizer`` in isolation and end-to-end over deterministic
+synthetic frames (several resolutions, with and without a drawn face) and
+reports frames/sec, p50/p95 latency and peak memory per stage.
+
+CPU-only and offline: frames are generated locally and no models are
+downloaded.
+
+Usage:
+    python scripts/benchmark_cv.py
+    python scripts/benchmark_cv.py --resolutions 640x480 --iterations 100 --json cv_bench.json
+    python scripts/benchmark_cv.py --json current.json --baseline cv_bench.json --tolerance 0.15
+"""
+import argparse
+import itertools
+import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ai_school_management.settings')
+
+import cv2
+import numpy as np
+
+from benchmark_utils import build_report, compare_reports, measure_stage, print_report, write_report
+
+DEFAULT_RESOLUTIONS = '320x240,640x480,1280x720'
+
+
+def parse_resolutions(value: str):
+    """Parse ``WIDTHxHEIGHT`` pairs separated by commas."""
+    resolutions = []
+    for item in value.split(','):
+        width, height = item.lower().split('x')
+        resolutions.append((int(width), int(height)))
+    return resolutions
+
+
+def generate_frame(width: int, height: int, with_face: bool, seed: int) -> np.ndarray:
+    """
+    Generate a deterministic BGR frame.
+
+    The background is a gradient plus seeded noise so frames differ between
+    seeds but are identical across runs. With ``with_face`` a frontal face
+    (skin-toned ellipse, eyes, brows, nose and mouth) is drawn in the
+    centre, roughly where a webcam user would be.
+    """
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(40, 200, width, dtype=np.float32)[None, :, None]
+    frame = np.broadcast_to(gradient, (height, width, 3)).copy()
+    frame += rng.normal(0, 12, size=frame.shape).astype(np.float32)
+    frame = np.clip(frame, 0, 255).astype(np.uint8)
+
+    if with_face:
+        center_x = width // 2 + int(rng.integers(-width // 20, width // 20 + 1))
+        center_y = height // 2
+        face_w = max(24, width // 6)
+        face_h = int(face_w * 1.3)
+
+        cv2.ellipse(frame, (center_x, center_y), (face_w, face_h), 0, 0, 360, (150, 180, 220), -1)
+
+        eye_dx, eye_y = face_w // 2, center_y - face_h // 4
+        eye_size = (max(3, face_w // 6), max(2, face_w // 12))
+        for side in (-1, 1):
+            eye_center = (center_x + side * eye_dx, eye_y)
+            cv2.ellipse(frame, eye_center, eye_size, 0, 0, 360, (245, 245, 245), -1)
+            cv2.circle(frame, eye_center, max(2, eye_size[1]), (30, 30, 30), -1)
+            brow_start = (center_x + side * (eye_dx - eye_size[0]), eye_y - eye_size[0])
+            brow_end = (center_x + side * (eye_dx + eye_size[0]), eye_y - eye_size[0])
+            cv2.line(frame, brow_start, brow_end, (40, 50, 60), max(1, face_w // 25))
+
+        nose = np.array([[center_x, center_y - face_h // 10],
+                         [center_x - face_w // 8, center_y + face_h // 6],
+                         [center_x + face_w // 8, center_y + face_h // 6]], dtype=np.int32)
+        cv2.polylines(frame, [nose], True, (110, 130, 170), max(1, face_w // 30))
+        cv2.ellipse(frame, (center_x, center_y + face_h // 2), (face_w // 3, face_h // 10),
+                    0, 0, 180, (60, 60, 150), -1)
+
+    return frame
+
+
+def build_stages(cv_service, facial_recognizer, frames_bgr, label: str):
+    """Return ``(name, callable[, frames_per_call])`` tuples for every stage on the given frames."""
+    frames_rgb = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames_bgr]
+    stages = []
+
+    def cycling(fn, frames):
+        frame_iter = itertools.cycle(frames)
+        return lambda: fn(next(frame_iter))
+
+    if cv_service is not None:
+        stages.extend([
+            (f'cv.detect_face_and_eyes[{label}]', cycling(cv_service._detect_face_and_eyes, frames_bgr)),
+            (f'cv.attention_metrics[{label}]', cycling(cv_service._calculate_attention_metrics, frames_bgr)),
+            (f'cv.analyze_emotions[{label}]', cycling(cv_service._analyze_emotions, frames_bgr)),
+            (f'cv.analyze_posture[{label}]', cycling(cv_service._analyze_posture, frames_bgr)),
+            (f'cv.end_to_end[{label}]', cycling(cv_service.analyze_student_behavior, frames_bgr)),
+        ])
+
+    if facial_recognizer is not None:
+        def facial_end_to_end(frame):
+            features = facial_recognizer.extract_facial_features(frame)
+            return facial_recognizer._basic_emotion_analysis(features)
+
+        stages.extend([
+            (f'facial.extract_features[{label}]', cycling(facial_recognizer.extract_facial_features, frames_rgb)),
+            (f'facial.extract_features_batch[{label}]',
+             lambda: facial_recognizer.extract_facial_features_batch(frames_rgb), len(frames_rgb)),
+            (f'facial.end_to_end[{label}]', cycling(facial_end_to_end, frames_rgb)),
+        ])
+
+    return stages
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark the computer-vision pipeline on synthetic frames.')
+    parser.add_argument('--resolutions', default=DEFAULT_RESOLUTIONS,
+                        help=f'Comma-separated WIDTHxHEIGHT list (default: {DEFAULT_RESOLUTIONS})')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed calls per stage')
+    parser.add_argument('--warmup', type=int, default=3, help='Untimed calls per stage before timing')
+    parser.add_argument('--frames', type=int, default=8, help='Distinct frames generated per variant')
+    parser.add_argument('--seed', type=int, default=1234, help='Seed for frame generation')
+    parser.add_argument('--skip-cv-service', action='store_true', help='Skip AdvancedComputerVisionService stages')
+    parser.add_argument('--skip-facial', action='store_true', help='Skip FacialEmotionRecognizer stages')
+    parser.add_argument('--json', dest='json_path', help='Write the report as JSON to this path')
+    parser.add_argument('--baseline', help='Compare against a previous JSON report')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed relative regression versus the baseline (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    cv_service = None
+    if not args.skip_cv_service:
+        import django
+        django.setup()
+        from ai_teacher.services import AdvancedComputerVisionService
+        cv_service = AdvancedComputerVisionService()
+
+    facial_recognizer = None
+    if not args.skip_facial:
+        from ai_ml.emotional_intelligence.emotion_recognition import (
+            EmotionRecognitionConfig, FacialEmotionRecognizer
+        )
+        facial_recognizer = FacialEmotionRecognizer(EmotionRecognitionConfig())
+
+    results = []
+    for width, height in parse_resolutions(args.resolutions):
+        for with_face in (False, True):
+            label = f"{width}x{height},{'face' if with_face else 'no_face'}"
+            frames = [generate_frame(width, height, with_face, args.seed + i) for i in range(args.frames)]
+
+            for name, fn, *per_call in build_stages(cv_service, facial_recognizer, frames, label):
+                results.append(measure_stage(name, fn, iterations=args.iterations, warmup=args.warmup,
+                                             items_per_call=per_call[0] if per_call else 1))
+
+    report = build_report('computer_vision', results, parameters={
+        'resolutions': args.resolutions,
+        'iterations': args.iterations,
+        'warmup': args.warmup,
+        'frames': args.frames,
+        'seed': args.seed,
+        'opencv': cv2.__version__,
+        'opencv_threads': cv2.getNumThreads(),
+    })
+    print_report(report)
+
+    if args.json_path:
+        write_report(report, args.json_path)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) versus {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nNo regressions versus {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Neural network inference benchmark.
+
+Exports every ``ModelFactory`` model with ``ModelExporter`` (TorchScript,
+ONNX when available, and their dynamically int8-quantized variants) and
+measures CPU inference of the eager model and each exported variant:
+samples/sec, p50/p95 latency, peak memory, artifact size and output
+difference from the eager model.
+
+CPU-only and offline: models are randomly initialised and inputs are
+synthetic.
+
+Usage:
+    python scripts/benchmark_models.py
+    python scripts/benchmark_models.py --models performance_predictor,emotional_intelligence --batch-size 64
+    python scripts/benchmark_models.py --json models_bench.json --baseline models_baseline.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import torch
+
+from benchmark_utils import build_report, compare_reports, measure_stage, print_report, write_report
+
+DEFAULT_MODELS = 'performance_predictor,educational_transformer,adaptive_learning,learning_patterns,emotional_intelligence'
+
+
+def build_models(batch_size: int, seq_len: int):
+    """Return ``{name: (model, example_inputs)}`` for every ModelFactory model at serving-like sizes."""
+    from ai_ml.models.neural_networks.educational_neural_networks import ModelConfig, ModelFactory
+
+    generator = torch.Generator().manual_seed(0)
+
+    def features(*shape):
+        return torch.randn(*shape, generator=generator)
+
+    performance_config = ModelConfig(input_size=64, hidden_sizes=[256, 128, 64], output_size=5)
+    transformer_config = ModelConfig(input_size=5000, hidden_sizes=[256], output_size=5)
+
+    return {
+        'performance_predictor': (
+            ModelFactory.create_performance_predictor(performance_config),
+            (features(batch_size, 64),)
+        ),
+        'educational_transformer': (
+            ModelFactory.create_educational_transformer(transformer_config),
+            (torch.randint(0, 5000, (batch_size, seq_len), generator=generator),
+             torch.randint(0, 1000, (batch_size,), generator=generator))
+        ),
+        'adaptive_learning': (
+            ModelFactory.create_adaptive_learning_network(64, 128),
+            (features(batch_size, 64), features(batch_size, 128))
+        ),
+        'learning_patterns': (
+            ModelFactory.create_learning_pattern_recognizer(16, 128),
+            (features(batch_size, 50, 16), features(batch_size, 128))
+        ),
+        'emotional_intelligence': (
+            ModelFactory.create_emotional_intelligence_network(512, 256, 128),
+            (features(batch_size, 512), features(batch_size, 256), features(batch_size, 128))
+        ),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark eager vs exported (TorchScript/ONNX, fp32/int8) models.')
+    parser.add_argument('--models', default=DEFAULT_MODELS, help=f'Comma-separated model list (default: {DEFAULT_MODELS})')
+    parser.add_argument('--batch-size', type=int, default=32, help='Samples per inference call')
+    parser.add_argument('--seq-len', type=int, default=64, help='Sequence length for the transformer')
+    parser.add_argument('--iterations', type=int, default=50, help='Timed calls per variant')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed calls per variant before timing')
+    parser.add_argument('--threads', type=int, default=0, help='torch intra-op threads (0 = torch default)')
+    parser.add_argument('--formats', default='torchscript,onnx', help='Export formats to benchmark')
+    parser.add_argument('--no-quantize', action='store_true', help='Skip int8 variants')
+    parser.add_argument('--export-dir', help='Keep exported artifacts here (default: a temporary directory)')
+    parser.add_argument('--json', dest='json_path', help='Write the report as JSON to this path')
+    parser.add_argument('--baseline', help='Compare against a previous JSON report')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed relative regression versus the baseline (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    from ai_ml.models.neural_networks.model_export import ExportConfig, ModelExporter, OptimizedModel
+
+    export_dir = args.export_dir or tempfile.mkdtemp(prefix='model_export_')
+    exporter = ModelExporter(ExportConfig(output_dir=export_dir, formats=args.formats.split(','),
+                                          quantize=not args.no_quantize))
+
+    selected = args.models.split(',')
+    models = build_models(args.batch_size, args.seq_len)
+    unknown = set(selected) - set(models)
+    if unknown:
+        parser.error(f"Unknown model(s): {', '.join(sorted(unknown))}")
+
+    results = []
+    for name in selected:
+        model, inputs = models[name]
+        model.eval()
+        manifest = exporter.export(model, inputs, name)
+
+        def eager_call(model=model, inputs=inputs):
+            with torch.no_grad():
+                return model(*inputs)
+
+        result = measure_stage(f'{name}[eager]', eager_call, iterations=args.iterations,
+                               warmup=args.warmup, items_per_call=args.batch_size)
+        result['parameters'] = sum(p.numel() for p in model.parameters())
+        results.append(result)
+
+        for variant, entry in manifest['variants'].items():
+            if 'error' in entry:
+                print(f"Skipping {name}[{variant}]: {entry['error']}")
+                continue
+            optimized = OptimizedModel(name, variant, os.path.join(export_dir, name, entry['path']),
+                                       manifest['output_keys'], manifest['input_names'])
+            result = measure_stage(f'{name}[{variant}]', lambda optimized=optimized, inputs=inputs: optimized(*inputs),
+                                   iterations=args.iterations, warmup=args.warmup, items_per_call=args.batch_size)
+            result.update({
+                'artifact_mb': entry['size_mb'],
+                'relative_diff': entry.get('relative_diff'),
+                'parity_passed': entry.get('parity_passed'),
+            })
+            results.append(result)
+
+    report = build_report('model_inference', results, parameters={
+        'models': args.models,
+        'batch_size': args.batch_size,
+        'seq_len': args.seq_len,
+        'iterations': args.iterations,
+        'warmup': args.warmup,
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'formats': args.formats,
+        'quantize': not args.no_quantize,
+    })
+    print_report(report)
+
+    print(f"\n{'variant':<48} {'artifact MB':>12} {'rel. diff':>10} {'parity':>7}")
+    for result in results:
+        if 'artifact_mb' in result:
+            relative_diff = result['relative_diff']
+            print(f"{result['stage']:<48} {result['artifact_mb']:>12.2f} "
+                  f"{relative_diff if relative_diff is not None else float('nan'):>10.2e} "
+                  f"{'ok' if result['parity_passed'] else 'FAIL':>7}")
+
+    if args.json_path:
+        write_report(report, args.json_path)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) versus {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nNo regressions versus {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Training precision benchmark.
+
+Compares float32 and bfloat16-autocast training of the performance
+predictor on the CPU: time per optimizer step (forward, backward and
+update on one batch) and validation accuracy after a short training run
+through ``AdvancedTrainer``. bfloat16 is only measured when the CPU supports
+it natively; otherwise the trainer falls back to float32 and the bf16 rows
+are skipped.
+
+CPU-only and offline: the data is synthetic and seeded.
+
+Usage:
+    python scripts/benchmark_training.py
+    python scripts/benchmark_training.py --batch-size 256 --hidden-sizes 512,256,128 --threads 4
+    python scripts/benchmark_training.py --json training_bench.json --baseline training_baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import numpy as np
+import torch
+
+from benchmark_utils import build_report, compare_reports, measure_stage, print_report, write_report
+
+
+def synthetic_data(samples: int, features: int, classes: int, seed: int = 0):
+    """Seeded features with classes that depend (noisily) on a few of them."""
+    rng = np.random.default_rng(seed)
+    X = rng.standard_normal((samples, features)).astype(np.float32)
+    signal = X[:, :4] @ rng.standard_normal(4) + 0.3 * rng.standard_normal(samples)
+    y = np.digitize(signal, np.quantile(signal, np.linspace(0, 1, classes + 1)[1:-1]))
+    return X, y.astype(np.int64)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmark float32 vs bfloat16 autocast training on the CPU.')
+    parser.add_argument('--samples', type=int, default=20000, help='Synthetic training rows')
+    parser.add_argument('--features', type=int, default=64, help='Features per row')
+    parser.add_argument('--classes', type=int, default=5, help='Target classes')
+    parser.add_argument('--hidden-sizes', default='256,128,64', help='Comma-separated hidden layer sizes')
+    parser.add_argument('--batch-size', type=int, default=128, help='Rows per optimizer step')
+    parser.add_argument('--epochs', type=int, default=5, help='Epochs of the accuracy run')
+    parser.add_argument('--iterations', type=int, default=100, help='Timed optimizer steps per precision')
+    parser.add_argument('--warmup', type=int, default=10, help='Untimed steps per precision before timing')
+    parser.add_argument('--threads', type=int, default=0, help='torch intra-op threads (0 = torch default)')
+    parser.add_argument('--json', dest='json_path', help='Write the report as JSON to this path')
+    parser.add_argument('--baseline', help='Compare against a previous JSON report')
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help='Allowed relative regression versus the baseline (default: 0.10)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    from ai_ml.models.neural_networks.educational_neural_networks import ModelFactory
+    from ai_ml.training.model_training.advanced_training_pipeline import AdvancedTrainer, TrainingConfig
+    from ai_ml.training.model_training.mixed_precision import autocast, cpu_bf16_supported
+    logging.getLogger('ai_ml').setLevel(logging.WARNING)
+
+    hidden_sizes = [int(size) for size in args.hidden_sizes.split(',')]
+    X, y = synthetic_data(args.samples, args.features, args.classes)
+    device = torch.device('cpu')
+
+    precisions = {'fp32': False}
+    if cpu_bf16_supported():
+        precisions['bf16'] = True
+    else:
+        print("This CPU has no native bfloat16 support; the trainer falls back to float32, skipping bf16")
+
+    results, accuracies = [], {}
+    for name, mixed_precision in precisions.items():
+        config = TrainingConfig(
+            model_type='performance_predictor', input_size=args.features, hidden_sizes=hidden_sizes,
+            output_size=args.classes, batch_size=args.batch_size, num_epochs=args.epochs,
+            use_mixed_precision=mixed_precision, intra_op_threads=args.threads, profile_training=False
+        )
+        trainer = AdvancedTrainer(config, ModelFactory())
+
+        # Step time: one optimizer step on a fixed batch
+        torch.manual_seed(0)
+        model = trainer._create_model(config).to(device)
+        model.train()
+        criterion = trainer._create_loss_function(config)
+        optimizer = trainer._create_optimizer(model, config)
+        dtype = torch.bfloat16 if mixed_precision else None
+        batch = torch.from_numpy(X[:args.batch_size])
+        targets = torch.from_numpy(y[:args.batch_size])
+
+        def step():
+            optimizer.zero_grad()
+            with autocast(device, dtype):
+                loss = criterion(model(batch), targets)
+            loss.backward()
+            optimizer.step()
+
+        result = measure_stage(f'performance_predictor[{name}] step', step, iterations=args.iterations,
+                               warmup=args.warmup, items_per_call=args.batch_size)
+
+        # Accuracy: a short full training run through the trainer
+        torch.manual_seed(0)
+        _, metrics = trainer._train_single_model((X, y), config)
+        result['best_val_accuracy'] = metrics['best_val_accuracy']
+        accuracies[name] = metrics['best_val_accuracy']
+        results.append(result)
+
+    report = build_report('training_precision', results, parameters={
+        'samples': args.samples,
+        'features': args.features,
+        'classes': args.classes,
+        'hidden_sizes': args.hidden_sizes,
+        'batch_size': args.batch_size,
+        'epochs': args.epochs,
+        'iterations': args.iterations,
+        'torch': torch.__version__,
+        'torch_threads': torch.get_num_threads(),
+        'cpu_capability': torch.backends.cpu.get_cpu_capability(),
+        'bf16_supported': 'bf16' in precisions,
+    })
+    print_report(report)
+
+    print(f"\n{'precision':<10} {'best val accuracy':>18}")
+    for name, accuracy in accuracies.items():
+        print(f"{name:<10} {accuracy:>18.4f}")
+
+    if args.json_path:
+        write_report(report, args.json_path)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) versus {args.baseline}:")
+            for regression in regressions:
+                print(f"  - {regression}")
+            return 1
+        print(f"\nNo regressions versus {args.baseline} (tolerance {args.tolerance:.0%})")
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,129 @@
+"""
+Shared helpers for the benchmark scripts in this folder.
+
+Each benchmark measures a set of named stages and reports throughput,
+latency percentiles and memory as a text table and as JSON, so that two
+runs can be compared for regressions.
+"""
+import gc
+import json
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+
+def _max_rss_mb() -> float:
+    """Process peak resident set size in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return max_rss / (1024 * 1024)
+    return max_rss / 1024
+
+
+def measure_stage(name: str, fn: Callable[[], Any], iterations: int = 50,
+                  warmup: int = 3, items_per_call: int = 1) -> Dict[str, Any]:
+    """
+    Time ``fn`` for ``iterations`` calls and measure its memory on one extra call.
+
+    Timing and memory are measured in separate passes because tracemalloc
+    slows down allocation-heavy code and would skew the latency numbers.
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    latencies = np.empty(iterations, dtype=np.float64)
+    start_total = time.perf_counter()
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies[i] = time.perf_counter() - start
+    total_seconds = time.perf_counter() - start_total
+
+    rss_before = _max_rss_mb()
+    tracemalloc.start()
+    fn()
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'stage': name,
+        'iterations': iterations,
+        'items_per_call': items_per_call,
+        'items_per_sec': float(iterations * items_per_call / total_seconds) if total_seconds > 0 else 0.0,
+        'latency_ms_p50': float(np.percentile(latencies, 50) * 1000),
+        'latency_ms_p95': float(np.percentile(latencies, 95) * 1000),
+        'latency_ms_mean': float(latencies.mean() * 1000),
+        'peak_traced_mb': float(traced_peak / (1024 * 1024)),
+        'peak_rss_mb': float(_max_rss_mb()),
+        'rss_growth_mb': float(max(0.0, _max_rss_mb() - rss_before)),
+    }
+
+
+def build_report(benchmark: str, results: List[Dict[str, Any]],
+                 parameters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Wrap stage results with enough environment detail to compare runs."""
+    return {
+        'benchmark': benchmark,
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'numpy': np.__version__,
+        'parameters': parameters or {},
+        'results': results,
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    """Print stage results as a fixed-width table."""
+    header = f"{'stage':<48} {'items/s':>10} {'p50 ms':>9} {'p95 ms':>9} {'traced MB':>10} {'peak RSS MB':>12}"
+    print(f"\n{report['benchmark']} ({report['timestamp']})")
+    print(header)
+    print('-' * len(header))
+    for result in report['results']:
+        print(f"{result['stage']:<48} {result['items_per_sec']:>10.1f} {result['latency_ms_p50']:>9.2f} "
+              f"{result['latency_ms_p95']:>9.2f} {result['peak_traced_mb']:>10.2f} {result['peak_rss_mb']:>12.1f}")
+
+
+def write_report(report: Dict[str, Any], path: str):
+    """Write a report as JSON."""
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {path}")
+
+
+def compare_reports(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.10) -> List[str]:
+    """
+    Compare two reports stage by stage.
+
+    Returns a list of human-readable regressions: stages whose throughput
+    dropped, or whose p95 latency grew, by more than ``tolerance``.
+    """
+    baseline_by_stage = {result['stage']: result for result in baseline.get('results', [])}
+    regressions = []
+
+    for result in current['results']:
+        previous = baseline_by_stage.get(result['stage'])
+        if not previous:
+            continue
+
+        if previous['items_per_sec'] > 0:
+            change = result['items_per_sec'] / previous['items_per_sec'] - 1
+            if change < -tolerance:
+                regressions.append(f"{result['stage']}: throughput {change:+.1%} "
+                                   f"({previous['items_per_sec']:.1f} -> {result['items_per_sec']:.1f} items/s)")
+
+        if previous['latency_ms_p95'] > 0:
+            change = result['latency_ms_p95'] / previous['latency_ms_p95'] - 1
+            if change > tolerance:
+                regressions.append(f"{result['stage']}: p95 latency {change:+.1%} "
+                                   f"({previous['latency_ms_p95']:.2f} -> {result['latency_ms_p95']:.2f} ms)")
+
+    return regressions